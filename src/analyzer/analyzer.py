@@ -1,7 +1,14 @@
-from typing import List, TypeVar, cast
+from typing import Callable, List, Optional, Sequence, TypeVar, cast
 from collections import Counter
+from concurrent.futures import Executor
+from functools import partial
+import numpy as np
 
-from base.propertyClass import FullProperty, ValueProperty
+from base import profiling
+from base.profiling import profiled
+from base.propertyClass import FullProperty, FullPropertyBatch, ValueProperty, withBounds
+from base.solver import illinois
+from .parallel import chunkCount, mapChunks, splitChunks
 
 T = TypeVar("T", int, float)
 
@@ -15,6 +22,7 @@ class Bound :
         if value > self.upper : return  1
         return 0
 
+    @profiled()
     def locationBound(self, values : List[float]) -> List[int]:
         return [self.classify(value) for value in values]
     
@@ -27,20 +35,54 @@ class Bound :
         return Bound(property0.transformValue(), property1.transformValue()).locationBound(values)
 
 
-def analyseOutOfBoundFullProperty(properties : List[FullProperty], property0 : FullProperty, property1 : FullProperty) -> dict[tuple[int, int], int] :
-    valuesX, valuesY = FullProperty.getValuesXY(properties)
-    BoundX : List[int] = Bound.fromValueProperty(valuesX, property0.propertyX, property1.propertyX)
-    BoundY : List[int] = Bound.fromValueProperty(valuesY, property0.propertyY, property1.propertyY)
-    return Counter(zip(BoundX, BoundY))
+@profiled()
+def analyseOutOfBoundFullProperty(properties : List[FullProperty], property0 : FullProperty, property1 : FullProperty) -> dict[tuple[int, ...], int] :
+    values : List[List[float]] = FullProperty.getAllValuesSplited(properties)
+    bounds : List[List[int]] = [
+        Bound.fromValueProperty(value, subProperty0, subProperty1) 
+        for value, subProperty0, subProperty1 in zip(values, property0.getProperties(), property1.getProperties())
+    ]
+    return Counter(zip(*bounds))
 
-def mergeAnalyse(mapping : dict[tuple[int, int], T]) -> dict[tuple[int, int], T] :
-    merged : dict[tuple[int, int], T] = {}
-    for (i, j), count in mapping.items():
-        key = (i, j) if i >= j else (j, i) # order: i >> j
+# one pass over every dimension: the location (-1, 0, 1) of each value is a base 3 digit, the first dimension the most significant
+MAX_DENSE_DIMENSIONS : int = 15
+
+def locationCodes(values : np.ndarray, lower : np.ndarray, upper : np.ndarray) -> np.ndarray :
+    location : np.ndarray = (values > upper).astype(np.int64) - (values < lower) + 1
+    powers : np.ndarray = 3 ** np.arange(len(values) - 1, -1, -1, dtype=np.int64)
+    return np.tensordot(powers, location, axes=1)
+
+# values (D, ...) are classified against lower and upper (broadcast against values) and counted in a (3,) * D array
+@profiled()
+def locationCounts(values : np.ndarray, lower : np.ndarray, upper : np.ndarray) -> np.ndarray :
+    dimensions : int = len(values)
+    assert dimensions <= MAX_DENSE_DIMENSIONS, f"Error in locationCounts. {dimensions} dimensions, the dense count is limited to {MAX_DENSE_DIMENSIONS}."
+    codes : np.ndarray = locationCodes(values, lower, upper)
+    return np.bincount(codes.ravel(), minlength=3 ** dimensions).reshape((3,) * dimensions)
+
+# int counts give int values, interval lengths (analyseOneFullPropertyIntervals) float values
+def countsToMapping(counts : np.ndarray) -> dict[tuple[int, ...], T] :
+    return {tuple((index - 1).tolist()): counts[tuple(index)].item() for index in np.argwhere(counts != 0)}
+
+def analyseOutOfBoundValues(values : np.ndarray, lower : np.ndarray, upper : np.ndarray) -> dict[tuple[int, ...], int] :
+    return countsToMapping(locationCounts(values, lower[:, np.newaxis], upper[:, np.newaxis]))
+
+def mergeAnalyse(mapping : dict[tuple[int, ...], T]) -> dict[tuple[int, ...], T] :
+    merged : dict[tuple[int, ...], T] = {}
+    for location, count in mapping.items():
+        key = tuple(sorted(location, reverse=True)) # order: i >> j >> ...
         merged[key] = merged.get(key, 0) + count
     return merged
 
-def mappingToPercent(mapping : dict[tuple[int, int], int]) -> dict[tuple[int, int], float] :
+# mapping restricted to some dimensions (summed over the other ones), e.g. a pair for displayMapping
+def marginalMapping(mapping : dict[tuple[int, ...], T], dimensions : Sequence[int]) -> dict[tuple[int, ...], T] :
+    marginal : dict[tuple[int, ...], T] = {}
+    for location, count in mapping.items():
+        key = tuple([location[dimension] for dimension in dimensions])
+        marginal[key] = marginal.get(key, 0) + count
+    return marginal
+
+def mappingToPercent(mapping : dict[tuple[int, ...], int]) -> dict[tuple[int, ...], float] :
     total : float = float(sum(mapping.values()))
     values : list[float] = [100.0 * float(val) / total for val in mapping.values()]
     return {key: value for key, value in zip(mapping.keys(), values)}
@@ -48,13 +90,181 @@ def mappingToPercent(mapping : dict[tuple[int, int], int]) -> dict[tuple[int, in
 def mergeDict(dict1 : dict, dict2 : dict) -> dict :
     return {k: dict1.get(k, 0) + dict2.get(k, 0) for k in set(dict1) | set(dict2)}
 
-def analyseOneFullProperty(property : FullProperty, lerpProperties : List[FullProperty], count : int) -> dict[tuple[int, int], int] :
+@profiled()
+def analyseOneFullPropertyReference(property : FullProperty, lerpProperties : List[FullProperty], count : int) -> dict[tuple[int, ...], int] :
     iter : List[float] = [float(i) / float(count) for i in range(count+1)] 
-    ret : dict[tuple[int, int], int] = {}
+    ret : dict[tuple[int, ...], int] = {}
 
-    for lerpProperty in lerpProperties :
+    for done, lerpProperty in enumerate(lerpProperties) :
         lerped : List[FullProperty] = [cast(FullProperty, FullProperty.lerp(property, lerpProperty, i)) for i in iter]
         tmp = analyseOutOfBoundFullProperty(lerped, property, lerpProperty)
         ret = mergeDict(ret, tmp)
+        profiling.count("lerps", len(iter))
+        profiling.progress("analyseOneFullPropertyReference", done + 1, len(lerpProperties))
     
-    return ret
\ No newline at end of file
+    return ret
+
+@profiled()
+def outOfBoundCounts(base : FullPropertyBatch, lerpProperties : FullPropertyBatch, count : int, chunkSize : int = 1 << 20) -> np.ndarray :
+    assert count > 0, "Error in outOfBoundCounts. count must be over 0."
+    assert len(base) == 1, "Error in outOfBoundCounts. base must hold a single FullProperty."
+    coefs : np.ndarray = withBounds(np.arange(count + 1) / count) # bounds are evaluated with the samples
+    dimensions : int = base.dimensions()
+    counts : np.ndarray = np.zeros((3,) * dimensions, dtype=np.int64)
+
+    step : int = max(1, chunkSize // len(coefs))
+    for start in range(0, len(lerpProperties), step) :
+        chunk : FullPropertyBatch = lerpProperties.take(np.arange(start, min(start + step, len(lerpProperties))))
+        values : np.ndarray = base.lerp(chunk, coefs).getValues().reshape(dimensions, len(chunk), len(coefs))
+        bounds : np.ndarray = values[:, :, :2]
+        counts += locationCounts(values[:, :, 2:], bounds.min(axis=2, keepdims=True), bounds.max(axis=2, keepdims=True))
+        profiling.count("lerps", len(chunk) * (count + 1))
+        profiling.progress("outOfBoundCounts", min(start + step, len(lerpProperties)), len(lerpProperties))
+
+    return counts
+
+# outOfBoundCounts of every pair (bases[n], others[n]) on its own: (N,) + (3,) * D counts
+@profiled()
+def outOfBoundPairCounts(bases : FullPropertyBatch, others : FullPropertyBatch, count : int) -> np.ndarray :
+    assert count > 0, "Error in outOfBoundPairCounts. count must be over 0."
+    assert len(bases) == len(others), "Error in outOfBoundPairCounts. bases and others must be the same size."
+    coefs : np.ndarray = withBounds(np.arange(count + 1) / count)
+    dimensions, pairs = bases.dimensions(), len(bases)
+    if pairs == 0 : return np.zeros((0,) + (3,) * dimensions, dtype=np.int64)
+
+    values : np.ndarray = bases.lerp(others, coefs).getValues().reshape(dimensions, pairs, len(coefs))
+    bounds : np.ndarray = values[:, :, :2]
+    codes : np.ndarray = locationCodes(values[:, :, 2:], bounds.min(axis=2, keepdims=True), bounds.max(axis=2, keepdims=True))
+    profiling.count("lerps", pairs * (count + 1))
+    cells : int = 3 ** dimensions
+    return np.bincount((codes + np.arange(pairs)[:, np.newaxis] * cells).ravel(), minlength=pairs * cells).reshape((pairs,) + (3,) * dimensions)
+
+@profiled()
+def analyseOneFullProperty(
+        property : FullProperty, 
+        lerpProperties : List[FullProperty], 
+        count : int, 
+        workers : int = 1, 
+        executor : Optional[Executor] = None
+    ) -> dict[tuple[int, ...], int] :
+    if len(lerpProperties) == 0 : return {}
+    base : FullPropertyBatch = FullProperty.makeBatch([property])
+    chunks : List[FullPropertyBatch] = [FullProperty.makeBatch(chunk) for chunk in splitChunks(lerpProperties, chunkCount(workers))]
+
+    # partial counts are integers, the sum is the same for any split
+    counts : List[np.ndarray] = mapChunks(partial(outOfBoundCounts, base, count=count), chunks, workers, executor)
+    return countsToMapping(np.sum(counts, axis=0))
+
+
+# Exact mode: along every lerp path the transformed values are bracketed on a grid of coefs, the grid extrema that
+# get near a bound are zoomed on, and every crossing of a bound is refined with the Illinois method. Between two
+# crossings the location is constant, the result is the length (fraction of coef) of the path spent in each cell.
+# An excursion narrower than a grid step that does not show as a grid extremum can still be missed. A dimension whose
+# grid values stay within CONSTANT_RTOL of each other (a property lerped with itself) is constant: its noise would be
+# taken for crossings, it has none and stays within its bounds.
+
+CONSTANT_RTOL : float = 1e-12
+
+# values (D, B, K) of the lerp of base with lerpProperties[pairs[b]] at coefs (B, K)
+def lerpValues(base : FullPropertyBatch, lerpProperties : FullPropertyBatch, pairs : np.ndarray, coefs : np.ndarray) -> np.ndarray :
+    profiling.count("lerps", len(pairs) * coefs.shape[1])
+    return base.lerp(lerpProperties.take(pairs), coefs).getValues().reshape(base.dimensions(), len(pairs), coefs.shape[1])
+
+def sampleBrackets(t : np.ndarray, g : np.ndarray) -> tuple[np.ndarray, np.ndarray] :
+    # t, g (..., K): sign changes (index of the left sample) and exact zeros of g between the first and last sample
+    sign : np.ndarray = np.sign(g)
+    brackets : np.ndarray = np.argwhere(sign[..., :-1] * sign[..., 1:] < 0)
+    zeros : np.ndarray = np.argwhere(sign[..., 1:-1] == 0)
+    zeros[:, -1] += 1
+    return brackets, zeros
+
+# location code and length of every segment between crossings, in the order of the paths then of the coefs
+@profiled()
+def crossingSegments(
+        base : FullPropertyBatch, 
+        lerpProperties : FullPropertyBatch, 
+        brackets : int = 128, 
+        zoom : int = 16, 
+        xtol : float = 1e-12
+    ) -> tuple[np.ndarray, np.ndarray] :
+    assert brackets > 0 and zoom > 0, "Error in crossingSegments. brackets and zoom must be over 0."
+    assert len(base) == 1, "Error in crossingSegments. base must hold a single FullProperty."
+    count : int = len(lerpProperties)
+    pairs : np.ndarray = np.arange(count)
+
+    grid : np.ndarray = np.linspace(0, 1, brackets + 1)
+    values : np.ndarray = lerpValues(base, lerpProperties, pairs, grid[np.newaxis])
+    lower : np.ndarray = np.minimum(values[..., 0], values[..., -1])
+    upper : np.ndarray = np.maximum(values[..., 0], values[..., -1])
+    bounds : np.ndarray = np.stack([lower, upper]) # (2, D, N)
+    g : np.ndarray = values[np.newaxis] - bounds[..., np.newaxis] # (2, D, N, T)
+    constant : np.ndarray = np.ptp(values, axis=-1) <= CONSTANT_RTOL * np.abs(values).max(axis=-1) # (D, N)
+    g[:, constant] = 1
+
+    # crossings: (bound, dimension, pair) with the bracket [t0, t1] and g at both ends
+    found : List[tuple[np.ndarray, ...]] = []
+    roots : List[tuple[np.ndarray, np.ndarray]] = []
+    segment, zeros = sampleBrackets(grid, g)
+    k, d, n, i = segment.T
+    found.append((k, d, n, grid[i], grid[i + 1], g[k, d, n, i], g[k, d, n, i + 1]))
+    roots.append((zeros[:, 2], grid[zeros[:, 3]]))
+
+    # grid extrema turned toward a bound without crossing it are sampled again around them
+    magnitude : np.ndarray = np.abs(g)
+    sign : np.ndarray = np.sign(g)
+    suspect : np.ndarray = (
+        (magnitude[..., 1:-1] < magnitude[..., :-2]) & (magnitude[..., 1:-1] <= magnitude[..., 2:]) 
+        & (sign[..., :-2] == sign[..., 1:-1]) & (sign[..., 1:-1] == sign[..., 2:]) & (sign[..., 1:-1] != 0)
+    )
+    k, d, n, i = np.argwhere(suspect).T
+    if len(n) != 0 :
+        t : np.ndarray = grid[i, np.newaxis] + (grid[i + 2] - grid[i])[:, np.newaxis] * np.linspace(0, 1, zoom + 2)[1:-1]
+        zoomed : np.ndarray = lerpValues(base, lerpProperties, n, t)[d, np.arange(len(n))] - bounds[k, d, n][:, np.newaxis]
+        t = np.concatenate((grid[i, np.newaxis], t, grid[i + 2, np.newaxis]), axis=1)
+        zoomed = np.concatenate((g[k, d, n, i, np.newaxis], zoomed, g[k, d, n, i + 2, np.newaxis]), axis=1)
+        segment, zeros = sampleBrackets(t, zoomed)
+        j, s = segment.T
+        found.append((k[j], d[j], n[j], t[j, s], t[j, s + 1], zoomed[j, s], zoomed[j, s + 1]))
+        roots.append((n[zeros[:, 0]], t[zeros[:, 0], zeros[:, 1]]))
+
+    k, d, n, t0, t1, g0, g1 = [np.concatenate(column) for column in zip(*found)]
+    if len(n) != 0 :
+        evaluate = lambda rows, t : lerpValues(base, lerpProperties, n[rows], t[:, np.newaxis])[d[rows], np.arange(len(rows)), 0] - bounds[k[rows], d[rows], n[rows]]
+        roots.append((n, illinois(evaluate, t0, t1, g0, g1, xtol)))
+
+    # segments between consecutive crossings of every path, classified at their middle
+    rootPairs, rootCoefs = [np.concatenate(column) for column in zip(*roots)]
+    rootPairs = np.concatenate((rootPairs, pairs, pairs))
+    rootCoefs = np.concatenate((rootCoefs, np.zeros(count), np.ones(count)))
+    order : np.ndarray = np.lexsort((rootCoefs, rootPairs))
+    rootPairs, rootCoefs = rootPairs[order], rootCoefs[order]
+
+    lengths : np.ndarray = np.diff(rootCoefs)
+    keep : np.ndarray = (rootPairs[1:] == rootPairs[:-1]) & (lengths > 0)
+    segmentPairs, lengths = rootPairs[1:][keep], lengths[keep]
+    middles : np.ndarray = (rootCoefs[:-1][keep] + rootCoefs[1:][keep]) / 2
+
+    middleValues : np.ndarray = lerpValues(base, lerpProperties, segmentPairs, middles[:, np.newaxis])[..., 0]
+    codes : np.ndarray = locationCodes(middleValues, 
+        np.where(constant, -np.inf, lower)[:, segmentPairs], np.where(constant, np.inf, upper)[:, segmentPairs])
+    return codes, lengths
+
+# per 3x3 (3 ** D) cell, the total length of the lerp paths spent in it: each path adds 1 over the cells
+@profiled()
+def analyseOneFullPropertyIntervals(
+        property : FullProperty, 
+        lerpProperties : List[FullProperty], 
+        brackets : int = 128,
+        zoom : int = 16,
+        xtol : float = 1e-12,
+        workers : int = 1, 
+        executor : Optional[Executor] = None
+    ) -> dict[tuple[int, ...], float] :
+    if len(lerpProperties) == 0 : return {}
+    base : FullPropertyBatch = FullProperty.makeBatch([property])
+    chunks : List[FullPropertyBatch] = [FullProperty.makeBatch(chunk) for chunk in splitChunks(lerpProperties, chunkCount(workers))]
+
+    # segments are summed one by one in the order of the paths, the float sums are the same for any split
+    segments : List[tuple[np.ndarray, np.ndarray]] = mapChunks(partial(crossingSegments, base, brackets=brackets, zoom=zoom, xtol=xtol), chunks, workers, executor)
+    codes, lengths = [np.concatenate(column) for column in zip(*segments)]
+    return countsToMapping(np.bincount(codes, weights=lengths, minlength=3 ** base.dimensions()).reshape((3,) * base.dimensions()))
@@ -0,0 +1,139 @@
+from typing import Iterator, List, Optional, Sequence
+from functools import lru_cache
+from math import comb
+import numpy as np
+
+# Compositions of total into parts integers >= minimum (1 for analyseIter, 0 for analyseIterv2), in the order of the
+# former updateWeight steppers: lexicographic on weights[1:], weights[0] takes the remainder.
+
+
+def compositionCount(parts : int, total : int, minimum : int = 1) -> int :
+    assert parts >= 0 and minimum >= 0, "Error in compositionCount. parts and minimum must be >= 0."
+    free : int = total - parts * minimum
+    if parts == 0 : return 1 if total == 0 else 0
+    if free < 0 : return 0
+    return comb(free + parts - 1, parts - 1)
+
+# table[p, s] = compositionCount(p, s, minimum)
+def compositionTable(parts : int, total : int, minimum : int = 1) -> np.ndarray :
+    assert compositionCount(parts, total, minimum) < 2**62, "Error in compositionTable. Too many compositions for int64 ranks."
+    return np.array([[compositionCount(p, s, minimum) for s in range(total + 1)] for p in range(parts + 1)], dtype=np.int64)
+
+
+def rankComposition(weights : Sequence[int], minimum : int = 1) -> int :
+    assert len(weights) > 0, "Error in rankComposition. weights is empty."
+    assert all([weight >= minimum for weight in weights]), f"Error in rankComposition. All weights must be >= {minimum}."
+    rank : int = 0
+    remaining : int = sum(weights)
+    for position in range(1, len(weights)) :
+        partsAfter : int = len(weights) - position
+        rank += sum([compositionCount(partsAfter, remaining - value, minimum) for value in range(minimum, weights[position])])
+        remaining -= weights[position]
+    return rank
+
+def rankCompositions(weights : np.ndarray, minimum : int = 1) -> np.ndarray :
+    weights = np.atleast_2d(np.asarray(weights, dtype=np.int64))
+    parts, total = weights.shape[1], int(weights[0].sum()) if len(weights) else 0
+    assert (weights.sum(axis=1) == total).all(), "Error in rankCompositions. All weights must have the same total."
+    assert (weights >= minimum).all(), f"Error in rankCompositions. All weights must be >= {minimum}."
+    table : np.ndarray = compositionTable(parts, total, minimum)
+
+    ranks : np.ndarray = np.zeros(len(weights), dtype=np.int64)
+    remaining : np.ndarray = np.full(len(weights), total, dtype=np.int64)
+    for position in range(1, parts) :
+        partsAfter : int = parts - position
+        for value in range(minimum, int(weights[:, position].max(initial=minimum))) :
+            below : np.ndarray = value < weights[:, position]
+            ranks += np.where(below, table[partsAfter, np.clip(remaining - value, 0, total)], 0)
+        remaining -= weights[:, position]
+    return ranks
+
+# prefix[p, s, k] = number of compositions of s into p + 1 parts whose first part is below minimum + k
+def compositionPrefixTable(parts : int, total : int, minimum : int = 1) -> np.ndarray :
+    table : np.ndarray = compositionTable(parts, total, minimum)
+    remaining : np.ndarray = np.arange(total + 1)[:, np.newaxis] - (minimum + np.arange(total + 1))[np.newaxis, :]
+    following : np.ndarray = np.where(remaining >= 0, table[:, np.clip(remaining, 0, total)], 0)
+    prefix : np.ndarray = np.zeros((parts + 1, total + 1, total + 2), dtype=np.int64)
+    np.cumsum(following, axis=2, out=prefix[:, :, 1:])
+    return prefix
+
+def unrankCompositions(ranks : np.ndarray, parts : int, total : int, minimum : int = 1) -> np.ndarray :
+    assert parts > 0, "Error in unrankCompositions. parts must be over 0."
+    count : int = compositionCount(parts, total, minimum)
+    ranks = np.array(ranks, dtype=np.int64).ravel()
+    assert ((ranks >= 0) & (ranks < count)).all(), "Error in unrankCompositions. rank out of the lattice."
+    prefix : np.ndarray = compositionPrefixTable(parts, total, minimum)
+    rows : np.ndarray = np.arange(len(ranks))
+
+    ret : np.ndarray = np.empty((len(ranks), parts), dtype=np.int64)
+    remaining : np.ndarray = np.full(len(ranks), total, dtype=np.int64)
+    for position in range(1, parts) :
+        before : np.ndarray = prefix[parts - position, remaining]
+        skipped : np.ndarray = (before <= ranks[:, np.newaxis]).sum(axis=1) - 1
+        ranks -= before[rows, skipped]
+        ret[:, position] = minimum + skipped
+        remaining -= ret[:, position]
+    ret[:, 0] = remaining
+    return ret
+
+
+CACHED_LATTICE_ROWS : int = 1 << 12
+
+# whole lattice stored as weights[1:] + [weights[0]], small ones are cached and sliced
+@lru_cache(maxsize=1024)
+def tailLattice(parts : int, total : int, minimum : int) -> np.ndarray :
+    if parts == 1 : 
+        return np.array([[total]] if total >= minimum else [], dtype=np.int64).reshape(-1, 1)
+    if parts == 2 : # closed form, the recursion would cache one single row lattice per value
+        first : np.ndarray = np.arange(minimum, total - minimum + 1, dtype=np.int64)
+        pairs : np.ndarray = np.stack((first, total - first), axis=1)
+        pairs.flags.writeable = False
+        return pairs
+    blocks : List[np.ndarray] = []
+    for value in range(minimum, total - (parts - 1) * minimum + 1) :
+        tail : np.ndarray = tailLattice(parts - 1, total - value, minimum)
+        blocks.append(np.hstack((np.full((len(tail), 1), value, dtype=np.int64), tail)))
+    ret : np.ndarray = np.concatenate(blocks) if len(blocks) != 0 else np.zeros((0, parts), dtype=np.int64)
+    ret.flags.writeable = False
+    return ret
+
+def tailSlice(parts : int, total : int, minimum : int, start : int, stop : int) -> np.ndarray :
+    if compositionCount(parts, total, minimum) <= CACHED_LATTICE_ROWS :
+        return tailLattice(parts, total, minimum)[start:stop]
+
+    blocks : List[np.ndarray] = []
+    offset : int = 0
+    for value in range(minimum, total - (parts - 1) * minimum + 1) :
+        size : int = compositionCount(parts - 1, total - value, minimum)
+        begin, end = max(start, offset), min(stop, offset + size)
+        if begin < end :
+            tail : np.ndarray = tailSlice(parts - 1, total - value, minimum, begin - offset, end - offset)
+            blocks.append(np.hstack((np.full((len(tail), 1), value, dtype=np.int64), tail)))
+        offset += size
+        if offset >= stop : break
+    return np.concatenate(blocks) if len(blocks) != 0 else np.zeros((0, parts), dtype=np.int64)
+
+# compositions of rank start to stop, blockSize at a time. Equivalent to unrankCompositions on each block.
+def compositionBlocks(
+        parts : int, 
+        total : int, 
+        minimum : int = 1, 
+        blockSize : int = 1 << 16, 
+        start : int = 0, 
+        stop : Optional[int] = None
+    ) -> Iterator[np.ndarray] :
+    assert parts > 0, "Error in compositionBlocks. parts must be over 0."
+    assert blockSize > 0, "Error in compositionBlocks. blockSize must be over 0."
+    count : int = compositionCount(parts, total, minimum)
+    stop = count if stop is None else min(stop, count)
+    for begin in range(start, stop, blockSize) :
+        tail : np.ndarray = tailSlice(parts, total, minimum, begin, min(begin + blockSize, stop))
+        yield np.hstack((tail[:, -1:], tail[:, :-1]))
+
+def compositions(parts : int, total : int, minimum : int = 1) -> np.ndarray :
+    blocks : List[np.ndarray] = list(compositionBlocks(parts, total, minimum))
+    return np.concatenate(blocks) if len(blocks) != 0 else np.zeros((0, parts), dtype=np.int64)
+
+def splitRanks(count : int, chunkCount : int) -> List[tuple[int, int]] :
+    bounds : List[int] = [(count * i) // chunkCount for i in range(chunkCount + 1)]
+    return [(begin, end) for begin, end in zip(bounds[:-1], bounds[1:]) if begin != end]
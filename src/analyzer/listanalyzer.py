@@ -1,132 +1,215 @@
-from typing import List, cast
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, TypeVar, Union
+import os
 import numpy as np
-from itertools import combinations
+from itertools import combinations, islice
+from concurrent.futures import Executor
+from functools import partial
 
-from base.propertyClass import FullProperty
+from base import profiling
+from base.profiling import profiled
+from base.propertyClass import FullProperty, FullPropertyBatch
+from .composition import compositionBlocks, compositionCount, compositions
+from .parallel import chunkCount, imapChunks, mapChunks, splitChunks
+from .sketch import QuantileSketch
+
+T = TypeVar("T")
 
 
 class Centile :
     LAST : int = 100
-    def __init__(self, values : List[float]) -> None :
+    def __init__(self, values : Union[Sequence[float], np.ndarray, QuantileSketch]) -> None :
         self.centiles : List[float] = []
         self.__initCentiles(values)
 
-    def __initCentiles(self, values : List[float]) -> None :
-        self.centiles = np.percentile(values, range(101)).tolist()
+    def __initCentiles(self, values : Union[Sequence[float], np.ndarray, QuantileSketch]) -> None :
+        if isinstance(values, QuantileSketch) :
+            self.centiles = values.quantiles(np.arange(Centile.LAST + 1) / Centile.LAST).tolist()
+        else :
+            self.centiles = np.percentile(values, range(Centile.LAST + 1)).tolist()
 
 
 class ListAnalyzerResult :
-    def __init__(self, propertyValues : List[List[float]]) -> None :
+    def __init__(self, propertyValues : Sequence[Union[Sequence[float], np.ndarray, QuantileSketch]]) -> None :
         self.valuePropertyCentiles : List[Centile] = []
         self.append(propertyValues)
 
-    def append(self, propertyValues : List[List[float]]) -> None :
+    def append(self, propertyValues : Sequence[Union[Sequence[float], np.ndarray, QuantileSketch]]) -> None :
         self.valuePropertyCentiles += [Centile(value) for value in propertyValues]
 
     def getBound(self, index : int) -> tuple[float, float, float] :
         value = self.valuePropertyCentiles[index]
-        return value.centiles[0], value.centiles[50], value.centiles[101]
+        return value.centiles[0], value.centiles[Centile.LAST // 2], value.centiles[Centile.LAST]
     
     @staticmethod
     def makeAnalyse(properties : List[FullProperty]) -> "ListAnalyzerResult" :
         return ListAnalyzerResult(FullProperty.getAllValuesSplited(properties))
 
+    @staticmethod
+    def fromStream(chunks : Iterable[np.ndarray], epsilon : float = 0.01) -> "ListAnalyzerResult" :
+        return ListAnalyzerResult(sketchStream(chunks, epsilon))
 
-class FullAnalyzerResult :
-    def __init__(self) -> None:
-        self.combinaison : List[ListAnalyzerResult] = []
-
-def makeCombinaison(properties : List[FullProperty], index : List[int], weights : List[int]) -> FullProperty :
-    assert len(index) == len(weights), "Error in makeCombinaison. index and weights must be the same size."
-
-    total : float = float(sum(weights))
-    weightNormal : List[float] = [float(val) / total for val in weights]
-    selectedProperties : List[FullProperty] = [properties[i] for i in index]
-
-    return cast(FullProperty, FullProperty.weightedMean(selectedProperties, weightNormal))
-
-"""
-def generateWeightCompositions(maxValue : int, size : int) :
-    maxUniqueValue : int = maxValue - size + 1
-    for comb in product(range(1, maxUniqueValue + 1), repeat=size):
-        if sum(comb) == maxValue:
-            yield list(comb)
-"""
-
-# like generateWeightCompositions but way faster
-def updateWeight(weights : List[int], maxValue : int) -> bool :
-    assert len(weights) > 1, "Error in updateWeight. Cannot incremente a list of a single item."
-    assert len(weights) <= maxValue, "Error in updateWeight. Step is too small."
 
-    maxUniqueValue : int = maxValue - len(weights) + 1
-    if weights[1] == maxUniqueValue : return False # Last iteration already happened
-    weights[0] = 1
+# chunks are (property count, mix count) value arrays, only the sketches are kept in memory
+def sketchStream(chunks : Iterable[np.ndarray], epsilon : float = 0.01) -> List[QuantileSketch] :
+    sketches : List[QuantileSketch] = []
+    for values in chunks :
+        sketches += [QuantileSketch(epsilon) for _ in range(len(values) - len(sketches))]
+        [sketch.update(value) for sketch, value in zip(sketches, values)]
+    return sketches
 
-    subIndex = len(weights) - 1
-    weights[subIndex] += 1 
-    while subIndex > 1 and (weights[subIndex] > maxUniqueValue or maxValue < sum(weights)) :
-        weights[subIndex] = 1
-        subIndex -= 1
-        weights[subIndex] += 1
 
-    weights[0] += maxValue - sum(weights)
-    return True
+class FullAnalyzerResult :
+    def __init__(self) -> None:
+        self.combinaison : List[ListAnalyzerResult] = []
 
 
-def analyseIter(properties : List[FullProperty], quantityLerp : int) -> ListAnalyzerResult :
+SKETCH_CHUNK : int = 64 # combinations per sketch, fixed so the merged sketches do not depend on the worker count
+
+def batched(iterable : Iterable[T], size : int) -> Iterator[List[T]] :
+    iterator : Iterator[T] = iter(iterable)
+    while len(chunk := list(islice(iterator, size))) != 0 :
+        yield chunk
+
+def iterMixValues(properties : FullPropertyBatch, weights : np.ndarray, indexes : Iterable[tuple[int, ...]]) -> Iterator[np.ndarray] :
+    for index in indexes :
+        yield properties.take(list(index)).weightedMean(weights).getValues()
+
+@profiled()
+def mixValues(properties : FullPropertyBatch, weights : np.ndarray, indexes : Sequence[tuple[int, ...]]) -> np.ndarray :
+    profiling.count("mixes", len(indexes) * len(weights))
+    values : List[np.ndarray] = list(iterMixValues(properties, weights, indexes))
+    return np.concatenate(values, axis=1) if len(values) != 0 else np.zeros((properties.dimensions(), 0))
+
+@profiled()
+def sketchValues(properties : FullPropertyBatch, weights : np.ndarray, epsilon : float, indexes : Sequence[tuple[int, ...]]) -> List[QuantileSketch] :
+    profiling.count("mixes", len(indexes) * len(weights))
+    return sketchStream(iterMixValues(properties, weights, indexes), epsilon)
+
+# running merge, each chunk is dropped once merged so chunks can be a lazy stream
+def mergeSketches(chunks : Iterable[List[QuantileSketch]]) -> List[QuantileSketch] :
+    merged : List[QuantileSketch] = []
+    for sketches in chunks :
+        if len(merged) == 0 : merged = sketches
+        else : [sketch.merge(other) for sketch, other in zip(merged, sketches)]
+    return merged
+
+@profiled()
+def analyseIter(
+        properties : List[FullProperty], 
+        quantityLerp : int, 
+        resolution : int = 20,
+        workers : int = 1, 
+        executor : Optional[Executor] = None,
+        epsilon : Optional[float] = None
+    ) -> ListAnalyzerResult :
     assert len(properties) >= quantityLerp, "Error in analyseIter. Not enough properties for a mean."
     assert quantityLerp > 0, "Error in analyseIter. quantityLerp must be over 0."
+    assert quantityLerp <= resolution, f"Error in analyseIter. No composition of {resolution} into {quantityLerp} parts >= 1, resolution must be >= quantityLerp."
     if quantityLerp == 1 : return ListAnalyzerResult.makeAnalyse(properties)
 
-    fullProperty : List[FullProperty] = []
-    for index in combinations(range(len(properties)), quantityLerp) :
-        weights : list[int] = [1] * quantityLerp
-        weights[-1] = 0
-        while updateWeight(weights, 20) :
-            fullProperty.append(makeCombinaison(properties, list(index), weights))
+    batch : FullPropertyBatch = FullProperty.makeBatch(properties)
+    weights : np.ndarray = compositions(quantityLerp, resolution, 1).astype(float)
+    indexes : Iterator[tuple[int, ...]] = combinations(range(len(properties)), quantityLerp)
 
-    return ListAnalyzerResult.makeAnalyse(fullProperty)
+    # streaming mode: memory is bounded by the sketches (error bound epsilon) instead of every mix
+    if epsilon is not None :
+        sketches : Iterator[List[QuantileSketch]] = imapChunks(partial(sketchValues, batch, weights, epsilon), batched(indexes, SKETCH_CHUNK), workers, executor)
+        return ListAnalyzerResult(mergeSketches(sketches))
 
+    # chunks are concatenated in order, the centiles inputs are the same for any worker count
+    chunks : List[np.ndarray] = mapChunks(partial(mixValues, batch, weights), splitChunks(list(indexes), chunkCount(workers)), workers, executor)
+    return ListAnalyzerResult(np.concatenate(chunks, axis=1).tolist())
 
-def analyzeProperties(properties : List[FullProperty]) -> FullAnalyzerResult:
+
+@profiled()
+def analyzeProperties(
+        properties : List[FullProperty], 
+        resolution : int = 20, 
+        workers : int = 1, 
+        executor : Optional[Executor] = None,
+        epsilon : Optional[float] = None
+    ) -> FullAnalyzerResult:
     assert len(properties) > 1, "Error in analyzeProperties. Need at least 2 properties."
     ret = FullAnalyzerResult()
-    [(print(i), ret.combinaison.append(analyseIter(properties, i))) for i in range(1, len(properties) + 1)]
+    [(ret.combinaison.append(analyseIter(properties, i, resolution, workers, executor, epsilon)), profiling.progress("analyzeProperties", i, len(properties))) 
+        for i in range(1, min(len(properties), resolution) + 1) # no mix of more properties than resolution steps
+    ]
     return ret
 
 
 
 
-def updateWeightv2(weights : List[int], maxValue : int) -> bool :
-    assert len(weights) > 1, "Error in updateWeight. Cannot incremente a list of a single item."
-    assert len(weights) <= maxValue, "Error in updateWeight. Step is too small."
-
-    maxUniqueValue : int = maxValue
-    if weights[1] == maxUniqueValue : return False # Last iteration already happened
-    weights[0] = 0
+# value fields: x, y, z then v3, v4... (one per FullProperty dimension)
+def mixNames(dimensions : int) -> List[str] :
+    return [("xyz"[i] if i < 3 else f"v{i}") for i in range(dimensions)]
+
+def mixDtype(dimensions : int = 2) -> np.dtype :
+    return np.dtype([(name, np.float64) for name in mixNames(dimensions)] + [("count", np.int64)])
+
+MIX_DTYPE : np.dtype = mixDtype(2)
+
+# values and ingredient count of the mixes of rank start to stop in the lattice of analyseIterv2
+@profiled()
+def mixCompositionValues(properties : FullPropertyBatch, maxValue : int, ranks : tuple[int, int], blockSize : int = 1 << 16) -> np.ndarray :
+    dtype : np.dtype = mixDtype(properties.dimensions())
+    chunks : List[np.ndarray] = [np.zeros(0, dtype=dtype)]
+    for weights in compositionBlocks(len(properties), maxValue, 0, blockSize, *ranks) :
+        mixed : np.ndarray = properties.weightedMean(weights.astype(float)).getValues()
+        chunk : np.ndarray = np.empty(len(weights), dtype=dtype)
+        for name, values in zip(mixNames(len(mixed)), mixed) :
+            chunk[name] = values
+        chunk["count"] = (weights > 0).sum(axis=1)
+        profiling.count("mixes", len(weights))
+        chunks.append(chunk)
+    return np.concatenate(chunks)
+
+# with workers the batch is published once in shared memory, tasks only carry its handle and their ranks
+def iterAnalyseIterv2(
+        properties : List[FullProperty], 
+        maxValue : int, 
+        chunkSize : int = 1 << 16, 
+        workers : int = 1, 
+        executor : Optional[Executor] = None,
+        shared : bool = True
+    ) -> Iterator[np.ndarray] :
+    assert maxValue > 0, "Error in iterAnalyseIterv2. maxValue must be over 0."
+    assert chunkSize > 0, "Error in iterAnalyseIterv2. chunkSize must be over 0."
+    batch : FullPropertyBatch = FullProperty.makeBatch(properties)
+    count : int = compositionCount(len(properties), maxValue, 0)
+    ranks : Iterator[tuple[int, int]] = ((start, min(start + chunkSize, count)) for start in range(0, count, chunkSize))
+
+    def run(function : Callable[[tuple[int, int]], np.ndarray]) -> Iterator[np.ndarray] :
+        for done, chunk in enumerate(imapChunks(function, ranks, workers, executor)) :
+            profiling.progress("iterAnalyseIterv2", min((done + 1) * chunkSize, count), count)
+            yield chunk
+
+    if not shared or (workers <= 1 and executor is None) :
+        yield from run(partial(mixCompositionValues, batch, maxValue, blockSize=chunkSize))
+        return
+    from catalog.shared import SharedCatalog, withSharedBatch # multiprocessing.shared_memory, only with workers
+    with SharedCatalog(batch) as catalog :
+        yield from run(partial(withSharedBatch, mixCompositionValues, catalog.handle, maxValue, blockSize=chunkSize))
+
+@profiled()
+def analyseIterv2(
+        properties : List[FullProperty], 
+        maxValue : int, 
+        workers : int = 1, 
+        executor : Optional[Executor] = None
+    ) -> List[tuple] :
+    assert maxValue > 0, "Error in analyseIter. quantityLerp must be over 0."
+    values : np.ndarray = np.concatenate(list(iterAnalyseIterv2(properties, maxValue, workers=workers, executor=executor)))
+    return values.tolist() # (x, y, ..., count) tuples
 
-    subIndex = len(weights) - 1
-    weights[subIndex] += 1 
-    while subIndex > 1 and (weights[subIndex] > maxUniqueValue or maxValue < sum(weights)) :
-        weights[subIndex] = 0
-        subIndex -= 1
-        weights[subIndex] += 1
 
-    weights[0] += maxValue - sum(weights)
-    return True
+def spillChunks(chunks : Iterable[np.ndarray], directory : str, prefix : str = "chunk") -> List[str] :
+    os.makedirs(directory, exist_ok=True)
+    paths : List[str] = []
+    for i, chunk in enumerate(chunks) :
+        paths.append(os.path.join(directory, f"{prefix}_{i:06d}.npy"))
+        np.save(paths[-1], chunk)
+    return paths
 
-def analyseIterv2(properties : List[FullProperty], maxValue : int) -> List[tuple[float, float, int]] :
-    assert maxValue > 0, "Error in analyseIter. quantityLerp must be over 0."
-    ret : List[tuple[float, float, int]] = []
-
-    weights : list[int] = [0] * len(properties)
-    weights[-1] = -1
-    while updateWeightv2(weights, maxValue) :
-        index = [id for id, w in enumerate(weights) if w > 0]
-        weight = [w for w in weights if w > 0]
-        full : FullProperty = makeCombinaison(properties, index, weight)
-        pp = full.getValues()
-        x, y = pp[0], pp[1]
-        ret.append((x, y, len(index)))
-
-    return ret
\ No newline at end of file
+def loadChunks(paths : Iterable[str], mmap : bool = True) -> Iterator[np.ndarray] :
+    for path in paths :
+        yield np.load(path, mmap_mode="r" if mmap else None)
@@ -0,0 +1,52 @@
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Sequence, TypeVar
+from collections import deque
+from concurrent.futures import Executor, Future
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# The functions taking workers and executor run on the executor when one is given, in a process pool of workers
+# processes otherwise. workers also sizes the chunks: with an executor, pass its worker count.
+
+
+def splitChunks(items : Sequence[T], chunkCount : int) -> List[Sequence[T]] :
+    assert chunkCount > 0, "Error in splitChunks. chunkCount must be over 0."
+    chunkCount = min(chunkCount, max(1, len(items)))
+    bounds : List[int] = [(len(items) * i) // chunkCount for i in range(chunkCount + 1)]
+    return [items[begin:end] for begin, end in zip(bounds[:-1], bounds[1:])]
+
+# results are returned in the order of the chunks whatever the executor, so merges stay deterministic
+def mapChunks(function : Callable[[T], R], chunks : Sequence[T], workers : int = 1, executor : Optional[Executor] = None) -> List[R] :
+    if executor is not None :
+        return list(executor.map(function, chunks))
+    if workers <= 1 :
+        return [function(chunk) for chunk in chunks]
+    from concurrent.futures import ProcessPoolExecutor # multiprocessing is only loaded by the processes that fork workers
+    with ProcessPoolExecutor(max_workers=workers) as pool :
+        return list(pool.map(function, chunks))
+
+# Executor has no public worker count, callers give it as workers
+def chunkCount(workers : int = 1, chunksPerWorker : int = 4) -> int :
+    return max(1, workers) * chunksPerWorker
+
+# lazy mapChunks: at most window chunks are in flight, results are yielded in the order of the chunks
+def imapChunks(function : Callable[[T], R], chunks : Iterable[T], workers : int = 1, executor : Optional[Executor] = None, window : int = 0) -> Iterator[R] :
+    if executor is None and workers <= 1 :
+        yield from map(function, chunks)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    pool : Executor = executor if executor is not None else ProcessPoolExecutor(max_workers=workers)
+    window = window if window > 0 else 2 * chunkCount(workers, 1)
+    pending : Deque[Future] = deque()
+    try :
+        for chunk in chunks :
+            pending.append(pool.submit(function, chunk))
+            if len(pending) >= window :
+                yield pending.popleft().result()
+        while len(pending) != 0 :
+            yield pending.popleft().result()
+    finally :
+        [future.cancel() for future in pending]
+        if executor is None :
+            pool.shutdown()
@@ -0,0 +1,74 @@
+from typing import Iterable, List, Sequence, Union
+import math
+import numpy as np
+
+# KLL quantile sketch. Compactors at level h hold items of weight 2**h, a full compactor sorts its items and
+# promotes one of every two (random offset) to the next level. Memory is O(k log(n / k)) and the rank error of a
+# query stays around epsilon * n. Sketches of separate chunks merge into a sketch of the whole stream.
+class QuantileSketch :
+    def __init__(self, epsilon : float = 0.01, seed : int = 0) -> None :
+        assert 0 < epsilon < 1, f"Error in QuantileSketch. epsilon {epsilon} must be in ]0, 1[."
+        self.epsilon : float = epsilon
+        self.k : int = max(8, math.ceil(3 / epsilon))
+        self.count : int = 0
+        self.minimum : float = math.inf
+        self.maximum : float = -math.inf
+        self.levels : List[np.ndarray] = [np.zeros(0)]
+        self.rng : np.random.Generator = np.random.default_rng(seed)
+
+    def __len__(self) -> int :
+        return self.count
+
+    def capacity(self, level : int) -> int :
+        return max(2, math.ceil(self.k * (2 / 3) ** (len(self.levels) - 1 - level)))
+
+    def update(self, values : Union[Sequence[float], np.ndarray]) -> "QuantileSketch" :
+        values = np.asarray(values, dtype=float).ravel()
+        if len(values) == 0 : return self
+        self.count += len(values)
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self.__compress()
+        return self
+
+    def merge(self, other : "QuantileSketch") -> "QuantileSketch" :
+        self.count += other.count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.levels += [np.zeros(0)] * (len(other.levels) - len(self.levels))
+        self.levels = [np.concatenate((mine, theirs)) for mine, theirs in zip(self.levels, other.levels + [np.zeros(0)] * len(self.levels))]
+        self.__compress()
+        return self
+
+    def __compress(self) -> None :
+        level : int = 0
+        while level < len(self.levels) :
+            if len(self.levels[level]) > self.capacity(level) :
+                if level + 1 == len(self.levels) :
+                    self.levels.append(np.zeros(0))
+                items : np.ndarray = np.sort(self.levels[level])
+                kept : int = len(items) % 2 # an odd item stays, total weight is preserved
+                offset : int = int(self.rng.integers(2))
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], items[kept + offset::2]))
+                self.levels[level] = items[:kept]
+            level += 1
+
+    def quantiles(self, q : Union[Sequence[float], np.ndarray]) -> np.ndarray :
+        assert self.count > 0, "Error in QuantileSketch quantiles. The sketch is empty."
+        q = np.asarray(q, dtype=float)
+        items : np.ndarray = np.concatenate(self.levels)
+        weights : np.ndarray = np.concatenate([np.full(len(items), 2**level) for level, items in enumerate(self.levels)])
+        order : np.ndarray = np.argsort(items, kind="stable")
+        cumulated : np.ndarray = np.cumsum(weights[order])
+
+        index : np.ndarray = np.searchsorted(cumulated, q * cumulated[-1], side="left")
+        ret : np.ndarray = items[order][np.clip(index, 0, len(items) - 1)]
+        ret = np.where(q <= 0, self.minimum, ret)
+        return np.where(q >= 1, self.maximum, ret)
+
+    @staticmethod
+    def fromStream(chunks : Iterable[Union[Sequence[float], np.ndarray]], epsilon : float = 0.01) -> "QuantileSketch" :
+        sketch = QuantileSketch(epsilon)
+        [sketch.update(chunk) for chunk in chunks]
+        return sketch
@@ -0,0 +1,30 @@
+from typing import List
+import numpy as np
+
+from base.propertyClass import FullProperty
+from population.population import randomFullProperties
+from .analyzer import analyseOneFullProperty, analyseOneFullPropertyIntervals, analyseOneFullPropertyReference
+
+
+def test_analyseOneFullPropertyReference() -> None :
+    for point in [False, True] :
+        properties : List[FullProperty] = randomFullProperties(40, point=point, seed=3).toProperties()
+        for count in [1, 7, 20] :
+            assert analyseOneFullProperty(properties[0], properties[1:], count) == analyseOneFullPropertyReference(properties[0], properties[1:], count)
+
+def test_analyseOneFullPropertyWorkers() -> None :
+    properties : List[FullProperty] = randomFullProperties(60, seed=4).toProperties()
+    assert analyseOneFullProperty(properties[0], properties[1:], 10, workers=2) == analyseOneFullProperty(properties[0], properties[1:], 10)
+
+# the interval sums do not depend on how the paths are split between workers
+def test_intervalsWorkers() -> None :
+    properties : List[FullProperty] = randomFullProperties(30, seed=5).toProperties()
+    serial : dict = analyseOneFullPropertyIntervals(properties[0], properties[1:], brackets=32)
+    assert analyseOneFullPropertyIntervals(properties[0], properties[1:], brackets=32, workers=2) == serial
+    assert analyseOneFullPropertyIntervals(properties[0], properties[1:], brackets=32, workers=3) == serial
+    assert np.isclose(sum(serial.values()), len(properties) - 1)
+
+# a constant path has no crossing, its whole length is within the bounds
+def test_intervalsConstantPath() -> None :
+    property : FullProperty = randomFullProperties(1, seed=6).toProperties()[0]
+    assert analyseOneFullPropertyIntervals(property, [property, property]) == {(0, 0): 2.0}
@@ -0,0 +1,29 @@
+from typing import List
+import numpy as np
+
+from benchmark.reference import updateWeight
+from .composition import compositionCount, compositions, rankComposition, rankCompositions, unrankCompositions
+
+# the compositions in the order the updateWeight stepper walked them
+def steppedCompositions(parts : int, total : int, minimum : int) -> List[List[int]] :
+    weights : List[int] = [minimum] * parts
+    weights[-1] = minimum - 1
+    ret : List[List[int]] = []
+    while updateWeight(weights, total, minimum) :
+        ret.append(list(weights))
+    return ret
+
+
+def test_compositionsStepperOrder() -> None :
+    for parts, total, minimum in [(2, 5, 1), (3, 6, 1), (4, 7, 1), (3, 4, 0), (5, 6, 0)] :
+        table : np.ndarray = compositions(parts, total, minimum)
+        assert table.tolist() == steppedCompositions(parts, total, minimum)
+        assert len(table) == compositionCount(parts, total, minimum)
+
+def test_rankRoundTrip() -> None :
+    for parts, total, minimum in [(2, 9, 1), (4, 10, 1), (6, 8, 0), (3, 0, 0)] :
+        table : np.ndarray = compositions(parts, total, minimum)
+        ranks : np.ndarray = rankCompositions(table, minimum)
+        assert ranks.tolist() == list(range(len(table)))
+        assert [rankComposition(row, minimum) for row in table.tolist()] == ranks.tolist()
+        assert np.array_equal(unrankCompositions(ranks, parts, total, minimum), table)
@@ -0,0 +1,35 @@
+from typing import Dict, List
+
+from base.propertyClass import FullProperty
+from population.population import randomFullProperties
+from .analyzer import analyseOneFullProperty
+from .incremental import IncrementalAnalyzer
+from .listanalyzer import FullAnalyzerResult, analyzeProperties
+
+def centiles(result : FullAnalyzerResult) -> List[List[List[float]]] :
+    return [[value.centiles for value in combinaison.valuePropertyCentiles] for combinaison in result.combinaison]
+
+
+# adds and removes in any order give the analysis of the properties left
+def test_incrementalMatchesFull() -> None :
+    properties : List[FullProperty] = randomFullProperties(7, seed=13).toProperties()
+    analyzer : IncrementalAnalyzer = IncrementalAnalyzer(6, epsilon=None, count=10)
+    analyzer.addMany({id: properties[id] for id in range(4)})
+    [analyzer.add(id, properties[id]) for id in range(4, 7)]
+    analyzer.removeMany([1, 5])
+    analyzer.remove(3)
+
+    left : Dict[int, FullProperty] = {id: properties[id] for id in analyzer.ids()}
+    assert analyzer.ids() == [0, 2, 4, 6]
+    assert centiles(analyzer.result()) == centiles(analyzeProperties(list(left.values()), 6))
+    for id, property in left.items() :
+        assert analyzer.mapping(id) == analyseOneFullProperty(property, [other for key, other in left.items() if key != id], 10)
+
+# the sketched extremes are exact
+def test_incrementalSketchExtremes() -> None :
+    properties : List[FullProperty] = randomFullProperties(6, seed=14).toProperties()
+    analyzer : IncrementalAnalyzer = IncrementalAnalyzer(5, count=None)
+    [analyzer.add(id, property) for id, property in enumerate(properties)]
+    exact : List[List[List[float]]] = centiles(analyzeProperties(properties, 5))
+    for sketched, expected in zip(centiles(analyzer.result()), exact) :
+        assert [(value[0], value[-1]) for value in sketched] == [(value[0], value[-1]) for value in expected]
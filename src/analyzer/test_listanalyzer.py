@@ -0,0 +1,48 @@
+from typing import List
+import numpy as np
+import pytest
+
+from base.propertyClass import FullProperty
+from benchmark.reference import analyseIterReference, analyseIterv2Reference, analyzePropertiesReference
+from population.population import randomFullProperties
+from .listanalyzer import FullAnalyzerResult, ListAnalyzerResult, analyseIter, analyseIterv2, analyzeProperties
+
+RTOL : float = 1e-9 # the lattice mixes sum in another order than FullProperty.weightedMean
+
+def centiles(result : ListAnalyzerResult) -> np.ndarray :
+    return np.array([value.centiles for value in result.valuePropertyCentiles])
+
+
+def test_analyseIterReference() -> None :
+    properties : List[FullProperty] = randomFullProperties(6, seed=7).toProperties()
+    for quantity in [1, 2, 3] :
+        assert np.allclose(centiles(analyseIter(properties, quantity, 8)), centiles(analyseIterReference(properties, quantity, 8)), rtol=RTOL, atol=0)
+
+# resolution over the property count: the old stepper has no mix of resolution properties (it starts on its last state)
+def test_analyzePropertiesReference() -> None :
+    properties : List[FullProperty] = randomFullProperties(5, point=True, seed=8).toProperties()
+    result : FullAnalyzerResult = analyzeProperties(properties, 6)
+    reference : FullAnalyzerResult = analyzePropertiesReference(properties, 6)
+    assert len(result.combinaison) == len(reference.combinaison) == 5
+    [np.testing.assert_allclose(centiles(value), centiles(expected), rtol=RTOL, atol=0) for value, expected in zip(result.combinaison, reference.combinaison)]
+
+def test_analyseIterResolution() -> None :
+    properties : List[FullProperty] = randomFullProperties(6, seed=9).toProperties()
+    with pytest.raises(AssertionError) :
+        analyseIter(properties, 5, 4)
+
+def test_analyseIterWorkers() -> None :
+    properties : List[FullProperty] = randomFullProperties(8, seed=10).toProperties()
+    assert centiles(analyseIter(properties, 3, 6, workers=2)).tolist() == centiles(analyseIter(properties, 3, 6)).tolist()
+
+def test_analyseIterv2Reference() -> None :
+    properties : List[FullProperty] = randomFullProperties(4, seed=11).toProperties()
+    values : np.ndarray = np.array(analyseIterv2(properties, 6))
+    reference : np.ndarray = np.array(analyseIterv2Reference(properties, 6))
+    assert values.shape == reference.shape
+    assert values[:, -1].tolist() == reference[:, -1].tolist()
+    assert np.allclose(values[:, :-1], reference[:, :-1], rtol=RTOL, atol=0)
+
+def test_analyseIterv2Workers() -> None :
+    properties : List[FullProperty] = randomFullProperties(5, seed=12).toProperties()
+    assert analyseIterv2(properties, 8, workers=2) == analyseIterv2(properties, 8)
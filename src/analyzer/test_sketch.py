@@ -0,0 +1,45 @@
+from typing import List
+import numpy as np
+
+from base.propertyClass import FullProperty
+from population.population import randomFullProperties
+from .listanalyzer import Centile, ListAnalyzerResult, analyseIter, mergeSketches
+from .sketch import QuantileSketch
+
+EPSILON : float = 0.01
+QUANTILES : np.ndarray = np.linspace(0, 1, Centile.LAST + 1)
+
+# fraction of values <= each answer, against the asked quantile
+def rankErrors(values : np.ndarray, answers : np.ndarray) -> np.ndarray :
+    return np.abs(np.searchsorted(np.sort(values), answers, side="right") / len(values) - QUANTILES)
+
+
+# chunk sketches merged like analyseIter merges them, the rank error stays around epsilon and the extremes are exact
+def test_mergedSketchRankError() -> None :
+    for seed in range(5) :
+        values : np.ndarray = np.random.default_rng(seed).normal(size=200_000)
+        sketch : QuantileSketch = mergeSketches([[QuantileSketch(EPSILON).update(chunk)] for chunk in np.array_split(values, 137)])[0]
+        assert len(sketch) == len(values)
+        assert rankErrors(values, sketch.quantiles(QUANTILES)).max() <= 2 * EPSILON
+        assert sketch.quantiles([0, 1]).tolist() == [values.min(), values.max()]
+
+def test_getBoundExact() -> None :
+    values : np.ndarray = np.random.default_rng(0).uniform(size=1001)
+    assert ListAnalyzerResult([values]).getBound(0) == (values.min(), float(np.median(values)), values.max())
+
+def test_getBoundSketch() -> None :
+    values : np.ndarray = np.random.default_rng(1).uniform(size=100_000)
+    minimum, median, maximum = ListAnalyzerResult([QuantileSketch(EPSILON).update(values)]).getBound(0)
+    assert (minimum, maximum) == (values.min(), values.max())
+    assert abs(np.mean(values <= median) - 0.5) <= 2 * EPSILON
+
+# streaming analyseIter against the exact one: same extremes, median within the rank error
+def test_analyseIterEpsilon() -> None :
+    properties : List[FullProperty] = randomFullProperties(12, seed=0).toProperties()
+    exact : ListAnalyzerResult = analyseIter(properties, 3, 10)
+    sketched : ListAnalyzerResult = analyseIter(properties, 3, 10, epsilon=EPSILON)
+    for index in range(len(exact.valuePropertyCentiles)) :
+        centiles : List[float] = exact.valuePropertyCentiles[index].centiles
+        minimum, median, maximum = sketched.getBound(index)
+        assert (minimum, maximum) == (centiles[0], centiles[Centile.LAST])
+        assert centiles[Centile.LAST // 2 - 2] <= median <= centiles[Centile.LAST // 2 + 2]
@@ -0,0 +1,31 @@
+from types import ModuleType
+from typing import Any, Optional
+import importlib
+import sys
+
+# Module bound at import time but only imported on the first access to one of its attributes, so the plotting stack
+# is paid by the processes that draw and not by the ones that only mix. Annotations naming a lazy module must not be
+# evaluated at definition time (from __future__ import annotations or strings).
+
+class LazyModule :
+    def __init__(self, name : str) -> None :
+        self.__name : str = name
+        self.__module : Optional[ModuleType] = None
+
+    def load(self) -> ModuleType :
+        if self.__module is None :
+            self.__module = importlib.import_module(self.__name)
+        return self.__module
+
+    def isLoaded(self) -> bool :
+        return self.__module is not None or self.__name in sys.modules
+
+    def __getattr__(self, attribute : str) -> Any :
+        return getattr(self.load(), attribute)
+
+    def __repr__(self) -> str :
+        return f"<LazyModule {self.__name} {'loaded' if self.isLoaded() else 'not loaded'}>"
+
+
+def lazyImport(name : str) -> Any :
+    return sys.modules[name] if name in sys.modules else LazyModule(name)
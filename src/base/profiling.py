@@ -0,0 +1,146 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+from contextlib import contextmanager
+from functools import wraps
+import json
+import sys
+import threading
+import time
+
+F = TypeVar("F", bound=Callable[..., Any])
+ProgressCallback = Callable[[str, int, int], None] # (stage, done, total)
+
+# Opt-in instrumentation. The @profiled functions stay the original functions: enable() swaps the timing wrappers in
+# (module globals, class attributes and the references imported elsewhere) and disable() swaps them back, so nothing
+# is paid while disabled. Decorated constructors (__init__) count the objects built. count and progress are a single global check.
+# Counters live in the process that runs the code, work done by a ProcessPoolExecutor is not collected.
+
+class Profiler :
+    def __init__(self, callbacks : Optional[List[ProgressCallback]] = None) -> None :
+        self.calls : Dict[str, int] = {}
+        self.times : Dict[str, float] = {} # cumulative, nested calls are included in the caller time
+        self.items : Dict[str, int] = {}
+        self.callbacks : List[ProgressCallback] = list(callbacks or [])
+        self.start : float = time.perf_counter()
+        self.stop : Optional[float] = None
+        self.lock : threading.Lock = threading.Lock()
+
+    def addCall(self, name : str, elapsed : float) -> None :
+        with self.lock :
+            self.calls[name] = self.calls.get(name, 0) + 1
+            self.times[name] = self.times.get(name, 0.0) + elapsed
+
+    def addItems(self, name : str, count : int = 1) -> None :
+        with self.lock :
+            self.items[name] = self.items.get(name, 0) + count
+
+    def onProgress(self, callback : ProgressCallback) -> None :
+        self.callbacks.append(callback)
+
+    def progress(self, stage : str, done : int, total : int) -> None :
+        [callback(stage, done, total) for callback in self.callbacks]
+
+    def elapsed(self) -> float :
+        return (time.perf_counter() if self.stop is None else self.stop) - self.start
+
+    def throughput(self, name : str) -> float :
+        elapsed : float = self.elapsed()
+        return self.items.get(name, 0) / elapsed if elapsed > 0 else 0.0
+
+    def toDict(self) -> Dict[str, Any] :
+        with self.lock :
+            return {
+                "elapsed": self.elapsed(),
+                "functions": {
+                    name: {"calls": calls, "time": self.times[name], "mean": self.times[name] / calls}
+                    for name, calls in sorted(self.calls.items(), key=lambda item : -self.times[item[0]])
+                },
+                "items": {name: {"count": count, "perSecond": self.throughput(name)} for name, count in sorted(self.items.items())},
+            }
+
+    def toJson(self, path : Optional[str] = None, indent : int = 2) -> str :
+        text : str = json.dumps(self.toDict(), indent=indent)
+        if path is not None :
+            with open(path, "w") as file :
+                file.write(text)
+        return text
+
+    def report(self, limit : int = 20) -> str :
+        data : Dict[str, Any] = self.toDict()
+        lines : List[str] = [f"elapsed {data['elapsed']:.3f} s"]
+        lines += [f"{name:<48} {value['calls']:>10} calls {value['time']:>10.4f} s" for name, value in list(data["functions"].items())[:limit]]
+        lines += [f"{name:<48} {value['count']:>10} items {value['perSecond']:>10.1f} /s" for name, value in data["items"].items()]
+        return "\n".join(lines)
+
+
+PROFILER : Optional[Profiler] = None
+ORIGINALS : Dict[int, tuple[Callable, Callable]] = {} # id(original) -> (original, wrapper)
+WRAPPERS : Dict[int, tuple[Callable, Callable]] = {} # id(wrapper) -> (wrapper, original)
+
+def enable(profiler : Optional[Profiler] = None) -> Profiler :
+    global PROFILER
+    if PROFILER is None : instrument(True)
+    PROFILER = Profiler() if profiler is None else profiler
+    return PROFILER
+
+def disable() -> Optional[Profiler] :
+    global PROFILER
+    profiler, PROFILER = PROFILER, None
+    if profiler is not None : 
+        profiler.stop = time.perf_counter()
+        instrument(False)
+    return profiler
+
+def isEnabled() -> bool :
+    return PROFILER is not None
+
+@contextmanager
+def profiling(progress : Optional[ProgressCallback] = None) -> Iterator[Profiler] :
+    previous : Optional[Profiler] = disable()
+    profiler : Profiler = enable(Profiler([] if progress is None else [progress]))
+    try :
+        yield profiler
+    finally :
+        disable()
+        if previous is not None : enable(previous)
+
+
+def profiled(name : Optional[str] = None) -> Callable[[F], F] :
+    def decorator(function : F) -> F :
+        label : str = name or f"{function.__module__}.{function.__qualname__}"
+
+        @wraps(function)
+        def wrapper(*args : Any, **kwargs : Any) -> Any :
+            profiler : Optional[Profiler] = PROFILER
+            if profiler is None : return function(*args, **kwargs)
+            start : float = time.perf_counter()
+            try :
+                return function(*args, **kwargs)
+            finally :
+                profiler.addCall(label, time.perf_counter() - start)
+
+        ORIGINALS[id(function)] = (function, wrapper)
+        WRAPPERS[id(wrapper)] = (wrapper, function)
+        return function
+    return decorator
+
+def swapped(value : Any, install : bool) -> Any :
+    if isinstance(value, staticmethod) :
+        function : Any = swapped(value.__func__, install)
+        return None if function is None else staticmethod(function)
+    source, target = (ORIGINALS if install else WRAPPERS).get(id(value), (None, None))
+    return target if source is value else None
+
+def instrument(install : bool) -> None :
+    for module in list(sys.modules.values()) :
+        namespace : Dict[str, Any] = getattr(module, "__dict__", {})
+        for name, value in list(namespace.items()) :
+            if isinstance(value, type) and value.__module__ == module.__name__ :
+                [setattr(value, attribute, replacement) for attribute, member in list(vars(value).items()) if (replacement := swapped(member, install)) is not None]
+            elif (replacement := swapped(value, install)) is not None :
+                namespace[name] = replacement
+
+def count(name : str, items : int = 1) -> None :
+    if PROFILER is not None : PROFILER.addItems(name, items)
+
+def progress(stage : str, done : int, total : int) -> None :
+    if PROFILER is not None : PROFILER.progress(stage, done, total)
@@ -1,10 +1,20 @@
-from typing import List, Sequence, cast
-from .tool import ClassLerp, LERP, PropertyModifier, lerpToWeightedMean, weightedMean
+from typing import Generic, List, Optional, Sequence, Union, cast
+import numpy as np
+from .profiling import profiled
+from .tool import ClassLerp, Immutable, LERP, PropertyModifier, PropertyModifierBatch, easyLerp, lerpArrays, lerpToWeightedMean, makeModifierBatch, normalizeWeights, weightedMean, weightedSumRows
 
-class ValueProperty(ClassLerp):
+class ValueProperty(Immutable, ClassLerp):
+    __slots__ = ("baseValue", "modifier", "realValue")
+
+    @profiled()
     def __init__(self, baseValue : float, modifier : PropertyModifier) :
-        self.baseValue : float = baseValue
-        self.modifier : PropertyModifier = modifier
+        self.baseValue : float
+        self.modifier : PropertyModifier
+        self.realValue : float # transformValue, cached on the first call
+        self.setMembers(baseValue=baseValue, modifier=modifier)
+
+    def key(self) -> tuple :
+        return (self.baseValue, self.modifier)
 
 
     def __add__(self, other) :
@@ -17,9 +27,21 @@ class ValueProperty(ClassLerp):
     
 
 
+    @profiled()
     def transformValue(self) -> float:
-        return self.modifier.transformValue(self.baseValue)
+        try :
+            return self.realValue
+        except AttributeError :
+            self.setMembers(realValue=self.modifier.transformValue(self.baseValue))
+            return self.realValue
     
+    # every baseValue of [lower, upper] the modifier maps to each target, several where the modifier is not monotonic
+    def inverseValues(self, targets : Union[Sequence[float], np.ndarray], lower : float, upper : float) -> List[np.ndarray] :
+        return self.modifier.inverseValues(targets, lower, upper)
+
+    def withRealValue(self, target : float, lower : float, upper : float) -> List["ValueProperty"] :
+        return [ValueProperty(baseValue, self.modifier) for baseValue in self.inverseValues([target], lower, upper)[0].tolist()]
+
     def quickPrint(self) :
         print(f"\trealValue = {self.transformValue()}")
         print(f"\tbaseValue = {self.baseValue}")
@@ -45,36 +67,66 @@ class ValueProperty(ClassLerp):
     def transformValues(values : List["ValueProperty"]) -> List[float] :
         return [value.transformValue() for value in values]
 
+    @staticmethod
+    def makeBatch(values : Sequence["ValueProperty"], dtype : type = np.float64) -> "ValuePropertyBatch" :
+        return ValuePropertyBatch.fromProperties(values, dtype)
+
+    @staticmethod
+    def lerpMany(val0 : "ValueProperty", val1 : "ValueProperty", coefs : Union[Sequence[float], np.ndarray]) -> "LerpManyResult[ValueProperty]" :
+        lerped : ValuePropertyBatch = ValueProperty.makeBatch([val0]).lerp(ValueProperty.makeBatch([val1]), withBounds(coefs))
+        values : np.ndarray = lerped.transformValues()
+        return LerpManyResult(values[2:], values[:2], coefs, val0, val1)
+
 
 
 
-class FullProperty(ClassLerp) :
-    def __init__(self, propertyX : ValueProperty, propertyY : ValueProperty) :
-        self.propertyX : ValueProperty = propertyX
-        self.propertyY : ValueProperty = propertyY
+class FullProperty(Immutable, ClassLerp) :
+    __slots__ = ("properties", "values")
+
+    @profiled()
+    def __init__(self, *properties : ValueProperty) :
+        assert len(properties) >= 2, "Error in FullProperty. FullProperty have less than 2 ValueProperty."
+        self.properties : tuple[ValueProperty, ...]
+        self.values : tuple[float, ...] # getValues, cached on the first call
+        self.setMembers(properties=tuple(properties))
+
+    def key(self) -> tuple :
+        return self.properties
+
+    @property
+    def propertyX(self) -> ValueProperty :
+        return self.properties[0]
+
+    @property
+    def propertyY(self) -> ValueProperty :
+        return self.properties[1]
+
+    def dimensions(self) -> int :
+        return len(self.properties)
 
     def __add__(self, other) :
-        return FullProperty(self.propertyX + other.propertyX, 
-                             self.propertyY + other.propertyY)
+        assert self.dimensions() == other.dimensions(), f"Error in FullProperty add. dimensions: {self.dimensions()} != {other.dimensions()}."
+        return FullProperty(*[property0 + property1 for property0, property1 in zip(self.properties, other.properties)])
     
     def __mul__(self, weight : float) :
-        return FullProperty(self.propertyX * weight, self.propertyY * weight)
+        return FullProperty(*[subProperty * weight for subProperty in self.properties])
     
     def print(self) :
         [(print(name), subProperty.quickPrint()) for subProperty, name in self.getNamedProperties()]
         print()
 
     def getValues(self) -> List[float] :
-        return [valueProperty.transformValue() for valueProperty in self.getProperties()]
+        try :
+            return list(self.values)
+        except AttributeError :
+            self.setMembers(values=tuple([valueProperty.transformValue() for valueProperty in self.getProperties()]))
+            return list(self.values)
     
     def getProperties(self) -> List[ValueProperty] :
-        return [subProperty for subProperty, _ in self.getNamedProperties()]
+        return list(self.properties)
     
     def getNamedProperties(self) -> List[tuple[ValueProperty, str]] :
-        return [
-            (self.propertyX, "propertyX"),
-            (self.propertyY, "propertyY"),
-        ]
+        return [(subProperty, propertyName(i)) for i, subProperty in enumerate(self.properties)]
 
 
 
@@ -92,7 +144,17 @@ class FullProperty(ClassLerp) :
         properties : List[ValueProperty] = [cast(ValueProperty, ValueProperty.weightedMean(val, weights)) for val in tmp]
 
         assert len(properties) >= 2, "Error in FullProperty weightedMean. FullProperty have less than 2 ValueProperty."
-        return FullProperty(properties[0], properties[1])
+        return FullProperty(*properties)
+
+    @staticmethod
+    def makeBatch(properties : Sequence["FullProperty"], dtype : type = np.float64) -> "FullPropertyBatch" :
+        return FullPropertyBatch.fromProperties(properties, dtype)
+
+    @staticmethod
+    def lerpMany(val0 : "FullProperty", val1 : "FullProperty", coefs : Union[Sequence[float], np.ndarray]) -> "LerpManyResult[FullProperty]" :
+        lerped : FullPropertyBatch = FullProperty.makeBatch([val0]).lerp(FullProperty.makeBatch([val1]), withBounds(coefs))
+        values : np.ndarray = lerped.getValues()
+        return LerpManyResult(values[:, 2:], values[:, :2], coefs, val0, val1)
 
     @staticmethod
     def getValuesXY(properties : List["FullProperty"]) -> tuple[List[float], List[float]] :
@@ -106,4 +168,145 @@ class FullProperty(ClassLerp) :
         if len(properties) == 0 : 
             return []
         values : List[List[float]] = [val.getValues() for val in properties]
-        return [list(val) for val in zip(*values)] # matrice transpose
\ No newline at end of file
+        return [list(val) for val in zip(*values)] # matrice transpose
+
+
+
+# propertyX, propertyY, propertyZ then property3, property4...
+def propertyName(index : int) -> str :
+    return "property" + ("XYZ"[index] if index < 3 else str(index))
+
+def withBounds(coefs : Union[Sequence[float], np.ndarray]) -> np.ndarray :
+    return np.concatenate(([0.0, 1.0], np.asarray(coefs, dtype=float).ravel()))
+
+
+class LerpManyResult(Generic[LERP]) :
+    def __init__(self, values : np.ndarray, boundValues : np.ndarray, coefs : Union[Sequence[float], np.ndarray], val0 : LERP, val1 : LERP) :
+        self.values : np.ndarray = values
+        self.boundValues : np.ndarray = boundValues
+        self.coefs : np.ndarray = np.asarray(coefs, dtype=float).ravel()
+        self.val0 : LERP = val0
+        self.val1 : LERP = val1
+        self.__properties : Optional[List[LERP]] = None
+
+    def getBounds(self) -> tuple[np.ndarray, np.ndarray] :
+        return np.minimum(self.boundValues[..., 0], self.boundValues[..., 1]), np.maximum(self.boundValues[..., 0], self.boundValues[..., 1])
+
+    def getValuesXY(self) -> tuple[np.ndarray, np.ndarray] :
+        assert self.values.ndim == 2, "Error in LerpManyResult getValuesXY. Values are not from a FullProperty."
+        return self.values[0], self.values[1]
+
+    def getProperties(self) -> List[LERP] :
+        if self.__properties is None :
+            self.__properties = easyLerp(self.val0, self.val1, self.coefs.tolist())
+        return self.__properties
+
+
+
+class ValuePropertyBatch :
+    def __init__(self, baseValues : np.ndarray, modifiers : PropertyModifierBatch) :
+        self.baseValues : np.ndarray = np.asarray(baseValues, dtype=np.result_type(baseValues, np.float32)).ravel()
+        self.modifiers : PropertyModifierBatch = modifiers
+        assert len(self.baseValues) == len(self.modifiers), f"Error in ValuePropertyBatch. length: {len(self.baseValues)} != {len(self.modifiers)}."
+
+    def __len__(self) -> int :
+        return len(self.baseValues)
+
+    def __getitem__(self, index : int) -> ValueProperty :
+        return ValueProperty(float(self.baseValues[index]), self.modifiers[index])
+
+    def take(self, indices : Union[Sequence[int], np.ndarray]) -> "ValuePropertyBatch" :
+        indices = np.asarray(indices)
+        return ValuePropertyBatch(self.baseValues[indices], self.modifiers.take(indices))
+
+    # matrix product, baseValues are within len(self) * eps * max |baseValues| of ValueProperty.weightedMean
+    def weightedMean(self, weights : np.ndarray) -> "ValuePropertyBatch" :
+        normalized : np.ndarray = normalizeWeights(weights, len(self)).astype(self.baseValues.dtype, copy=False)
+        # the modifiers get the raw weights, like weightedMeanRows
+        return ValuePropertyBatch(normalized @ self.baseValues, self.modifiers.weightedMean(weights))
+
+    def weightedMeanRows(self, indices : np.ndarray, weights : np.ndarray) -> "ValuePropertyBatch" :
+        indices = np.asarray(indices)
+        normalized : np.ndarray = normalizeWeights(weights, indices.shape[1]).astype(self.baseValues.dtype, copy=False)
+        # the modifiers get the raw weights, like ValueProperty.weightedMean: normalizing twice moves the last ulp
+        return ValuePropertyBatch(weightedSumRows(normalized, self.baseValues[indices]), self.modifiers.weightedMeanRows(indices, weights))
+
+    def lerp(self, other : "ValuePropertyBatch", coefs : np.ndarray) -> "ValuePropertyBatch" :
+        return ValuePropertyBatch(lerpArrays(self.baseValues, other.baseValues, coefs), self.modifiers.lerp(other.modifiers, coefs))
+
+    def transformValues(self) -> np.ndarray :
+        return self.modifiers.transformValues(self.baseValues)
+
+    def toProperties(self) -> List[ValueProperty] :
+        return [ValueProperty(baseValue, modifier) for baseValue, modifier in zip(self.baseValues.tolist(), self.modifiers.toProperties())]
+
+    @staticmethod
+    def fromProperties(properties : Sequence[ValueProperty], dtype : type = np.float64) -> "ValuePropertyBatch" :
+        assert all([value.__class__ == ValueProperty for value in properties]), "Error in ValuePropertyBatch fromProperties. Not all value are a ValueProperty."
+        return ValuePropertyBatch(
+            np.array([value.baseValue for value in properties], dtype=dtype),
+            makeModifierBatch([value.modifier for value in properties], dtype)
+        )
+
+
+
+class FullPropertyBatch :
+    def __init__(self, *properties : ValuePropertyBatch) :
+        assert len(properties) >= 2, "Error in FullPropertyBatch. FullPropertyBatch have less than 2 ValuePropertyBatch."
+        assert all([len(subProperty) == len(properties[0]) for subProperty in properties]), f"Error in FullPropertyBatch. length: {[len(subProperty) for subProperty in properties]}."
+        self.properties : tuple[ValuePropertyBatch, ...] = tuple(properties)
+
+    @property
+    def propertyX(self) -> ValuePropertyBatch :
+        return self.properties[0]
+
+    @property
+    def propertyY(self) -> ValuePropertyBatch :
+        return self.properties[1]
+
+    def dimensions(self) -> int :
+        return len(self.properties)
+
+    def __len__(self) -> int :
+        return len(self.propertyX)
+
+    def __getitem__(self, index : int) -> FullProperty :
+        return FullProperty(*[subProperty[index] for subProperty in self.getProperties()])
+
+    def getProperties(self) -> List[ValuePropertyBatch] :
+        return list(self.properties)
+
+    def take(self, indices : Union[Sequence[int], np.ndarray]) -> "FullPropertyBatch" :
+        return FullPropertyBatch(*[subProperty.take(indices) for subProperty in self.getProperties()])
+
+    def weightedMean(self, weights : np.ndarray) -> "FullPropertyBatch" :
+        return FullPropertyBatch(*[subProperty.weightedMean(weights) for subProperty in self.getProperties()])
+
+    def weightedMeanRows(self, indices : np.ndarray, weights : np.ndarray) -> "FullPropertyBatch" :
+        return FullPropertyBatch(*[subProperty.weightedMeanRows(indices, weights) for subProperty in self.getProperties()])
+
+    def lerp(self, other : "FullPropertyBatch", coefs : np.ndarray) -> "FullPropertyBatch" :
+        return FullPropertyBatch(*[subProperty0.lerp(subProperty1, coefs) for subProperty0, subProperty1 in zip(self.getProperties(), other.getProperties())])
+
+    # (dimensions, N), one row per ValueProperty column
+    def getValues(self) -> np.ndarray :
+        return np.stack([subProperty.transformValues() for subProperty in self.getProperties()])
+
+    def getValuesXY(self) -> tuple[np.ndarray, np.ndarray] :
+        values : np.ndarray = self.getValues()
+        return values[0], values[1]
+
+    def toProperties(self) -> List[FullProperty] :
+        return [FullProperty(*values) for values in zip(*[subProperty.toProperties() for subProperty in self.getProperties()])]
+
+    @staticmethod
+    def fromProperties(properties : Sequence[FullProperty], dtype : type = np.float64) -> "FullPropertyBatch" :
+        assert all([value.__class__ == FullProperty for value in properties]), "Error in FullPropertyBatch fromProperties. Not all value are a FullProperty."
+        assert len(set([value.dimensions() for value in properties])) <= 1, "Error in FullPropertyBatch fromProperties. FullProperty dimensions differ."
+        tmp : List[List[ValueProperty]] = [list(val) for val in zip(*[value.getProperties() for value in properties])] # matrice transpose
+
+        # every column base value is a row view of one contiguous (dimensions, N) block
+        baseValues : np.ndarray = np.array([[value.baseValue for value in val] for val in tmp], dtype=dtype)
+        return FullPropertyBatch(*[
+            ValuePropertyBatch(row, makeModifierBatch([value.modifier for value in val], dtype)) for row, val in zip(baseValues, tmp)
+        ])
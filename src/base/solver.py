@@ -0,0 +1,97 @@
+from typing import Callable, List
+import math
+import numpy as np
+
+GOLDEN : float = (math.sqrt(5) - 1) / 2
+
+
+def illinois(
+        evaluate : Callable[[np.ndarray, np.ndarray], np.ndarray],
+        a : np.ndarray,
+        b : np.ndarray,
+        fa : np.ndarray,
+        fb : np.ndarray,
+        xtol : float = 1e-12,
+        maxIterations : int = 100
+    ) -> np.ndarray :
+    # vectorised regula falsi with the Illinois modification, f(a) and f(b) must have opposite signs
+    a, b, fa, fb = a.copy(), b.copy(), fa.copy(), fb.copy()
+    for _ in range(maxIterations) :
+        active : np.ndarray = np.flatnonzero((np.abs(b - a) > xtol) & (fb != 0))
+        if len(active) == 0 : break
+        aa, bb, ffa, ffb = a[active], b[active], fa[active], fb[active]
+
+        c : np.ndarray = bb - ffb * (bb - aa) / (ffb - ffa)
+        c = np.where(np.isfinite(c), np.clip(c, np.minimum(aa, bb), np.maximum(aa, bb)), (aa + bb) / 2)
+        fc : np.ndarray = evaluate(active, c)
+
+        crossed : np.ndarray = fc * ffb < 0
+        a[active] = np.where(crossed, bb, aa)
+        fa[active] = np.where(crossed, ffb, ffa / 2)
+        b[active], fb[active] = c, fc
+    return b
+
+def goldenSection(
+        function : Callable[[np.ndarray], np.ndarray],
+        a : np.ndarray,
+        b : np.ndarray,
+        maximum : np.ndarray,
+        xtol : float = 1e-12,
+        maxIterations : int = 200
+    ) -> np.ndarray :
+    # vectorised golden section search of the maximum (minimum where maximum is False) of function on every [a, b]
+    sign : np.ndarray = np.where(maximum, -1.0, 1.0)
+    a, b = a.astype(float), b.astype(float)
+    c : np.ndarray = b - GOLDEN * (b - a)
+    d : np.ndarray = a + GOLDEN * (b - a)
+    fc, fd = sign * function(c), sign * function(d)
+    for _ in range(maxIterations) :
+        if not (np.abs(b - a) > xtol).any() : break
+        left : np.ndarray = ~(fc > fd) # the extremum is in [a, d], nan keeps the left part
+        a, b = np.where(left, a, c), np.where(left, d, b)
+        c, d = np.where(left, b - GOLDEN * (b - a), d), np.where(left, c, a + GOLDEN * (b - a))
+        value : np.ndarray = sign * function(np.where(left, c, d))
+        fc, fd = np.where(left, value, fd), np.where(left, fc, value)
+    return (a + b) / 2
+
+# Breakpoints of the monotone segments of function over a sorted grid: the grid points where the sampled slope changes
+# sign are refined to the extremum between their neighbours. Extrema closer than a grid step from each other can be
+# missed, the grid must resolve the curve.
+def monotoneSegments(function : Callable[[np.ndarray], np.ndarray], grid : np.ndarray, rtol : float = 1e-12) -> tuple[np.ndarray, np.ndarray] :
+    xtol : float = rtol * max(1.0, float(np.abs(grid).max()))
+    values : np.ndarray = function(grid)
+    slope : np.ndarray = np.sign(np.diff(values))
+    nonzero : np.ndarray = np.flatnonzero(slope)
+    if len(nonzero) == 0 : return grid[[0, -1]], values[[0, -1]]
+    # flat steps take the slope of the last step that moved
+    slope = slope[nonzero[np.maximum(np.searchsorted(nonzero, np.arange(len(slope)), side="right") - 1, 0)]]
+
+    turns : np.ndarray = np.flatnonzero(slope[:-1] * slope[1:] < 0) + 1
+    extrema : np.ndarray = goldenSection(function, grid[turns - 1], grid[turns + 1], slope[turns - 1] > 0, xtol)
+    breaks : np.ndarray = np.unique(np.concatenate((grid[[0, -1]], extrema)))
+    return breaks, function(breaks)
+
+# Every x of [breaks[0], breaks[-1]] with function(x) == target, per target (sorted). Each monotone segment holding the
+# target brackets one root; roots found in two segments (targets at an extremum) are kept once.
+def solveSegments(
+        function : Callable[[np.ndarray], np.ndarray],
+        breaks : np.ndarray,
+        values : np.ndarray,
+        targets : np.ndarray,
+        rtol : float = 1e-12
+    ) -> List[np.ndarray] :
+    targets = np.atleast_1d(np.asarray(targets, dtype=float))
+    xtol : float = rtol * max(1.0, float(np.abs(breaks).max()))
+    lower : np.ndarray = np.minimum(values[:-1], values[1:])
+    upper : np.ndarray = np.maximum(values[:-1], values[1:])
+    q, j = np.nonzero((targets[:, np.newaxis] >= lower) & (targets[:, np.newaxis] <= upper))
+
+    evaluate = lambda rows, x : function(x) - targets[q[rows]]
+    roots : np.ndarray = illinois(evaluate, breaks[j], breaks[j + 1], values[j] - targets[q], values[j + 1] - targets[q], xtol)
+
+    order : np.ndarray = np.lexsort((roots, q))
+    q, roots = q[order], roots[order]
+    keep : np.ndarray = np.ones(len(q), dtype=bool)
+    keep[1:] = (q[1:] != q[:-1]) | (np.diff(roots) > 4 * xtol)
+    q, roots = q[keep], roots[keep]
+    return np.split(roots, np.cumsum(np.bincount(q, minlength=len(targets)))[:-1])
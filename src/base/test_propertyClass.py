@@ -0,0 +1,40 @@
+from typing import List, cast
+import numpy as np
+
+from population.population import randomFullProperties
+from .propertyClass import FullProperty, FullPropertyBatch
+
+EPS : float = float(np.finfo(np.float64).eps)
+
+# the scalar mix through the vectorized transform: transformValue and transformValues differ by about an ulp
+def batchValues(properties : List[FullProperty]) -> np.ndarray :
+    return FullProperty.makeBatch(properties).getValues()
+
+
+def test_weightedMeanRowsExact() -> None :
+    for point in [False, True] :
+        batch : FullPropertyBatch = randomFullProperties(10, point=point, seed=15)
+        properties : List[FullProperty] = batch.toProperties()
+        rng : np.random.Generator = np.random.default_rng(15)
+        indices : np.ndarray = np.array([rng.permutation(10)[:4] for _ in range(30)])
+        weights : np.ndarray = rng.uniform(size=(30, 4))
+        expected : List[FullProperty] = [cast(FullProperty, FullProperty.weightedMean([properties[i] for i in row], weight.tolist())) for row, weight in zip(indices.tolist(), weights)]
+        assert np.array_equal(batch.weightedMeanRows(indices, weights).getValues(), batchValues(expected))
+
+# point modifiers mix exactly, the baseValues matrix product is within its documented tolerance
+def test_pointWeightedMean() -> None :
+    batch : FullPropertyBatch = randomFullProperties(6, point=True, seed=16)
+    properties : List[FullProperty] = batch.toProperties()
+    weights : np.ndarray = np.random.default_rng(16).uniform(size=(20, 6))
+    mixed : FullPropertyBatch = batch.weightedMean(weights)
+    expected : FullPropertyBatch = FullProperty.makeBatch([cast(FullProperty, FullProperty.weightedMean(properties, weight.tolist())) for weight in weights])
+    for subProperty, subExpected, subBatch in zip(mixed.getProperties(), expected.getProperties(), batch.getProperties()) :
+        assert all([np.array_equal(getattr(subProperty.modifiers, name), getattr(subExpected.modifiers, name)) for name in ("coefs", "centers", "directions")])
+        assert np.abs(subProperty.baseValues - subExpected.baseValues).max() <= len(batch) * EPS * np.abs(subBatch.baseValues).max()
+
+def test_lerpManyMatchesLerp() -> None :
+    for point in [False, True] :
+        property0, property1 = randomFullProperties(2, point=point, seed=17).toProperties()
+        coefs : List[float] = [0, 0.1, 0.5, 0.75, 1]
+        expected : List[FullProperty] = [cast(FullProperty, FullProperty.lerp(property0, property1, coef)) for coef in coefs]
+        assert np.allclose(FullProperty.lerpMany(property0, property1, coefs).values, batchValues(expected), rtol=16 * EPS, atol=0)
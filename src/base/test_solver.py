@@ -0,0 +1,30 @@
+from typing import List
+import math
+import numpy as np
+
+from .solver import monotoneSegments, solveSegments
+
+# every x of [lower, upper] with sin(x) == target
+def sinRoots(target : float, lower : float, upper : float) -> List[float] :
+    if abs(target) > 1 : return []
+    first : float = math.asin(target)
+    roots : List[float] = [root + 2 * math.pi * k for k in range(-1, 5) for root in (first, math.pi - first)]
+    return sorted(set([root for root in roots if lower <= root <= upper]))
+
+
+def test_solveSegmentsEveryRoot() -> None :
+    targets : np.ndarray = np.array([-0.99, -0.5, 0.0, 0.3, 0.999, 1.5])
+    for lower, upper in [(0.0, 20.0), (1.0, 7.0), (-2.0, 3.0)] :
+        breaks, values = monotoneSegments(np.sin, np.linspace(lower, upper, 64))
+        roots : List[np.ndarray] = solveSegments(np.sin, breaks, values, targets)
+        assert len(roots) == len(targets)
+        for target, found in zip(targets.tolist(), roots) :
+            expected : List[float] = sinRoots(target, lower, upper)
+            assert len(found) == len(expected)
+            assert np.allclose(found, expected, rtol=0, atol=1e-9)
+
+# the extrema between two grid points are refined, the segments split there
+def test_monotoneSegmentsExtrema() -> None :
+    breaks, values = monotoneSegments(np.sin, np.linspace(0, 10, 16))
+    assert np.allclose(breaks, [0, math.pi / 2, 3 * math.pi / 2, 5 * math.pi / 2, 10], rtol=0, atol=1e-6)
+    assert np.allclose(values[1:-1], [1, -1, 1], rtol=0, atol=1e-12)
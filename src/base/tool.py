@@ -1,7 +1,12 @@
-from typing import Protocol, List, Sequence, TypeVar, Union, runtime_checkable
+from typing import Any, Optional, cast, Protocol, List, Sequence, TypeVar, Union, runtime_checkable
 from functools import reduce
 import operator
 import math
+import sys
+import numpy as np
+
+from .profiling import profiled
+from .solver import monotoneSegments, solveSegments
 
 
 
@@ -11,11 +16,13 @@ LERP = TypeVar("LERP", bound="ClassLerp")
 
 @runtime_checkable
 class SupportsLerp(Protocol):
+    __slots__ = ()
     def __add__(self : T, other : T) -> T : ...
     def __mul__(self : T, weight : float) -> T : ...
 
 @runtime_checkable
 class ClassLerp(SupportsLerp, Protocol):
+    __slots__ = ()
 
     @staticmethod
     def lerp(val0 : LERP, val1 : LERP, coef : float) -> LERP : ...
@@ -25,9 +32,127 @@ class ClassLerp(SupportsLerp, Protocol):
 
 @runtime_checkable
 class PropertyModifier(ClassLerp, Protocol):
+    __slots__ = ()
     def transformValue(self, baseValue : float) -> float : ...
+    def transformValues(self, baseValues : np.ndarray) -> np.ndarray :
+        # reference fallback, modifiers should override it with a numpy kernel
+        values = np.asarray(baseValues, dtype=float)
+        return np.array([self.transformValue(float(value)) for value in values.ravel()], dtype=float).reshape(values.shape)
+    def inverseValues(self, targets : Union[Sequence[float], np.ndarray], lower : float, upper : float) -> List[np.ndarray] :
+        # reference fallback on a uniform grid, modifiers should override it with their own segment index
+        assert lower < upper, f"Error in inverseValues. Empty domain [{lower}, {upper}]."
+        breaks, values = monotoneSegments(self.transformValues, np.linspace(lower, upper, 1025))
+        return solveSegments(self.transformValues, breaks, values, np.asarray(targets, dtype=float))
     def quickPrint(self) -> None : ...
 
+    @staticmethod
+    def makeBatch(modifiers : Sequence["PropertyModifier"], dtype : type = np.float64) -> "PropertyModifierBatch" :
+        # reference fallback, modifiers should override it with an array backed batch
+        return PropertyModifierList(modifiers)
+
+
+@runtime_checkable
+class PropertyModifierBatch(Protocol):
+    def __len__(self) -> int : ...
+    def __getitem__(self, index : int) -> PropertyModifier : ...
+    def take(self, indices : Union[Sequence[int], np.ndarray]) -> "PropertyModifierBatch" : ...
+    def weightedMean(self, weights : np.ndarray) -> "PropertyModifierBatch" : ...
+    def weightedMeanRows(self, indices : np.ndarray, weights : np.ndarray) -> "PropertyModifierBatch" : ...
+    def lerp(self, other : "PropertyModifierBatch", coefs : np.ndarray) -> "PropertyModifierBatch" : ...
+    def transformValues(self, baseValues : np.ndarray) -> np.ndarray : ...
+    def toProperties(self) -> List[PropertyModifier] : ...
+
+
+
+class PropertyModifierList(PropertyModifierBatch):
+    def __init__(self, modifiers : Sequence[PropertyModifier]) :
+        self.modifiers : List[PropertyModifier] = list(modifiers)
+
+    def __len__(self) -> int :
+        return len(self.modifiers)
+
+    def __getitem__(self, index : int) -> PropertyModifier :
+        return self.modifiers[index]
+
+    def take(self, indices : Union[Sequence[int], np.ndarray]) -> "PropertyModifierList" :
+        return PropertyModifierList([self.modifiers[int(i)] for i in np.asarray(indices).ravel()])
+
+    def weightedMean(self, weights : np.ndarray) -> "PropertyModifierList" :
+        weights = checkWeights(weights, len(self))
+        meanFunction = self.modifiers[0].weightedMean
+        return PropertyModifierList([meanFunction(self.modifiers, row.tolist()) for row in weights])
+
+    def weightedMeanRows(self, indices : np.ndarray, weights : np.ndarray) -> "PropertyModifierList" :
+        weights = checkWeights(weights, np.shape(indices)[1])
+        meanFunction = self.modifiers[0].weightedMean
+        return PropertyModifierList([meanFunction([self.modifiers[i] for i in row], weight) for row, weight in zip(np.asarray(indices).tolist(), weights.tolist())])
+
+    def lerp(self, other : PropertyModifierBatch, coefs : np.ndarray) -> "PropertyModifierList" :
+        modifiers0, modifiers1, coefs = broadcastLerp(self.toProperties(), other.toProperties(), coefs)
+        lerpFunction = modifiers0[0].lerp
+        return PropertyModifierList([lerpFunction(modifier0, modifier1, coef)
+            for modifier0, modifier1, row in zip(modifiers0, modifiers1, coefs.tolist()) for coef in row])
+
+    def transformValues(self, baseValues : np.ndarray) -> np.ndarray :
+        baseValues = np.asarray(baseValues, dtype=float)
+        assert len(baseValues) == len(self), f"Error in PropertyModifierList transformValues. length: {len(baseValues)} != {len(self)}."
+        return np.stack([modifier.transformValues(values) for modifier, values in zip(self.modifiers, baseValues)]) if len(self) > 0 else baseValues.copy()
+
+    def toProperties(self) -> List[PropertyModifier] :
+        return list(self.modifiers)
+
+
+
+# Base of the immutable value types: members are set once in __init__ through setMembers, equality and hash
+# use key(). Hashes only combine numbers, so they are the same in every process.
+class Immutable:
+    __slots__ = ()
+
+    def setMembers(self, **members : Any) -> None :
+        [object.__setattr__(self, name, value) for name, value in members.items()]
+
+    def __setattr__(self, name : str, value : Any) -> None :
+        raise AttributeError(f"{self.__class__.__name__} is immutable, cannot set {name}.")
+
+    def __delattr__(self, name : str) -> None :
+        raise AttributeError(f"{self.__class__.__name__} is immutable, cannot delete {name}.")
+
+    def key(self) -> tuple : ...
+
+    def __eq__(self, other : object) -> bool :
+        return self is other or (other.__class__ == self.__class__ and cast(Immutable, other).key() == self.key())
+
+    def __hash__(self) -> int :
+        return hash(self.key())
+
+    def __reduce__(self) :
+        return (self.__class__, self.key())
+
+
+
+def footprint(value : Any, seen : Optional[set] = None) -> int :
+    # bytes used by value and everything it references (objects shared with an other branch are counted once)
+    seen = set() if seen is None else seen
+    if id(value) in seen : return 0
+    seen.add(id(value))
+
+    size : int = sys.getsizeof(value)
+    if isinstance(value, np.ndarray) :
+        return size if value.base is None else size + footprint(value.base, seen)
+    if isinstance(value, dict) :
+        return size + sum([footprint(key, seen) + footprint(item, seen) for key, item in value.items()])
+    if isinstance(value, (list, tuple, set, frozenset)) :
+        return size + sum([footprint(item, seen) for item in value])
+    if hasattr(value, "__closure__") :
+        return size + sum([footprint(cell.cell_contents, seen) for cell in (value.__closure__ or ())])
+
+    mangle = lambda cls, name : f"_{cls.__name__.lstrip('_')}{name}" if name.startswith("__") and not name.endswith("__") else name
+    names : List[str] = [mangle(cls, name) for cls in type(value).__mro__ for name in getattr(cls, "__slots__", ())]
+    members : List[Any] = [getattr(value, name) for name in names if hasattr(value, name)]
+    if hasattr(value, "__dict__") and not isinstance(value, type) :
+        members.append(vars(value))
+    return size + sum([footprint(member, seen) for member in members])
+
 
 
 class Iter:
@@ -53,6 +178,7 @@ def clamp(minimum : float, x : float, maximum : float) -> float :
 
 
 
+@profiled()
 def weightedMean(values : Sequence[T], weights : List[float]) -> T :
     assert len(values) == len(weights), f"Invalid Lists on weightedMean. length: {len(values)} != {len(weights)}."
     assert len(values) != 0, "Invalid Lists on weightedMean. Lists are empty."
@@ -65,6 +191,68 @@ def weightedMean(values : Sequence[T], weights : List[float]) -> T :
 
     return reduce(operator.add, weighted)
 
+def checkWeights(weights : Union[Sequence[float], np.ndarray], size : int) -> np.ndarray :
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    assert weights.ndim == 2 and weights.shape[1] == size, f"Invalid weights on checkWeights. length: {weights.shape[-1]} != {size}."
+    assert size != 0, "Invalid weights on checkWeights. Weights are empty."
+    assert (weights >= 0).all(), "Invalid weight on checkWeights. All weights should be >= 0."
+    return weights
+
+# row by row equivalent of the normalisation done in weightedMean, summed in the same order.
+# weightedMeanRows(indices, weights) mixes its own ingredients per row: row m is the mean of the items indices[m]
+# (M, K) with weights[m]. Rows with less ingredients are padded with 0 weights, which add exactly nothing.
+def normalizeWeights(weights : Union[Sequence[float], np.ndarray], size : int) -> np.ndarray :
+    weights = checkWeights(weights, size)
+    total : np.ndarray = weights[:, 0].copy()
+    for column in weights.T[1:] :
+        total += column
+    return weights / total[:, np.newaxis]
+
+# sum over k of weights[:, k] * values[:, k] (values (M, K, ...)), accumulated column by column like reduce(operator.add)
+# in weightedMean so the rows give the same floats as the scalar path
+def weightedSumRows(weights : np.ndarray, values : np.ndarray) -> np.ndarray :
+    weights = weights.reshape(weights.shape + (1,) * (values.ndim - 2))
+    ret : np.ndarray = values[:, 0] * weights[:, 0]
+    for column in range(1, weights.shape[1]) :
+        ret = ret + values[:, column] * weights[:, column]
+    return ret
+
+def broadcastCoefs(length0 : int, length1 : int, coefs : Union[Sequence[float], np.ndarray]) -> np.ndarray :
+    size : int = max(length0, length1)
+    assert length0 in (1, size) and length1 in (1, size), f"Invalid length on broadcastCoefs. length: {length0} != {length1}."
+    coefs = np.asarray(coefs, dtype=float)
+    coefs = np.broadcast_to(coefs if coefs.ndim == 2 else coefs.reshape(1, -1), (size, coefs.shape[-1]))
+    assert ((coefs >= 0) & (coefs <= 1)).all(), "Invalid coef on broadcastCoefs. All coefs should be like 0 <= coef <= 1."
+    return coefs
+
+def broadcastLerp(values0 : Sequence, values1 : Sequence, coefs : Union[Sequence[float], np.ndarray]) -> tuple[Sequence, Sequence, np.ndarray] :
+    coefs = broadcastCoefs(len(values0), len(values1), coefs)
+    repeat = lambda values : values if len(values) == len(coefs) else np.repeat(values, len(coefs), axis=0) if isinstance(values, np.ndarray) else list(values) * len(coefs)
+    return repeat(values0), repeat(values1), coefs
+
+# lerp of every row of values0 with the same row of values1 for every coef of that row: (N, ...) -> (N * T, ...).
+# Computed like lerpToWeightedMean: weights [1 - coef, coef] normalised and the exact values at coef 0 and 1.
+def lerpArrays(values0 : np.ndarray, values1 : np.ndarray, coefs : Union[Sequence[float], np.ndarray]) -> np.ndarray :
+    values0, values1, coefs = broadcastLerp(values0, values1, coefs)
+    coefs = coefs.astype(np.result_type(values0, values1), copy=False)
+    axes = (slice(None), slice(None)) + (np.newaxis,) * (values0.ndim - 1)
+
+    weight0 : np.ndarray = 1 - coefs
+    total : np.ndarray = weight0 + coefs
+    start : np.ndarray = values0[:, np.newaxis]
+    end : np.ndarray = values1[:, np.newaxis]
+
+    ret : np.ndarray = start * (weight0 / total)[axes] + end * (coefs / total)[axes]
+    ret = np.where((coefs == 0)[axes], start, ret)
+    ret = np.where((coefs == 1)[axes], end, ret)
+    return ret.reshape((-1,) + values0.shape[1:])
+
+def makeModifierBatch(modifiers : Sequence[PropertyModifier], dtype : type = np.float64) -> PropertyModifierBatch :
+    assert len(modifiers) != 0, "Error in makeModifierBatch. The List is empty."
+    assert all([modifier.__class__ == modifiers[0].__class__ for modifier in modifiers]), "Error in makeModifierBatch. Not all modifiers are the same type."
+    return modifiers[0].makeBatch(modifiers, dtype)
+
+@profiled()
 def lerpToWeightedMean(val0 : T, val1 : T, coef : float, function) -> T :
     assert coef >= 0 and coef <= 1, f"Invalid coef on lerpToWeightedMean. {coef} is not in [0, 1]. It should be like 0 <= {coef} <= 1"
     if coef == 0 : return val0
@@ -89,10 +277,16 @@ def Dist(coord : List[float]) -> float :
     return 0
 
 
+@profiled()
 def easyLerp(val0 : LERP, val1 : LERP, coefs : List[float]) -> List[LERP] :
     assert val0.__class__ == val1.__class__, f"Error in easyLerp. Not the same Type: {val0.__class__} != {val1.__class__}."
     return [val0.lerp(val0, val1, coef) for coef in coefs]
 
 
+@profiled()
 def transformValue(propertymodifier : PropertyModifier, values : List[float]) -> List[float] :
     return [propertymodifier.transformValue(value) for value in values]
+
+@profiled()
+def transformValues(propertymodifier : PropertyModifier, values : Union[Sequence[float], np.ndarray]) -> np.ndarray :
+    return propertymodifier.transformValues(np.asarray(values, dtype=float))
@@ -0,0 +1,39 @@
+import argparse
+import sys
+from typing import List, Optional
+
+from .benchmark import SEED, compareResults, loadBaseline, runBenchmarks, saveBaseline
+from .imports import IMPORT_BUDGETS, checkImports, measureImports
+
+
+def main(argv : Optional[List[str]] = None) -> int :
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description="Time the mixing and analysis hot paths.")
+    parser.add_argument("names", nargs="*", help="only run the cases containing one of these names")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-size", type=int, default=None, help="skip the sizes over this value")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--save", metavar="PATH", help="save the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare the results to a JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument("--imports", action="store_true", help="check the import time budgets of the entry points instead")
+    args = parser.parse_args(argv)
+
+    if args.imports :
+        modules = [module for module in IMPORT_BUDGETS if not args.names or any([part in module for part in args.names])]
+        failures = checkImports(measureImports(modules, args.repeat))
+        [print(f"OVER BUDGET {failure}") for failure in failures]
+        return 1 if len(failures) != 0 else 0
+
+    results = runBenchmarks(args.names or None, args.repeat, args.max_size, args.seed)
+    if args.save :
+        saveBaseline(results, args.save)
+
+    if args.compare :
+        regressions = compareResults(results, loadBaseline(args.compare), args.tolerance)
+        [print(f"REGRESSION {r['name']} [{r['size']}]: {r['baseline'] * 1e3:.3f} ms -> {r['current'] * 1e3:.3f} ms (x{r['ratio']:.2f})") for r in regressions]
+        return 1 if len(regressions) != 0 else 0
+    return 0
+
+
+if __name__ == "__main__" :
+    sys.exit(main())
@@ -0,0 +1,196 @@
+from typing import Any, Callable, Dict, List, Optional
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+import numpy as np
+
+from base.propertyClass import FullProperty, ValueProperty
+from base.tool import lerpToWeightedMean, transformValue, transformValues, weightedMean
+from modifier.curveProperty import CurveProperty
+from modifier.pointProperty import PointProperty, PointPropertyBatch
+from analyzer.analyzer import analyseOneFullProperty, analyseOneFullPropertyReference
+from analyzer.listanalyzer import analyseIter, analyseIterv2, analyzeProperties
+from .reference import analyseIterReference, analyseIterv2Reference, analyzePropertiesReference
+from population.population import randomFullProperties
+
+# name -> (sizes, make) where make(size) returns the function to time. "reference" cases time the pure Python
+# objects (benchmark.reference for the analyses), the others the array paths, both on the same seeded inputs.
+Case = tuple[List[int], Callable[[int], Callable[[], Any]]]
+SEED : int = 1234
+
+
+def rndFullProperty(point : bool = False) -> FullProperty :
+    modifier : Callable = PointProperty.rnd_AutoCircle if point else CurveProperty.rnd
+    return FullProperty(ValueProperty(random.uniform(1, 100), modifier()), ValueProperty(random.uniform(1, 100), modifier()))
+
+def grid(size : int, maximum : float = 1000) -> List[float] :
+    return [maximum * i / (size - 1) for i in range(size)]
+
+def mixWeights(size : int, count : int) -> List[List[float]] :
+    return [[random.uniform(0, 1) for _ in range(count)] for _ in range(size)]
+
+
+def makeCurveTransformReference(size : int) -> Callable[[], Any] :
+    curve, x = CurveProperty.rnd(), grid(size)
+    return lambda : transformValue(curve, x)
+
+def makeCurveTransform(size : int) -> Callable[[], Any] :
+    curve, x = CurveProperty.rnd(), np.array(grid(size))
+    return lambda : transformValues(curve, x)
+
+def makeWeightedMeanReference(size : int) -> Callable[[], Any] :
+    curves, weights = [CurveProperty.rnd() for _ in range(6)], mixWeights(size, 6)
+    return lambda : [weightedMean(curves, weight) for weight in weights]
+
+def makeWeightedMean(size : int) -> Callable[[], Any] :
+    curves, weights = CurveProperty.makeBatch([CurveProperty.rnd() for _ in range(6)]), np.array(mixWeights(size, 6))
+    return lambda : curves.weightedMean(weights)
+
+def makeLerpToWeightedMeanReference(size : int) -> Callable[[], Any] :
+    curve0, curve1, coefs = CurveProperty.rnd(), CurveProperty.rnd(), grid(size, 1)
+    return lambda : [lerpToWeightedMean(curve0, curve1, coef, weightedMean) for coef in coefs]
+
+def makePointWeightedMeanReference(size : int) -> Callable[[], Any] :
+    points, weights = [PointProperty.rnd_AutoCircle() for _ in range(6)], mixWeights(size, 6)
+    return lambda : [PointProperty.weightedMean(points, weight) for weight in weights]
+
+def makePointWeightedMean(size : int) -> Callable[[], Any] :
+    points, weights = PointPropertyBatch.fromProperties([PointProperty.rnd_AutoCircle() for _ in range(6)]), np.array(mixWeights(size, 6))
+    return lambda : points.weightedMean(weights)
+
+def makeFullLerpReference(size : int) -> Callable[[], Any] :
+    property0, property1, coefs = rndFullProperty(), rndFullProperty(), grid(size, 1)
+    return lambda : FullProperty.getValuesXY([FullProperty.lerp(property0, property1, coef) for coef in coefs])
+
+def makeFullLerp(size : int) -> Callable[[], Any] :
+    property0, property1, coefs = rndFullProperty(), rndFullProperty(), np.array(grid(size, 1))
+    return lambda : FullProperty.lerpMany(property0, property1, coefs).getValuesXY()
+
+def makeAnalyseOneFullPropertyReference(size : int) -> Callable[[], Any] :
+    base, comparators = rndFullProperty(), [rndFullProperty() for _ in range(size)]
+    return lambda : analyseOneFullPropertyReference(base, comparators, 100)
+
+def makeAnalyseOneFullProperty(size : int) -> Callable[[], Any] :
+    base, comparators = rndFullProperty(), [rndFullProperty() for _ in range(size)]
+    return lambda : analyseOneFullProperty(base, comparators, 100)
+
+def makeAnalyseIterReference(size : int) -> Callable[[], Any] :
+    properties = [rndFullProperty() for _ in range(size)]
+    return lambda : analyseIterReference(properties, size // 2)
+
+def makeAnalyseIter(size : int) -> Callable[[], Any] :
+    properties = [rndFullProperty() for _ in range(size)]
+    return lambda : analyseIter(properties, size // 2)
+
+def makeAnalyzePropertiesReference(size : int) -> Callable[[], Any] :
+    properties = [rndFullProperty() for _ in range(size)]
+    return lambda : analyzePropertiesReference(properties, resolution=10)
+
+def makeAnalyzeProperties(size : int) -> Callable[[], Any] :
+    properties = [rndFullProperty() for _ in range(size)]
+    return lambda : analyzeProperties(properties, resolution=10)
+
+def makeAnalyseIterv2Reference(size : int) -> Callable[[], Any] :
+    properties = [rndFullProperty() for _ in range(size)]
+    return lambda : analyseIterv2Reference(properties, 12)
+
+def makeAnalyseIterv2(size : int) -> Callable[[], Any] :
+    properties = [rndFullProperty() for _ in range(size)]
+    return lambda : analyseIterv2(properties, 12)
+
+def makeRandomFullPropertiesReference(size : int) -> Callable[[], Any] :
+    return lambda : [rndFullProperty() for _ in range(size)]
+
+def makeRandomFullProperties(size : int) -> Callable[[], Any] :
+    return lambda : randomFullProperties(size, seed=SEED)
+
+
+CASES : Dict[str, Case] = {
+    "curve.transformValue.reference"        : ([1_001, 10_001], makeCurveTransformReference),
+    "curve.transformValues"                 : ([1_001, 10_001, 1_000_001], makeCurveTransform),
+    "tool.weightedMean.reference"           : ([100, 1_000], makeWeightedMeanReference),
+    "curve.batch.weightedMean"              : ([100, 1_000, 100_000], makeWeightedMean),
+    "tool.lerpToWeightedMean.reference"     : ([101, 1_001], makeLerpToWeightedMeanReference),
+    "point.weightedMean.reference"          : ([100, 1_000], makePointWeightedMeanReference),
+    "point.batch.weightedMean"              : ([100, 1_000, 100_000], makePointWeightedMean),
+    "full.lerp.reference"                   : ([101, 1_001], makeFullLerpReference),
+    "full.lerpMany"                         : ([101, 1_001, 100_001], makeFullLerp),
+    "analyseOneFullProperty.reference"      : ([10, 100], makeAnalyseOneFullPropertyReference),
+    "analyseOneFullProperty"                : ([10, 100, 1_000], makeAnalyseOneFullProperty),
+    "analyseIter.reference"                 : ([6], makeAnalyseIterReference),
+    "analyseIter"                           : ([6, 10], makeAnalyseIter),
+    "analyzeProperties.reference"           : ([4, 6], makeAnalyzePropertiesReference),
+    "analyzeProperties"                     : ([4, 6], makeAnalyzeProperties),
+    "analyseIterv2.reference"               : ([4, 6], makeAnalyseIterv2Reference),
+    "analyseIterv2"                         : ([4, 6], makeAnalyseIterv2),
+    "population.reference"                  : ([1_000, 10_000], makeRandomFullPropertiesReference),
+    "population.randomFullProperties"       : ([1_000, 10_000, 1_000_000], makeRandomFullProperties),
+}
+
+
+def timeFunction(function : Callable[[], Any], repeat : int = 5, minTime : float = 0.05) -> Dict[str, float] :
+    start : float = time.perf_counter()
+    function()
+    first : float = time.perf_counter() - start
+    number : int = max(1, math.ceil(minTime / max(first, 1e-9)))
+
+    times : List[float] = []
+    for _ in range(repeat) :
+        start = time.perf_counter()
+        [function() for _ in range(number)]
+        times.append((time.perf_counter() - start) / number)
+    return {"best": min(times), "median": statistics.median(times), "number": number, "repeat": repeat}
+
+def runBenchmarks(
+        names : Optional[List[str]] = None, 
+        repeat : int = 5, 
+        maxSize : Optional[int] = None, 
+        seed : int = SEED, 
+        log : Callable[[str], None] = print
+    ) -> Dict[str, Any] :
+    results : Dict[str, Dict[str, Dict[str, float]]] = {}
+    for name, (sizes, make) in CASES.items() :
+        if names is not None and not any([part in name for part in names]) : continue
+        results[name] = {}
+        for size in sizes :
+            if maxSize is not None and size > maxSize : continue
+            random.seed(seed)
+            results[name][str(size)] = timeFunction(make(size), repeat)
+            log(f"{name:<40} {size:>10} {results[name][str(size)]['best'] * 1e3:>12.3f} ms")
+
+    return {"meta": environment(seed), "results": results}
+
+def environment(seed : int = SEED) -> Dict[str, Any] :
+    return {
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "seed": seed,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def saveBaseline(results : Dict[str, Any], path : str) -> None :
+    with open(path, "w") as file :
+        json.dump(results, file, indent=2, sort_keys=True)
+
+def loadBaseline(path : str) -> Dict[str, Any] :
+    with open(path) as file :
+        return json.load(file)
+
+# a case regresses when its best time is more than tolerance slower than the baseline
+def compareResults(results : Dict[str, Any], baseline : Dict[str, Any], tolerance : float = 0.25) -> List[Dict[str, Any]] :
+    regressions : List[Dict[str, Any]] = []
+    for name, sizes in results["results"].items() :
+        for size, timing in sizes.items() :
+            reference : Optional[Dict[str, float]] = baseline["results"].get(name, {}).get(size)
+            if reference is None : continue
+            ratio : float = timing["best"] / reference["best"]
+            if ratio > 1 + tolerance :
+                regressions.append({"name": name, "size": int(size), "baseline": reference["best"], "current": timing["best"], "ratio": ratio})
+    return regressions
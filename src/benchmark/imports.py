@@ -0,0 +1,73 @@
+from typing import Any, Callable, Dict, List, Optional
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Import time budget of the entry points, tracked like the timings. Every module is imported in a fresh interpreter,
+# numpy first then the module: the budget is the cost of the module over numpy, which every entry point needs, so it
+# holds across machines better than the total. A module also fails when it loads one of its forbidden modules, the
+# mixing core must not pull the plotting, process pool or service stacks in (they are imported where they are used).
+
+SOURCE : str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORE_FORBIDDEN : List[str] = ["plotly", "pandas", "scipy", "multiprocessing", "concurrent.futures.process", "asyncio"]
+
+# module -> (milliseconds over numpy, forbidden modules)
+IMPORT_BUDGETS : Dict[str, tuple[float, List[str]]] = {
+    "base.tool"                 : (10, CORE_FORBIDDEN),
+    "base.propertyClass"        : (15, CORE_FORBIDDEN),
+    "modifier.curveProperty"    : (15, CORE_FORBIDDEN),
+    "modifier.pointProperty"    : (15, CORE_FORBIDDEN),
+    "analyzer.analyzer"         : (20, CORE_FORBIDDEN),
+    "analyzer.listanalyzer"     : (30, CORE_FORBIDDEN),
+    "analyzer.incremental"      : (30, CORE_FORBIDDEN),
+    "catalog.catalog"           : (20, CORE_FORBIDDEN),
+    "population.population"     : (40, CORE_FORBIDDEN),
+    "plotlyhelper.helper"       : (40, CORE_FORBIDDEN),
+    "plotlyhelper.report"       : (40, CORE_FORBIDDEN),
+    "service.service"           : (60, ["plotly", "pandas", "scipy", "multiprocessing"]),
+}
+
+MEASURE : str = """
+import json, sys, time
+start = time.perf_counter()
+import numpy
+middle = time.perf_counter()
+__import__(sys.argv[1])
+end = time.perf_counter()
+print(json.dumps({"numpy": middle - start, "module": end - middle, "modules": sorted(sys.modules)}))
+"""
+
+
+def measureImport(module : str) -> Dict[str, Any] :
+    environment : Dict[str, str] = dict(os.environ, PYTHONPATH=os.pathsep.join([SOURCE] + [path for path in [os.environ.get("PYTHONPATH")] if path]))
+    output : str = subprocess.run([sys.executable, "-c", MEASURE, module], cwd=SOURCE, env=environment, capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+# best of repeat fresh interpreters, a module is forbidden when one of its names or submodules is loaded
+def measureImports(modules : Optional[List[str]] = None, repeat : int = 5, log : Callable[[str], None] = print) -> Dict[str, Dict[str, Any]] :
+    results : Dict[str, Dict[str, Any]] = {}
+    for module in modules if modules is not None else list(IMPORT_BUDGETS) :
+        budget, forbidden = IMPORT_BUDGETS.get(module, (float("inf"), CORE_FORBIDDEN))
+        runs : List[Dict[str, Any]] = [measureImport(module) for _ in range(repeat)]
+        times : List[float] = [run["module"] for run in runs]
+        loaded : List[str] = [name for name in forbidden if any([other == name or other.startswith(name + ".") for other in runs[0]["modules"]])]
+        results[module] = {
+            "best": min(times),
+            "median": statistics.median(times),
+            "numpy": min([run["numpy"] for run in runs]),
+            "budget": budget / 1000,
+            "forbidden": loaded,
+        }
+        log(f"{module:<40} {min(times) * 1e3:>8.1f} ms / {budget:>5.0f} ms {'FORBIDDEN ' + ', '.join(loaded) if loaded else ''}")
+    return results
+
+def checkImports(results : Dict[str, Dict[str, Any]]) -> List[str] :
+    failures : List[str] = []
+    for module, result in results.items() :
+        if result["best"] > result["budget"] :
+            failures.append(f"{module}: {result['best'] * 1e3:.1f} ms over its {result['budget'] * 1e3:.0f} ms budget")
+        if len(result["forbidden"]) != 0 :
+            failures.append(f"{module}: loads {', '.join(result['forbidden'])}")
+    return failures
@@ -0,0 +1,65 @@
+from typing import List, cast
+from itertools import combinations
+
+from base.propertyClass import FullProperty
+from analyzer.listanalyzer import FullAnalyzerResult, ListAnalyzerResult
+
+# The pure Python analyseIter, analyzeProperties and analyseIterv2 the lattice engine replaced, kept as the baselines of
+# the benchmark: one FullProperty.weightedMean per mix, weights stepped one composition at a time. Only the resolution
+# parameter (20 before) and the stop at resolution properties were added, so they run on the same inputs.
+
+
+def makeCombinaison(properties : List[FullProperty], index : List[int], weights : List[int]) -> FullProperty :
+    total : float = float(sum(weights))
+    weightNormal : List[float] = [float(val) / total for val in weights]
+    return cast(FullProperty, FullProperty.weightedMean([properties[i] for i in index], weightNormal))
+
+# next composition of maxValue into len(weights) integers >= minimum, False after the last one
+def updateWeight(weights : List[int], maxValue : int, minimum : int = 1) -> bool :
+    assert len(weights) > 1, "Error in updateWeight. Cannot incremente a list of a single item."
+    maxUniqueValue : int = maxValue - (len(weights) - 1) * minimum
+    if weights[1] == maxUniqueValue : return False # Last iteration already happened
+    weights[0] = minimum
+
+    subIndex = len(weights) - 1
+    weights[subIndex] += 1
+    while subIndex > 1 and (weights[subIndex] > maxUniqueValue or maxValue < sum(weights)) :
+        weights[subIndex] = minimum
+        subIndex -= 1
+        weights[subIndex] += 1
+
+    weights[0] += maxValue - sum(weights)
+    return True
+
+
+def analyseIterReference(properties : List[FullProperty], quantityLerp : int, resolution : int = 20) -> ListAnalyzerResult :
+    assert len(properties) >= quantityLerp, "Error in analyseIterReference. Not enough properties for a mean."
+    assert 0 < quantityLerp <= resolution, "Error in analyseIterReference. quantityLerp must be in [1, resolution]."
+    if quantityLerp == 1 : return ListAnalyzerResult.makeAnalyse(properties)
+
+    fullProperty : List[FullProperty] = []
+    for index in combinations(range(len(properties)), quantityLerp) :
+        weights : List[int] = [1] * quantityLerp
+        weights[-1] = 0
+        while updateWeight(weights, resolution) :
+            fullProperty.append(makeCombinaison(properties, list(index), weights))
+
+    return ListAnalyzerResult.makeAnalyse(fullProperty)
+
+def analyzePropertiesReference(properties : List[FullProperty], resolution : int = 20) -> FullAnalyzerResult :
+    assert len(properties) > 1, "Error in analyzePropertiesReference. Need at least 2 properties."
+    ret = FullAnalyzerResult()
+    [ret.combinaison.append(analyseIterReference(properties, i, resolution)) for i in range(1, min(len(properties), resolution) + 1)]
+    return ret
+
+def analyseIterv2Reference(properties : List[FullProperty], maxValue : int) -> List[tuple] :
+    assert maxValue > 0, "Error in analyseIterv2Reference. maxValue must be over 0."
+    ret : List[tuple] = []
+
+    weights : List[int] = [0] * len(properties)
+    weights[-1] = -1
+    while updateWeight(weights, maxValue, 0) :
+        index : List[int] = [i for i, w in enumerate(weights) if w > 0]
+        full : FullProperty = makeCombinaison(properties, index, [w for w in weights if w > 0])
+        ret.append(tuple(full.getValues()) + (len(index),))
+    return ret
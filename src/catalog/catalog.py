@@ -0,0 +1,161 @@
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+import json
+import os
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from base.propertyClass import FullProperty, FullPropertyBatch, ValueProperty, ValuePropertyBatch
+from base.tool import PropertyModifier, PropertyModifierBatch
+from modifier.curveProperty import CurveProperty, CurvePropertyBatch
+from modifier.pointProperty import Point2D, PointProperty, PointPropertyBatch
+from modifier.tabulatedCurveProperty import TabulatedCurveProperty
+
+# A catalog is a directory of one JSON header and three .npy columns, each opened with np.load(mmap_mode="r"):
+#   baseValues (N, D) dtype        base value of every ValueProperty
+#   kinds      (N, D) uint8        modifier kind, index in KINDS
+#   params     (N, D, PARAMETERS)  modifier parameters, unused ones are 0
+# Opening reads the header and the .npy headers only, rows are read when they are used.
+
+CATALOG_FORMAT : str = "oobi-catalog"
+CATALOG_VERSION : int = 1
+HEADER : str = "header.json"
+COLUMNS : List[str] = ["baseValues", "kinds", "params"]
+PARAMETERS : int = 9
+
+CURVE, POINT, TABULATED_CURVE = 0, 1, 2
+KINDS : List[str] = ["CurveProperty", "PointProperty", "TabulatedCurveProperty"]
+
+
+def modifierKind(modifier : PropertyModifier) -> int :
+    assert modifier.__class__.__name__ in KINDS, f"Error in modifierKind. {modifier.__class__.__name__} cannot be saved in a catalog."
+    return KINDS.index(modifier.__class__.__name__)
+
+def modifierParams(modifier : PropertyModifier) -> List[float] :
+    params : List[float]
+    if isinstance(modifier, TabulatedCurveProperty) :
+        params = [getattr(modifier, name) for name in CurvePropertyBatch.PARAMETERS] + [modifier.lower, modifier.upper, modifier.maxError]
+    elif isinstance(modifier, CurveProperty) :
+        params = [getattr(modifier, name) for name in CurvePropertyBatch.PARAMETERS]
+    else :
+        point : PointProperty = modifier # type: ignore
+        params = [point.coef, point.center.x, point.center.y, point.direction.x, point.direction.y]
+    return params + [0.0] * (PARAMETERS - len(params))
+
+def makeModifier(kind : int, params : List[float]) -> PropertyModifier :
+    if kind == CURVE : return CurveProperty(*params[:6])
+    if kind == POINT : return PointProperty(params[0], Point2D(params[1], params[2]), Point2D(params[3], params[4]))
+    if kind == TABULATED_CURVE : return TabulatedCurveProperty(*params[:9])
+    raise ValueError(f"Error in makeModifier. Unknown modifier kind {kind}.")
+
+# tabulated curves are batched like the other curves (CurveProperty.makeBatch)
+def makeModifierBatchFromParams(kind : int, params : np.ndarray) -> PropertyModifierBatch :
+    if kind in (CURVE, TABULATED_CURVE) : return CurvePropertyBatch(params[:, :6], params.dtype)
+    if kind == POINT : return PointPropertyBatch(params[:, 0], params[:, 1:3], params[:, 3:5], params.dtype)
+    raise ValueError(f"Error in makeModifierBatchFromParams. Unknown modifier kind {kind}.")
+
+
+class Catalog :
+    def __init__(self, baseValues : np.ndarray, kinds : np.ndarray, params : np.ndarray, header : Dict[str, Any]) :
+        assert baseValues.shape == kinds.shape == params.shape[:2], f"Error in Catalog. shapes: {baseValues.shape}, {kinds.shape}, {params.shape}."
+        assert params.shape[2] == PARAMETERS, f"Error in Catalog. {params.shape[2]} parameters instead of {PARAMETERS}."
+        self.baseValues : np.ndarray = baseValues
+        self.kinds : np.ndarray = kinds
+        self.params : np.ndarray = params
+        self.header : Dict[str, Any] = header
+
+    def __len__(self) -> int :
+        return len(self.baseValues)
+
+    def dimensions(self) -> int :
+        return self.baseValues.shape[1]
+
+    def isFullProperty(self) -> bool :
+        return self.header["property"] == "FullProperty"
+
+    def __getitem__(self, index : int) -> Union[ValueProperty, FullProperty] :
+        baseValues : List[float] = self.baseValues[index].tolist()
+        kinds : List[int] = self.kinds[index].tolist()
+        params : List[List[float]] = self.params[index].tolist()
+        properties : List[ValueProperty] = [ValueProperty(baseValue, makeModifier(kind, param)) for baseValue, kind, param in zip(baseValues, kinds, params)]
+        return FullProperty(*properties) if self.isFullProperty() else properties[0]
+
+    def getProperties(self, start : int = 0, stop : Optional[int] = None) -> List[Union[ValueProperty, FullProperty]] :
+        return [self[i] for i in range(start, len(self) if stop is None else min(stop, len(self)))]
+
+    # rows are read from the disk, every column must hold a single modifier kind over the selected rows
+    def getBatch(self, indices : Optional[Union[Sequence[int], np.ndarray, slice]] = None) -> Union[ValuePropertyBatch, FullPropertyBatch] :
+        rows = slice(None) if indices is None else indices
+        baseValues : np.ndarray = np.asarray(self.baseValues[rows])
+        kinds : np.ndarray = np.asarray(self.kinds[rows])
+        params : np.ndarray = np.asarray(self.params[rows])
+        assert len(baseValues) != 0, "Error in Catalog getBatch. No row selected."
+
+        columns : List[ValuePropertyBatch] = []
+        for dimension in range(self.dimensions()) :
+            kind : int = int(kinds[0, dimension])
+            assert (kinds[:, dimension] == kind).all(), f"Error in Catalog getBatch. Column {dimension} mixes modifier kinds."
+            columns.append(ValuePropertyBatch(baseValues[:, dimension], makeModifierBatchFromParams(kind, params[:, dimension])))
+        return FullPropertyBatch(*columns) if self.isFullProperty() else columns[0]
+
+    def iterBatches(self, size : int = 1 << 16) -> Iterator[Union[ValuePropertyBatch, FullPropertyBatch]] :
+        assert size > 0, "Error in Catalog iterBatches. size must be over 0."
+        for start in range(0, len(self), size) :
+            yield self.getBatch(slice(start, start + size))
+
+    def setRows(self, start : int, properties : Sequence[Union[ValueProperty, FullProperty]]) -> None :
+        assert start >= 0 and start + len(properties) <= len(self), f"Error in Catalog setRows. rows {start} to {start + len(properties)} out of {len(self)}."
+        columns : List[List[ValueProperty]] = [value.getProperties() if isinstance(value, FullProperty) else [value] for value in properties]
+        assert all([len(value) == self.dimensions() for value in columns]), f"Error in Catalog setRows. Properties are not {self.dimensions()} dimensions."
+        stop : int = start + len(properties)
+        self.baseValues[start:stop] = [[value.baseValue for value in row] for row in columns]
+        self.kinds[start:stop] = [[modifierKind(value.modifier) for value in row] for row in columns]
+        self.params[start:stop] = [[modifierParams(value.modifier) for value in row] for row in columns]
+
+    def flush(self) -> None :
+        [column.flush() for column in (self.baseValues, self.kinds, self.params) if isinstance(column, np.memmap)]
+
+    @staticmethod
+    def create(path : str, count : int, dimensions : int, fullProperty : bool = True, dtype : type = np.float64) -> "Catalog" :
+        assert fullProperty or dimensions == 1, "Error in Catalog create. A ValueProperty catalog has a single dimension."
+        os.makedirs(path, exist_ok=True)
+        header : Dict[str, Any] = {
+            "format": CATALOG_FORMAT,
+            "version": CATALOG_VERSION,
+            "property": "FullProperty" if fullProperty else "ValueProperty",
+            "count": count,
+            "dimensions": dimensions,
+            "dtype": np.dtype(dtype).name,
+            "kinds": KINDS,
+            "parameters": PARAMETERS,
+        }
+        with open(os.path.join(path, HEADER), "w") as file :
+            json.dump(header, file, indent=2)
+
+        shapes : Dict[str, tuple[tuple[int, ...], Any]] = {
+            "baseValues": ((count, dimensions), dtype),
+            "kinds": ((count, dimensions), np.uint8),
+            "params": ((count, dimensions, PARAMETERS), dtype),
+        }
+        return Catalog(*[open_memmap(os.path.join(path, f"{name}.npy"), mode="w+", dtype=shapes[name][1], shape=shapes[name][0]) for name in COLUMNS], header)
+
+    @staticmethod
+    def open(path : str, mmap : bool = True) -> "Catalog" :
+        with open(os.path.join(path, HEADER)) as file :
+            header : Dict[str, Any] = json.load(file)
+        assert header.get("format") == CATALOG_FORMAT, f"Error in Catalog open. {path} is not a catalog."
+        assert header.get("version", 0) <= CATALOG_VERSION, f"Error in Catalog open. Version {header.get('version')} is newer than {CATALOG_VERSION}."
+        assert header.get("kinds") == KINDS[:len(header.get("kinds", []))], "Error in Catalog open. Unknown modifier kinds."
+        return Catalog(*[np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None) for name in COLUMNS], header)
+
+
+def saveCatalog(path : str, properties : Sequence[Union[ValueProperty, FullProperty]], dtype : type = np.float64, chunkSize : int = 1 << 16) -> Catalog :
+    assert len(properties) != 0, "Error in saveCatalog. The List is empty."
+    fullProperty : bool = isinstance(properties[0], FullProperty)
+    dimensions : int = properties[0].dimensions() if isinstance(properties[0], FullProperty) else 1
+    catalog : Catalog = Catalog.create(path, len(properties), dimensions, fullProperty, dtype)
+    [catalog.setRows(start, properties[start:start + chunkSize]) for start in range(0, len(properties), chunkSize)]
+    catalog.flush()
+    return catalog
+
+def loadCatalog(path : str, mmap : bool = True) -> Catalog :
+    return Catalog.open(path, mmap)
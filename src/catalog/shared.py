@@ -0,0 +1,138 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+from collections import OrderedDict
+from multiprocessing import shared_memory
+import sys
+import numpy as np
+
+from base.propertyClass import FullProperty, FullPropertyBatch, ValuePropertyBatch
+from modifier.curveProperty import CurvePropertyBatch
+from modifier.pointProperty import PointPropertyBatch
+from .catalog import CURVE, POINT, Catalog
+
+# A FullPropertyBatch published once in a multiprocessing.shared_memory block. The block holds the arrays the batch
+# classes use, back to back, so a process attaching it builds its batch on views of the block without copying:
+#   CurveProperty column  baseValues (N,), params (N, 6)
+#   PointProperty column  baseValues (N,), coefs (N,), centers (N, 2), directions (N, 2)
+# Only the SharedCatalogHandle (name and layout) is pickled per task. Every process attaches a block once and keeps
+# the ATTACH_CACHE_SIZE last ones. The SharedCatalog that created the block unlinks it when closed; worker processes
+# must be children of that process (they share its resource tracker).
+
+ALIGNMENT : int = 64
+ATTACH_CACHE_SIZE : int = 8
+ATTACHED : "OrderedDict[str, tuple[shared_memory.SharedMemory, FullPropertyBatch]]" = OrderedDict()
+
+
+def batchArrays(batch : FullPropertyBatch) -> tuple[List[int], List[np.ndarray]] :
+    kinds : List[int] = []
+    arrays : List[np.ndarray] = []
+    for column in batch.getProperties() :
+        modifiers = column.modifiers
+        assert isinstance(modifiers, (CurvePropertyBatch, PointPropertyBatch)), f"Error in batchArrays. {modifiers.__class__.__name__} cannot be shared."
+        if isinstance(modifiers, CurvePropertyBatch) :
+            kinds.append(CURVE)
+            arrays += [column.baseValues, modifiers.params]
+        else :
+            kinds.append(POINT)
+            arrays += [column.baseValues, modifiers.coefs, modifiers.centers, modifiers.directions]
+    return kinds, arrays
+
+def buildBatch(kinds : Sequence[int], arrays : Sequence[np.ndarray]) -> FullPropertyBatch :
+    columns : List[ValuePropertyBatch] = []
+    position : int = 0
+    for kind in kinds :
+        if kind == CURVE :
+            baseValues, params = arrays[position:position + 2]
+            columns.append(ValuePropertyBatch(baseValues, CurvePropertyBatch(params, params.dtype)))
+            position += 2
+        else :
+            baseValues, coefs, centers, directions = arrays[position:position + 4]
+            columns.append(ValuePropertyBatch(baseValues, PointPropertyBatch(coefs, centers, directions, coefs.dtype)))
+            position += 4
+    return FullPropertyBatch(*columns)
+
+def attachMemory(name : str) -> shared_memory.SharedMemory :
+    if sys.version_info >= (3, 13) :
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+def closeMemory(memory : shared_memory.SharedMemory) -> None :
+    try :
+        memory.close()
+    except BufferError :
+        pass # views are still referenced, the mapping goes away with them
+
+
+class SharedCatalogHandle :
+    def __init__(self, name : str, kinds : List[int], layout : List[tuple[int, tuple[int, ...], str]]) -> None :
+        self.name : str = name
+        self.kinds : List[int] = kinds
+        self.layout : List[tuple[int, tuple[int, ...], str]] = layout # (offset, shape, dtype) of every array
+
+    def views(self, memory : shared_memory.SharedMemory) -> List[np.ndarray] :
+        arrays : List[np.ndarray] = [np.ndarray(shape, np.dtype(dtype), buffer=memory.buf, offset=offset) for offset, shape, dtype in self.layout]
+        [array.setflags(write=False) for array in arrays]
+        return arrays
+
+    def attach(self) -> FullPropertyBatch :
+        if self.name in ATTACHED :
+            ATTACHED.move_to_end(self.name)
+            return ATTACHED[self.name][1]
+
+        memory : shared_memory.SharedMemory = attachMemory(self.name)
+        ATTACHED[self.name] = (memory, buildBatch(self.kinds, self.views(memory)))
+        while len(ATTACHED) > ATTACH_CACHE_SIZE :
+            closeMemory(ATTACHED.popitem(last=False)[1][0])
+        return ATTACHED[self.name][1]
+
+
+class SharedCatalog :
+    def __init__(self, batch : FullPropertyBatch) -> None :
+        kinds, arrays = batchArrays(batch)
+        layout : List[tuple[int, tuple[int, ...], str]] = []
+        size : int = 0
+        for array in arrays :
+            layout.append((size, array.shape, array.dtype.str))
+            size += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+        self.memory : Optional[shared_memory.SharedMemory] = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.handle : SharedCatalogHandle = SharedCatalogHandle(self.memory.name, kinds, layout)
+        views : List[np.ndarray] = [np.ndarray(array.shape, array.dtype, buffer=self.memory.buf, offset=offset) for array, (offset, _, _) in zip(arrays, layout)]
+        [np.copyto(view, array) for view, array in zip(views, arrays)]
+        del views
+        # the owner process uses the block like its workers
+        ATTACHED[self.handle.name] = (self.memory, buildBatch(kinds, self.handle.views(self.memory)))
+
+    def __len__(self) -> int :
+        return len(self.batch())
+
+    def batch(self) -> FullPropertyBatch :
+        assert self.memory is not None, "Error in SharedCatalog batch. The catalog is closed."
+        return self.handle.attach()
+
+    def close(self) -> None :
+        if self.memory is None : return
+        ATTACHED.pop(self.handle.name, None)
+        closeMemory(self.memory)
+        self.memory.unlink()
+        self.memory = None
+
+    def __enter__(self) -> "SharedCatalog" :
+        return self
+
+    def __exit__(self, *args : Any) -> None :
+        self.close()
+
+    @staticmethod
+    def fromProperties(properties : Sequence[FullProperty], dtype : type = np.float64) -> "SharedCatalog" :
+        return SharedCatalog(FullProperty.makeBatch(properties, dtype))
+
+    @staticmethod
+    def fromCatalog(catalog : Catalog) -> "SharedCatalog" :
+        batch : Union[ValuePropertyBatch, FullPropertyBatch] = catalog.getBatch()
+        assert isinstance(batch, FullPropertyBatch), "Error in SharedCatalog fromCatalog. The catalog does not hold FullProperty."
+        return SharedCatalog(batch)
+
+
+# function(batch, *args, **kwargs) in a worker, on the batch attached from shared memory
+def withSharedBatch(function : Callable[..., Any], handle : SharedCatalogHandle, *args : Any, **kwargs : Any) -> Any :
+    return function(handle.attach(), *args, **kwargs)
@@ -0,0 +1,30 @@
+from typing import List
+import numpy as np
+
+from base.propertyClass import FullProperty, ValueProperty
+from population.population import randomFullProperties
+from .catalog import Catalog, loadCatalog, saveCatalog
+
+def keys(properties : List[FullProperty]) -> List[List[tuple]] :
+    return [[(value.baseValue, value.modifier.key()) for value in property.getProperties()] for property in properties]
+
+
+# saved rows load back bit for bit, as properties, batches and from a memmap or from memory
+def test_catalogRoundTrip(tmp_path) -> None :
+    for point in [False, True] :
+        properties : List[FullProperty] = randomFullProperties(50, dimensions=3, point=point, seed=18).toProperties()
+        path : str = str(tmp_path / f"catalog{int(point)}")
+        saveCatalog(path, properties, chunkSize=16)
+        for mmap in [True, False] :
+            catalog : Catalog = loadCatalog(path, mmap)
+            assert (len(catalog), catalog.dimensions(), catalog.isFullProperty()) == (50, 3, True)
+            assert keys(catalog.getProperties()) == keys(properties)
+            assert np.array_equal(catalog.getBatch().getValues(), FullProperty.makeBatch(properties).getValues())
+            assert np.array_equal(catalog.getBatch([3, 1, 4]).getValues(), FullProperty.makeBatch([properties[i] for i in [3, 1, 4]]).getValues())
+            assert np.array_equal(np.concatenate([batch.getValues() for batch in catalog.iterBatches(16)], axis=1), catalog.getBatch().getValues())
+
+def test_valueCatalogRoundTrip(tmp_path) -> None :
+    values : List[ValueProperty] = [property.propertyX for property in randomFullProperties(20, seed=19).toProperties()]
+    catalog : Catalog = saveCatalog(str(tmp_path), values)
+    assert not catalog.isFullProperty()
+    assert [(value.baseValue, value.modifier.key()) for value in loadCatalog(str(tmp_path)).getProperties()] == [(value.baseValue, value.modifier.key()) for value in values]
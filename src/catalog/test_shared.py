@@ -0,0 +1,30 @@
+from typing import List
+import pickle
+import numpy as np
+
+from analyzer.listanalyzer import iterAnalyseIterv2
+from base.propertyClass import FullProperty, FullPropertyBatch
+from population.population import randomFullProperties
+from .shared import SharedCatalog, SharedCatalogHandle
+
+
+# the handle is all a task carries, the batch it attaches holds the same arrays read only
+def test_sharedBatch() -> None :
+    for point in [False, True] :
+        batch : FullPropertyBatch = randomFullProperties(30, point=point, seed=20)
+        with SharedCatalog(batch) as catalog :
+            handle : SharedCatalogHandle = pickle.loads(pickle.dumps(catalog.handle))
+            attached : FullPropertyBatch = handle.attach()
+            assert len(catalog) == len(batch)
+            assert np.array_equal(attached.getValues(), batch.getValues())
+            assert all([not column.baseValues.flags.writeable for column in attached.getProperties()])
+        assert catalog.memory is None
+
+# workers mixing on the shared block return the chunks of the pickled batch
+def test_sharedMatchesPickled() -> None :
+    for point in [False, True] :
+        properties : List[FullProperty] = randomFullProperties(4, point=point, seed=22).toProperties()
+        shared : List[np.ndarray] = list(iterAnalyseIterv2(properties, 10, chunkSize=64, workers=2, shared=True))
+        pickled : List[np.ndarray] = list(iterAnalyseIterv2(properties, 10, chunkSize=64, workers=2, shared=False))
+        assert len(shared) == len(pickled) > 1
+        assert all([np.array_equal(chunk, other) for chunk, other in zip(shared, pickled)])
@@ -1,9 +1,90 @@
 import math
-from typing import List, Sequence
-from base.tool import ClassLerp, PropertyModifier, lerpToWeightedMean, weightedMean
+import numpy as np
+from functools import lru_cache
+from typing import List, Optional, Sequence, Union
+from base.profiling import profiled
+from base.solver import monotoneSegments, solveSegments
+from base.tool import ClassLerp, Immutable, PropertyModifier, PropertyModifierBatch, lerpArrays, lerpToWeightedMean, normalizeWeights, weightedMean, weightedSumRows
 import random
 
-class CurveProperty(PropertyModifier):
+
+def curveTransform(
+        baseValues : np.ndarray,
+        logOffset : "float | np.ndarray",
+        offset : "float | np.ndarray",
+        period : "float | np.ndarray",
+        sinStrength : "float | np.ndarray",
+        coef : "float | np.ndarray",
+        power : "float | np.ndarray",
+        out : Optional[np.ndarray] = None
+    ) -> np.ndarray :
+    # same operations, in the same order, as CurveProperty.transformValue. Parameters broadcast against baseValues.
+    # Everything is evaluated in place in two work buffers (and out when given).
+    shape = np.broadcast_shapes(*[np.shape(value) for value in (baseValues, logOffset, offset, period, sinStrength, coef, power)])
+    dtype = np.result_type(baseValues, logOffset, offset, period, sinStrength, coef, power)
+
+    phase : np.ndarray = np.empty(shape, dtype)
+    np.add(logOffset, baseValues, out=phase)
+    np.log(phase, out=phase)
+    np.multiply(period, phase, out=phase)
+
+    pos : np.ndarray = np.add(offset + math.pi / 2, phase, out=np.empty(shape, dtype))
+    neg : np.ndarray = np.add(offset, phase, out=phase)
+    for work, workCoef in ((pos, coef), (neg, -coef)) :
+        np.sin(work, out=work)
+        np.multiply(sinStrength, work, out=work)
+        np.abs(work, out=work)
+        np.add(1, work, out=work)
+        np.divide(1, work, out=work)
+        np.power(work, power, out=work)
+        np.multiply(workCoef, work, out=work)
+
+    np.add(1, pos, out=pos)
+    np.add(pos, neg, out=pos)
+    return np.multiply(baseValues, pos, out=pos if out is None else out)
+
+SEGMENT_CACHE_SIZE : int = 256
+SEGMENT_MAX_POINTS : int = 1 << 20
+QUARTER_POINTS : int = 128 # grid points per quarter period of the sines
+KINK_STEPS : np.ndarray = 2.0 ** -np.arange(1, 25) # distances to the kinks, in quarter periods
+
+# Monotone segments of the curve over [lower, upper]. The sines turn with log(logOffset + baseValue): the grid is uniform
+# in that log with QUARTER_POINTS per quarter period, plus the kinks of the absolute values (a sine at 0) and points
+# closer and closer to them. The index is
+# shared between curves with the same parameters.
+@lru_cache(maxsize=SEGMENT_CACHE_SIZE)
+def curveSegments(params : tuple[float, ...], lower : float, upper : float) -> tuple[np.ndarray, np.ndarray] :
+    logOffset, offset, period = params[:3]
+    assert lower < upper, f"Error in curveSegments. Empty domain [{lower}, {upper}]."
+    assert logOffset + lower > 0, f"Error in curveSegments. The curve is not defined on [{lower}, {upper}]."
+
+    logLower, logUpper = math.log(logOffset + lower), math.log(logOffset + upper)
+    quarter : float = math.pi / 2 / abs(period) if period != 0 else math.inf
+    count : int = max(65, math.ceil((logUpper - logLower) / quarter * QUARTER_POINTS) + 1)
+    assert count <= SEGMENT_MAX_POINTS, f"Error in curveSegments. [{lower}, {upper}] needs more than {SEGMENT_MAX_POINTS} points."
+
+    logGrid : np.ndarray = np.linspace(logLower, logUpper, count)
+    if period != 0 :
+        kinks : np.ndarray = np.arange(math.ceil(2 * (min(period * logLower, period * logUpper) + offset) / math.pi), 
+                                       math.floor(2 * (max(period * logLower, period * logUpper) + offset) / math.pi) + 1)
+        # the cusps can hold narrow extrema next to them: the grid gets denser toward every kink
+        logKinks : np.ndarray = (kinks * math.pi / 2 - offset) / period
+        around : np.ndarray = quarter * KINK_STEPS
+        logGrid = np.unique(np.concatenate((logGrid, logKinks, (logKinks[:, np.newaxis] + np.concatenate((around, -around))).ravel())))
+        logGrid = logGrid[(logGrid >= logLower) & (logGrid <= logUpper)]
+    grid : np.ndarray = np.clip(np.exp(logGrid) - logOffset, lower, upper)
+    grid[0], grid[-1] = lower, upper
+
+    breaks, values = monotoneSegments(lambda x : curveTransform(x, *params), np.unique(grid))
+    breaks.flags.writeable = False
+    values.flags.writeable = False
+    return breaks, values
+
+
+class CurveProperty(Immutable, PropertyModifier):
+    __slots__ = ("logOffset", "offset", "period", "sinStrength", "coef", "power", "shiftedOffset")
+
+    @profiled()
     def __init__(self, 
             logOffset : float, 
             offset : float, 
@@ -12,30 +93,22 @@ class CurveProperty(PropertyModifier):
             coef : float, 
             power : float
         ) :
-        self.logOffset : float = logOffset
-
-        self.offset : float = offset
-        self.period : float = period
-        self.sinStrength : float = sinStrength
-
-        self.coef : float = coef
-        self.power : float = power
-
-        self.__makeFunc()
-
-    def __makeFunc(self) -> None:
-        def modifier(offset : float, coef : float) :
-            def ret(x : float):
-                ret =  math.log(self.logOffset + x)
-                ret = self.sinStrength * math.sin(offset + self.period * ret)
-                ret = 1+abs(ret)
-                return coef * (1/ret)**self.power
-            return ret
-        
-        pos = modifier(self.offset + math.pi / 2, self.coef)
-        neg = modifier(self.offset, - self.coef)
+        self.logOffset : float
+        self.offset : float
+        self.period : float
+        self.sinStrength : float
+        self.coef : float
+        self.power : float
+        self.shiftedOffset : float # phase of the positive part, cached
+        self.setMembers(
+            logOffset=logOffset, 
+            offset=offset, period=period, sinStrength=sinStrength, 
+            coef=coef, power=power, 
+            shiftedOffset=offset + math.pi / 2
+        )
 
-        self.func = lambda x : x * (1 + pos(x) + neg(x))
+    def key(self) -> tuple :
+        return (self.logOffset, self.offset, self.period, self.sinStrength, self.coef, self.power)
 
 
 
@@ -62,9 +135,24 @@ class CurveProperty(PropertyModifier):
         
 
     def transformValue(self, baseValue : float) -> float :
-        return self.func(baseValue)
+        ret = self.period * math.log(self.logOffset + baseValue)
+        pos = self.coef * (1 / (1 + abs(self.sinStrength * math.sin(self.shiftedOffset + ret))))**self.power
+        neg = -self.coef * (1 / (1 + abs(self.sinStrength * math.sin(self.offset + ret))))**self.power
+        return baseValue * (1 + pos + neg)
+
+    def transformValues(self, baseValues : np.ndarray) -> np.ndarray :
+        return curveTransform(
+            np.asarray(baseValues, dtype=float),
+            self.logOffset, self.offset, self.period, self.sinStrength, self.coef, self.power
+        )
     
 
+    # every baseValue of [lower, upper] mapped to each target. TabulatedCurveProperty solves on the exact curve.
+    def inverseValues(self, targets : Union[Sequence[float], np.ndarray], lower : float, upper : float) -> List[np.ndarray] :
+        params : tuple = CurveProperty.key(self)
+        breaks, values = curveSegments(params, lower, upper)
+        return solveSegments(lambda x : curveTransform(x, *params), breaks, values, np.asarray(targets, dtype=float))
+
     def quickPrint(self) :
         print(f"logStrength= {self.logOffset}")
         print(f"offset= {self.offset}")
@@ -83,6 +171,10 @@ class CurveProperty(PropertyModifier):
     def weightedMean(values : Sequence[ClassLerp], weights : List[float]) -> ClassLerp :
         return weightedMean(values, weights)
     
+    @staticmethod
+    def makeBatch(modifiers : Sequence[PropertyModifier], dtype : type = np.float64) -> "CurvePropertyBatch" :
+        return CurvePropertyBatch.fromProperties(modifiers, dtype)
+
     @staticmethod
     def rnd() :
         return CurveProperty(
@@ -93,5 +185,62 @@ class CurveProperty(PropertyModifier):
             math.sqrt(random.uniform(0, 5)),
             math.sqrt(random.uniform(0.5, 5)),
         )
-    
-    
\ No newline at end of file
+
+
+
+class CurvePropertyBatch(PropertyModifierBatch):
+    PARAMETERS : List[str] = ["logOffset", "offset", "period", "sinStrength", "coef", "power"]
+    # CurveProperty.rnd ranges, the rooted parameters are drawn as sqrt(uniform)
+    RND_LOWER : np.ndarray = np.array([0, 0, 0.1, 0, 0, 0.5])
+    RND_UPPER : np.ndarray = np.array([100, 2 * math.pi, 2.9, 50, 5, 5])
+    RND_ROOTED : np.ndarray = np.array([True, False, True, True, True, True])
+    UNIT_DIMENSIONS : int = 6
+
+    def __init__(self, params : np.ndarray, dtype : type = np.float64) :
+        self.params : np.ndarray = np.ascontiguousarray(params, dtype=dtype).reshape(-1, len(CurvePropertyBatch.PARAMETERS))
+
+    def __len__(self) -> int :
+        return len(self.params)
+
+    def __getitem__(self, index : int) -> CurveProperty :
+        return CurveProperty(*self.params[index].tolist())
+
+    def take(self, indices : Union[Sequence[int], np.ndarray]) -> "CurvePropertyBatch" :
+        return CurvePropertyBatch(self.params[np.asarray(indices)], self.params.dtype)
+
+    # one matrix product: it does not sum in the order of CurveProperty.weightedMean, the parameters are within
+    # len(self) * eps * max |parameter of the column| of the scalar mean (weightedMeanRows matches it exactly)
+    def weightedMean(self, weights : np.ndarray) -> "CurvePropertyBatch" :
+        weights = normalizeWeights(weights, len(self)).astype(self.params.dtype, copy=False)
+        return CurvePropertyBatch(weights @ self.params, self.params.dtype)
+
+    def weightedMeanRows(self, indices : np.ndarray, weights : np.ndarray) -> "CurvePropertyBatch" :
+        weights = normalizeWeights(weights, np.shape(indices)[1]).astype(self.params.dtype, copy=False)
+        return CurvePropertyBatch(weightedSumRows(weights, self.params[np.asarray(indices)]), self.params.dtype)
+
+    def lerp(self, other : PropertyModifierBatch, coefs : np.ndarray) -> "CurvePropertyBatch" :
+        assert isinstance(other, CurvePropertyBatch), "Error in CurvePropertyBatch lerp. other is not a CurvePropertyBatch."
+        return CurvePropertyBatch(lerpArrays(self.params, other.params, coefs), self.params.dtype)
+
+    def transformValues(self, baseValues : np.ndarray, out : Optional[np.ndarray] = None) -> np.ndarray :
+        # baseValues is (N,) with one value per curve or (N, K) with K values per curve
+        baseValues = np.asarray(baseValues, dtype=self.params.dtype)
+        assert len(baseValues) == len(self), f"Error in CurvePropertyBatch transformValues. length: {len(baseValues)} != {len(self)}."
+        columns = self.params.T if baseValues.ndim == 1 else self.params.T[:, :, np.newaxis]
+        return curveTransform(baseValues, *columns, out=out)
+
+    def toProperties(self) -> List[CurveProperty] :
+        return [CurveProperty(*params) for params in self.params.tolist()]
+
+    # CurveProperty.rnd for every row of unit (N, 6) samples of [0, 1)
+    @staticmethod
+    def fromUnit(unit : np.ndarray, dtype : type = np.float64) -> "CurvePropertyBatch" :
+        params : np.ndarray = CurvePropertyBatch.RND_LOWER + (CurvePropertyBatch.RND_UPPER - CurvePropertyBatch.RND_LOWER) * unit
+        return CurvePropertyBatch(np.where(CurvePropertyBatch.RND_ROOTED, np.sqrt(params), params), dtype)
+
+    @staticmethod
+    def fromProperties(properties : Sequence[PropertyModifier], dtype : type = np.float64) -> "CurvePropertyBatch" :
+        assert all([isinstance(value, CurveProperty) for value in properties]), "Error in CurvePropertyBatch fromProperties. Not all value are a CurveProperty."
+        curves : List[CurveProperty] = [value for value in properties if isinstance(value, CurveProperty)]
+        params = [[getattr(curve, name) for name in CurvePropertyBatch.PARAMETERS] for curve in curves]
+        return CurvePropertyBatch(np.array(params, dtype=dtype), dtype)
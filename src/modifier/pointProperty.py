@@ -1,6 +1,7 @@
-import copy
-from typing import List, Sequence, cast
-from base.tool import ClassLerp, Dist, PropertyModifier, SupportsLerp, lerpToWeightedMean, weightedMean, Iter
+import numpy as np
+from typing import Iterator, List, Optional, Sequence, Union, cast
+from base.profiling import profiled
+from base.tool import ClassLerp, Dist, Immutable, PropertyModifier, PropertyModifierBatch, SupportsLerp, broadcastCoefs, lerpToWeightedMean, normalizeWeights, weightedMean
 import random
 import math
 
@@ -11,10 +12,21 @@ def rnd_circle() -> tuple[float, float]:
     y = r * math.sin(theta)
     return x, y
 
-class Point2D(SupportsLerp):  
+# rnd_circle for arrays of unit samples: uniform points of the unit disk
+def unitCircle(angles : np.ndarray, radii : np.ndarray) -> np.ndarray :
+    theta : np.ndarray = 2 * math.pi * angles
+    r : np.ndarray = np.sqrt(radii)
+    return np.stack([r * np.cos(theta), r * np.sin(theta)], axis=-1)
+
+class Point2D(Immutable, SupportsLerp):  
+    __slots__ = ("x", "y")
+
+    @profiled()
     def __init__(self, x, y) :
-        self.x = x
-        self.y = y
+        self.setMembers(x=x, y=y)
+
+    def key(self) -> tuple :
+        return (self.x, self.y)
 
     def __neg__(self) -> "Point2D" :
         return Point2D(-self.x, -self.y)
@@ -42,19 +54,17 @@ class Point2D(SupportsLerp):
         else:
             raise TypeError("unsupported operand type(s)")  
 
-    def __iter__(self) -> Iter :
-        return Iter([self.x, self.y])
+    def __iter__(self) -> Iterator[float] :
+        return iter((self.x, self.y))
 
 
     def length(self) -> float :
         return Dist([self.x, self.y])
     
-    def normalize(self) -> None :
+    def normalize(self) -> "Point2D" :
         length = self.length()
-        if len == 0 : return
-        tmp = self / length
-        self.x = tmp.x
-        self.y = tmp.y
+        if length == 0 : return self
+        return self / length
 
     def quickString(self) -> str :
         return f"x= {self.x}, y= {self.y}"
@@ -88,11 +98,18 @@ class Point2D(SupportsLerp):
 
 
 
-class PointProperty(PropertyModifier):
+class PointProperty(Immutable, PropertyModifier):
+    __slots__ = ("coef", "center", "direction")
+
+    @profiled()
     def __init__(self, coef : float, center : Point2D, direction : Point2D) :
-        self.coef : float = coef
-        self.center : Point2D = center
-        self.direction : Point2D = direction
+        self.coef : float
+        self.center : Point2D
+        self.direction : Point2D
+        self.setMembers(coef=coef, center=center, direction=direction)
+
+    def key(self) -> tuple :
+        return (self.coef, self.center, self.direction)
 
     def __add__(self, other) -> "PointProperty" :
         return PointProperty(self.coef + other.coef, 
@@ -107,6 +124,18 @@ class PointProperty(PropertyModifier):
     def transformValue(self, baseValue : float) -> float :
         return baseValue * self.coef
 
+    def transformValues(self, baseValues : np.ndarray) -> np.ndarray :
+        return np.asarray(baseValues, dtype=float) * self.coef
+
+    # linear: a single baseValue per target, or all of them for the target 0 when coef is 0 (lower is returned)
+    def inverseValues(self, targets : Union[Sequence[float], np.ndarray], lower : float, upper : float) -> List[np.ndarray] :
+        assert lower < upper, f"Error in PointProperty inverseValues. Empty domain [{lower}, {upper}]."
+        targets = np.atleast_1d(np.asarray(targets, dtype=float))
+        solutions : np.ndarray = targets / self.coef if self.coef != 0 else np.where(targets == 0, lower, np.nan)
+        xtol : float = 1e-12 * max(1.0, abs(lower), abs(upper))
+        inside : np.ndarray = (solutions >= lower - xtol) & (solutions <= upper + xtol)
+        solutions = np.clip(solutions, lower, upper)
+        return [solutions[i:i + 1] if keep else np.zeros(0) for i, keep in enumerate(inside.tolist())]
         
     def getFinalPosition(self) -> Point2D:
         return self.center + self.direction
@@ -130,18 +159,19 @@ class PointProperty(PropertyModifier):
         valuesProperties : List[PointProperty] = [cast(PointProperty, value) for value in values]
 
         raw : PointProperty = weightedMean(valuesProperties, weights)
-        ret : PointProperty = copy.deepcopy(raw)
 
         lengths : List[float] = [value.length() for value in valuesProperties]
         dist : float = weightedMean(lengths, weights)
- 
-        ret.direction.normalize()
-        ret.direction = ret.direction * dist
-        
-        ret.coef *= 1 + (ret.getFinalPosition().y - raw.getFinalPosition().y)
+
+        direction : Point2D = raw.direction.normalize() * dist
+        final : Point2D = raw.center + direction
         
-        return ret
+        return PointProperty(raw.coef * (1 + (final.y - raw.getFinalPosition().y)), raw.center, direction)
     
+    @staticmethod
+    def makeBatch(modifiers : Sequence[PropertyModifier], dtype : type = np.float64) -> "PointPropertyBatch" :
+        return PointPropertyBatch.fromProperties(modifiers, dtype)
+
     @staticmethod
     def rnd_AutoCircle() -> "PointProperty":
         return PointProperty(
@@ -169,4 +199,111 @@ class PointProperty(PropertyModifier):
     @staticmethod
     def getPointMember(properties : List["PointProperty"], memberName : str) -> List[Point2D] : 
         points = [getattr(pointProperty, memberName) for pointProperty in properties]
-        return [cast(Point2D, point) for point in points]
\ No newline at end of file
+        return [cast(Point2D, point) for point in points]
+
+
+
+# PointProperty.weightedMean for M mixes at once. Every mix k has its own ingredients (coefs (A, K), centers and
+# directions (A, K, 2), A is 1 or M) and normalised weights (M, K). Sums run in the same order as the scalar version.
+def pointWeightedMean(
+        coefs : np.ndarray, 
+        centers : np.ndarray, 
+        directions : np.ndarray, 
+        weights : np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray] :
+    lengths : np.ndarray = np.sqrt(directions[..., 0] * directions[..., 0] + directions[..., 1] * directions[..., 1])
+
+    coef : np.ndarray = coefs[:, 0] * weights[:, 0]
+    center : np.ndarray = centers[:, 0] * weights[:, 0, np.newaxis]
+    direction : np.ndarray = directions[:, 0] * weights[:, 0, np.newaxis]
+    dist : np.ndarray = lengths[:, 0] * weights[:, 0]
+    for i in range(1, weights.shape[1]) :
+        coef = coef + coefs[:, i] * weights[:, i]
+        center = center + centers[:, i] * weights[:, i, np.newaxis]
+        direction = direction + directions[:, i] * weights[:, i, np.newaxis]
+        dist = dist + lengths[:, i] * weights[:, i]
+
+    length : np.ndarray = np.sqrt(direction[:, 0] * direction[:, 0] + direction[:, 1] * direction[:, 1])[:, np.newaxis]
+    normalized : np.ndarray = np.divide(direction, length, out=direction.copy(), where=length != 0)
+    normalized = normalized * dist[:, np.newaxis]
+
+    coef = coef * (1 + ((center[:, 1] + normalized[:, 1]) - (center[:, 1] + direction[:, 1])))
+    return coef, center, normalized
+
+
+
+class PointPropertyBatch(PropertyModifierBatch):
+    UNIT_DIMENSIONS : int = 5 # coef, then an (angle, radius) pair for the center and the direction
+
+    def __init__(self, coefs : np.ndarray, centers : np.ndarray, directions : np.ndarray, dtype : type = np.float64) :
+        self.coefs : np.ndarray = np.ascontiguousarray(coefs, dtype=dtype).reshape(-1)
+        self.centers : np.ndarray = np.ascontiguousarray(centers, dtype=dtype).reshape(-1, 2)
+        self.directions : np.ndarray = np.ascontiguousarray(directions, dtype=dtype).reshape(-1, 2)
+        assert len(self.coefs) == len(self.centers) == len(self.directions), "Error in PointPropertyBatch. Not all arrays are the same size."
+
+    def __len__(self) -> int :
+        return len(self.coefs)
+
+    def __getitem__(self, index : int) -> PointProperty :
+        return PointProperty(float(self.coefs[index]), Point2D(*self.centers[index].tolist()), Point2D(*self.directions[index].tolist()))
+
+    def take(self, indices : Union[Sequence[int], np.ndarray]) -> "PointPropertyBatch" :
+        indices = np.asarray(indices)
+        return PointPropertyBatch(self.coefs[indices], self.centers[indices], self.directions[indices], self.coefs.dtype)
+
+    def weightedMean(self, weights : np.ndarray) -> "PointPropertyBatch" :
+        weights = normalizeWeights(weights, len(self)) if len(self) > 1 else np.ones((len(np.atleast_2d(weights)), 1))
+        weights = weights.astype(self.coefs.dtype, copy=False)
+        mixed = pointWeightedMean(self.coefs[np.newaxis], self.centers[np.newaxis], self.directions[np.newaxis], weights)
+        return PointPropertyBatch(*mixed, dtype=self.coefs.dtype)
+
+    def weightedMeanRows(self, indices : np.ndarray, weights : np.ndarray) -> "PointPropertyBatch" :
+        indices = np.asarray(indices)
+        weights = normalizeWeights(weights, indices.shape[1]).astype(self.coefs.dtype, copy=False)
+        mixed = pointWeightedMean(self.coefs[indices], self.centers[indices], self.directions[indices], weights)
+        return PointPropertyBatch(*mixed, dtype=self.coefs.dtype)
+
+    def lerp(self, other : PropertyModifierBatch, coefs : np.ndarray) -> "PointPropertyBatch" :
+        assert isinstance(other, PointPropertyBatch), "Error in PointPropertyBatch lerp. other is not a PointPropertyBatch."
+        coefs = broadcastCoefs(len(self), len(other), coefs)
+        rows : np.ndarray = np.repeat(np.arange(len(coefs)), coefs.shape[1])
+        ends : List[tuple[PointPropertyBatch, np.ndarray]] = [(batch, rows if len(batch) == len(coefs) else np.zeros_like(rows)) for batch in (self, other)]
+        coefs = coefs.ravel()
+        pair = lambda member : np.stack([getattr(batch, member)[index] for batch, index in ends], axis=1)
+
+        weights : np.ndarray = normalizeWeights(np.stack([1 - coefs, coefs], axis=1), 2).astype(self.coefs.dtype, copy=False)
+        coef, center, direction = pointWeightedMean(pair("coefs"), pair("centers"), pair("directions"), weights)
+
+        # like lerpToWeightedMean, coef 0 and 1 are the untouched end points
+        for mask, (batch, index) in zip((coefs == 0, coefs == 1), ends) :
+            coef[mask] = batch.coefs[index[mask]]
+            center[mask] = batch.centers[index[mask]]
+            direction[mask] = batch.directions[index[mask]]
+        return PointPropertyBatch(coef, center, direction, self.coefs.dtype)
+
+    def transformValues(self, baseValues : np.ndarray) -> np.ndarray :
+        baseValues = np.asarray(baseValues, dtype=self.coefs.dtype)
+        assert len(baseValues) == len(self), f"Error in PointPropertyBatch transformValues. length: {len(baseValues)} != {len(self)}."
+        return baseValues * (self.coefs if baseValues.ndim == 1 else self.coefs[:, np.newaxis])
+
+    def getFinalPositions(self) -> np.ndarray :
+        return self.centers + self.directions
+
+    def toProperties(self) -> List[PointProperty] :
+        return [self[i] for i in range(len(self))]
+
+    # PointProperty.rnd_AutoCircle for every row of unit (N, 5) samples of [0, 1)
+    @staticmethod
+    def fromUnit(unit : np.ndarray, dtype : type = np.float64) -> "PointPropertyBatch" :
+        return PointPropertyBatch(1 + 99 * unit[:, 0], unitCircle(unit[:, 1], unit[:, 2]), unitCircle(unit[:, 3], unit[:, 4]), dtype)
+
+    @staticmethod
+    def fromProperties(properties : Sequence[PropertyModifier], dtype : type = np.float64) -> "PointPropertyBatch" :
+        assert all([isinstance(value, PointProperty) for value in properties]), "Error in PointPropertyBatch fromProperties. Not all value are PointProperty."
+        points : List[PointProperty] = [value for value in properties if isinstance(value, PointProperty)]
+        return PointPropertyBatch(
+            np.array([point.coef for point in points], dtype=dtype),
+            np.array([[point.center.x, point.center.y] for point in points], dtype=dtype),
+            np.array([[point.direction.x, point.direction.y] for point in points], dtype=dtype),
+            dtype
+        )
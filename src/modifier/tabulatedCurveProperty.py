@@ -0,0 +1,131 @@
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, Sequence, cast
+import numpy as np
+from .curveProperty import CurveProperty, curveTransform
+
+TABLE_CACHE_SIZE : int = 256
+TABLE_MAX_POINTS : int = 1 << 21
+PROBES : np.ndarray = np.arange(1, 8) / 8 # interpolation error is checked at these fractions of every interval
+CHECK_PROBES : np.ndarray = np.arange(1, 64) / 64
+
+
+def interpolationError(grid : np.ndarray, values : np.ndarray, params : tuple[float, ...], probes : np.ndarray) -> np.ndarray :
+    points : np.ndarray = grid[:-1, np.newaxis] + np.diff(grid)[:, np.newaxis] * probes
+    return np.abs(np.interp(points, grid, values) - curveTransform(points, *params)).max(axis=1)
+
+class CurveTable :
+    __slots__ = ("grid", "values", "gridList", "valuesList", "scale", "bucketStart")
+
+    def __init__(self, grid : np.ndarray, values : np.ndarray, lower : float, upper : float) -> None :
+        grid.flags.writeable = False
+        values.flags.writeable = False
+        self.grid : np.ndarray = grid
+        self.values : np.ndarray = values
+        self.gridList : tuple[float, ...] = tuple(grid.tolist()) # the scalar path reads Python floats, read-only like the arrays
+        self.valuesList : tuple[float, ...] = tuple(values.tolist())
+
+        # uniform buckets over the domain, each one knows the first grid interval it overlaps
+        self.scale : float = len(grid) / (upper - lower)
+        buckets : np.ndarray = lower + np.arange(len(grid) + 2) / self.scale
+        self.bucketStart : tuple[int, ...] = tuple(np.clip(np.searchsorted(grid, buckets, side="right"), 1, len(grid) - 1).tolist())
+
+
+# Adaptive grid over [lower, upper]: intervals are split in two until the linear interpolation is within
+# maxError / 2 of the exact curve on every probe, then the table is checked against maxError on denser probes.
+# Tables, with their lists and bucket index, are shared between curves with the same parameters.
+@lru_cache(maxsize=TABLE_CACHE_SIZE)
+def curveTable(params : tuple[float, ...], lower : float, upper : float, maxError : float) -> CurveTable :
+    grid : np.ndarray = np.linspace(lower, upper, 65)
+    while True :
+        values : np.ndarray = curveTransform(grid, *params)
+        bad : np.ndarray = np.flatnonzero(interpolationError(grid, values, params, PROBES) > maxError / 2)
+        if len(bad) == 0 :
+            bad = np.flatnonzero(interpolationError(grid, values, params, CHECK_PROBES) > maxError)
+        if len(bad) == 0 : break
+
+        assert len(grid) + len(bad) <= TABLE_MAX_POINTS, f"Error in curveTable. maxError {maxError} needs more than {TABLE_MAX_POINTS} points."
+        grid = np.sort(np.concatenate((grid, (grid[bad] + grid[bad + 1]) / 2)))
+
+    return CurveTable(grid, values, lower, upper)
+
+
+class TabulatedCurveProperty(CurveProperty):
+    __slots__ = ("lower", "upper", "maxError", "grid", "values", "gridList", "valuesList", "scale", "bucketStart")
+
+    def __init__(self, 
+            logOffset : float, 
+            offset : float, 
+            period : float, 
+            sinStrength : float, 
+            coef : float, 
+            power : float,
+            lower : float,
+            upper : float,
+            maxError : float = 1e-6
+        ) :
+        super().__init__(logOffset, offset, period, sinStrength, coef, power)
+        assert lower < upper, f"Error in TabulatedCurveProperty. Empty domain [{lower}, {upper}]."
+        assert logOffset + lower > 0, f"Error in TabulatedCurveProperty. The curve is not defined on [{lower}, {upper}]."
+        assert maxError > 0, "Error in TabulatedCurveProperty. maxError must be over 0."
+        self.lower : float
+        self.upper : float
+        self.maxError : float
+        self.grid : np.ndarray
+        self.values : np.ndarray
+        self.gridList : tuple[float, ...]
+        self.valuesList : tuple[float, ...]
+        self.scale : float
+        self.bucketStart : tuple[int, ...]
+
+        table : CurveTable = curveTable((logOffset, offset, period, sinStrength, coef, power), lower, upper, maxError)
+        self.setMembers(
+            lower=lower, upper=upper, maxError=maxError, 
+            grid=table.grid, values=table.values, gridList=table.gridList, valuesList=table.valuesList, 
+            scale=table.scale, bucketStart=table.bucketStart
+        )
+
+    def key(self) -> tuple :
+        return super().key() + (self.lower, self.upper, self.maxError)
+
+    def transformValue(self, baseValue : float) -> float :
+        if not (self.lower <= baseValue <= self.upper) :
+            return super().transformValue(baseValue)
+
+        bucket : int = int((baseValue - self.lower) * self.scale)
+        grid : tuple[float, ...] = self.gridList
+        i : int = min(bisect_right(grid, baseValue, self.bucketStart[bucket], self.bucketStart[bucket + 1] + 1), len(grid) - 1)
+        x0, x1 = grid[i - 1], grid[i]
+        y0, y1 = self.valuesList[i - 1], self.valuesList[i]
+        return y0 + (y1 - y0) * (baseValue - x0) / (x1 - x0)
+
+    def transformValues(self, baseValues : np.ndarray) -> np.ndarray :
+        shape : tuple = np.shape(baseValues)
+        baseValues = np.atleast_1d(np.asarray(baseValues, dtype=float)) # np.interp gives a scalar for 0-d inputs
+        ret : np.ndarray = np.interp(baseValues, self.grid, self.values)
+        outside : np.ndarray = (baseValues < self.lower) | (baseValues > self.upper)
+        if outside.any() :
+            ret[outside] = super().transformValues(baseValues[outside])
+        return ret.reshape(shape)
+
+    def quickPrint(self) :
+        super().quickPrint()
+        print(f"table= [{self.lower}, {self.upper}], {len(self.grid)} points, maxError= {self.maxError}")
+
+    # Mixes (lerp, weightedMean, __add__, __mul__ are inherited) are plain curves: refining a table for every mix costs
+    # far more than the few transforms a mix gets. tabulatedMean is the opt-in for a mix transformed many times, it is
+    # tabulated on the domain its tabulated inputs share with their finest maxError (a plain curve without one).
+    @staticmethod
+    def tabulatedMean(values : Sequence[CurveProperty], weights : List[float]) -> CurveProperty :
+        mean : CurveProperty = cast(CurveProperty, CurveProperty.weightedMean(values, weights))
+        tables : List[TabulatedCurveProperty] = [value for value in values if isinstance(value, TabulatedCurveProperty)]
+        if isinstance(mean, TabulatedCurveProperty) or len(tables) == 0 : return mean
+
+        lower : float = max([table.lower for table in tables])
+        upper : float = min([table.upper for table in tables])
+        if lower >= upper : return mean
+        return TabulatedCurveProperty.fromCurve(mean, lower, upper, min([table.maxError for table in tables]))
+
+    @staticmethod
+    def fromCurve(curve : CurveProperty, lower : float, upper : float, maxError : float = 1e-6) -> "TabulatedCurveProperty" :
+        return TabulatedCurveProperty(curve.logOffset, curve.offset, curve.period, curve.sinStrength, curve.coef, curve.power, lower, upper, maxError)
@@ -0,0 +1,53 @@
+from typing import List
+import random
+import numpy as np
+
+from .curveProperty import CurveProperty, CurvePropertyBatch
+
+EPS : float = float(np.finfo(np.float64).eps)
+
+
+def scalarMeans(curves : List[CurveProperty], weights : np.ndarray) -> np.ndarray :
+    return np.array([CurveProperty.weightedMean(curves, row.tolist()).key() for row in weights])
+
+# the matrix product sums in another order than the scalar mean: its documented tolerance
+def test_batchWeightedMeanTolerance() -> None :
+    random.seed(0)
+    for count in range(1, 13) :
+        curves : List[CurveProperty] = [CurveProperty.rnd() for _ in range(count)]
+        batch : CurvePropertyBatch = CurveProperty.makeBatch(curves)
+        weights : np.ndarray = np.random.default_rng(count).uniform(size=(50, count))
+        tolerance : np.ndarray = count * EPS * np.abs(batch.params).max(axis=0)
+        assert (np.abs(batch.weightedMean(weights).params - scalarMeans(curves, weights)) <= tolerance).all()
+
+def test_batchWeightedMeanRowsExact() -> None :
+    random.seed(1)
+    curves : List[CurveProperty] = [CurveProperty.rnd() for _ in range(8)]
+    rng : np.random.Generator = np.random.default_rng(1)
+    indices : np.ndarray = np.array([rng.permutation(8)[:3] for _ in range(50)])
+    weights : np.ndarray = rng.uniform(size=(50, 3))
+    expected : np.ndarray = np.array([CurveProperty.weightedMean([curves[i] for i in row], weight.tolist()).key() for row, weight in zip(indices.tolist(), weights)])
+    assert np.array_equal(CurveProperty.makeBatch(curves).weightedMeanRows(indices, weights).params, expected)
+
+def test_batchLerpAndTransform() -> None :
+    random.seed(2)
+    curve0, curve1 = CurveProperty.rnd(), CurveProperty.rnd()
+    coefs : List[float] = [0, 0.25, 0.5, 1]
+    lerped : CurvePropertyBatch = CurveProperty.makeBatch([curve0]).lerp(CurveProperty.makeBatch([curve1]), np.array([coefs]))
+    expected : np.ndarray = np.array([CurveProperty.lerp(curve0, curve1, coef).key() for coef in coefs])
+    assert np.allclose(lerped.params, expected, rtol=4 * EPS, atol=0)
+
+    x : np.ndarray = np.linspace(0, 1000, 101)
+    assert np.allclose(curve0.transformValues(x), [curve0.transformValue(value) for value in x.tolist()], rtol=1e-14, atol=1e-12)
+
+# every root maps back to its target, and each sign change on a fine grid holds one of them
+def test_inverseValues() -> None :
+    random.seed(3)
+    grid : np.ndarray = np.linspace(1, 100, 200_001)
+    for _ in range(20) :
+        curve : CurveProperty = CurveProperty.rnd()
+        values : np.ndarray = curve.transformValues(grid)
+        targets : np.ndarray = np.quantile(values, [0.1, 0.37, 0.5, 0.81])
+        for target, roots in zip(targets.tolist(), curve.inverseValues(targets, 1, 100)) :
+            assert np.allclose(curve.transformValues(roots), target, rtol=1e-9, atol=0)
+            assert len(roots) == np.count_nonzero(np.diff(values > target))
@@ -1,14 +1,28 @@
-from typing import List
+from __future__ import annotations
+from typing import Iterable, List, Optional
 import numpy as np
-import plotly.express as px
-from analyzer.analyzer import mappingToPercent, mergeAnalyse, T
+from base.lazy import lazyImport
+from analyzer.analyzer import mappingToPercent, marginalMapping, mergeAnalyse, T
+from base.propertyClass import propertyName
+from .figure import showFigure
 from analyzer.listanalyzer import FullAnalyzerResult, ListAnalyzerResult, Centile
 
-def displayMapping(mapping : dict[tuple[int, int], T], name : str) -> None :
+px = lazyImport("plotly.express")
+go = lazyImport("plotly.graph_objects")
+
+# mappings over more than 2 dimensions are shown on the pair of dimensions given
+def displayMapping(
+        mapping : dict[tuple[int, ...], T], 
+        name : str, 
+        dimensions : tuple[int, int] = (0, 1), 
+        show : bool = True, 
+        labels : Optional[tuple[str, str]] = None
+    ) -> go.Figure :
     coords : list[int] = [-1, 0, 1]
+    labels = labels if labels is not None else (propertyName(dimensions[0]), propertyName(dimensions[1]))
 
     grid = np.full((3, 3), -100, dtype=float)
-    for (i, j), value in zip(mapping.keys(), mapping.values()):
+    for (i, j), value in marginalMapping(mapping, dimensions).items():
         grid[j+1, i + 1] = value
 
     fig = px.imshow(
@@ -16,7 +30,7 @@ def displayMapping(mapping : dict[tuple[int, int], T], name : str) -> None :
         x=coords,
         y=list(reversed(coords)),
         color_continuous_scale="RdBu",
-        labels={'x': 'PropertyX', 'y': 'PropertyY', 'color': 'Appearance'},
+        labels={'x': labels[0], 'y': labels[1], 'color': 'Appearance'},
         title=f"mapping of the appearance of out of bound value of {name} in %.",
         color_continuous_midpoint=0,
         zmin=-100,
@@ -25,33 +39,42 @@ def displayMapping(mapping : dict[tuple[int, int], T], name : str) -> None :
 
     fig.update_xaxes(tickmode="array", tickvals=coords, ticktext=[str(c) for c in coords])
     fig.update_yaxes(tickmode="array", tickvals=list(reversed(coords)), ticktext=[str(c) for c in coords], scaleanchor="x")
-    fig.show()
+    return showFigure(fig, show)
 
-def displayAppearanceMapping(mapping : dict[tuple[int, int], int], name : str) -> None :
+def displayAppearanceMapping(mapping : dict[tuple[int, ...], int], name : str, dimensions : tuple[int, int] = (0, 1), show : bool = True) -> List[go.Figure] :
     mappingpercent = mappingToPercent(mapping)
-    displayMapping(mappingpercent, name)
+    fig = displayMapping(mappingpercent, name, dimensions, show)
 
-    mappingpercent = mergeAnalyse(mappingpercent)
-    displayMapping(mappingpercent, f"merged {name}")
+    # projected on the pair first: merging sorts the whole key, the pair would be read from the sorted N-D location
+    merged = mergeAnalyse(marginalMapping(mappingpercent, dimensions))
+    return [fig, displayMapping(merged, f"merged {name}", (0, 1), show, labels=(propertyName(dimensions[0]), propertyName(dimensions[1])))]
 
 
-def displayFullAnalyzerResultProperty(propertyResult : List[Centile]) -> None :
+def displayFullAnalyzerResultProperty(propertyResult : List[Centile], show : bool = True) -> go.Figure :
     x = list(range(101)) * len(propertyResult)
     y : list[float] = [val for centile in propertyResult for val in centile.centiles]
     color : list[int] = [(id + 1) for id, centile in enumerate(propertyResult) for val in centile.centiles]
 
     fig = px.line(x=x, y=y, color=color)
-    fig.show()
+    return showFigure(fig, show)
 
-def displayFullAnalyzerResult(result : FullAnalyzerResult) -> None :
+def displayFullAnalyzerResult(result : FullAnalyzerResult, show : bool = True) -> List[go.Figure] :
     values : List[List[Centile]] = [comb.valuePropertyCentiles for comb in result.combinaison]
     values = [list(val) for val in zip(*values)]
-    [displayFullAnalyzerResultProperty(val) for val in values]
+    return [displayFullAnalyzerResultProperty(val, show) for val in values]
+
+
+def displayFullAnalyzerResultMap(result : List[tuple], show : bool = True) -> go.Figure :
+    x, id = [row[0] for row in result], [row[-1] for row in result]
+    return displayFullAnalyzerResultMapValues(np.array(x), np.array(id), show)
 
+# chunks from analyseIterv2 chunks (iterAnalyseIterv2, loadChunks), only x and count are gathered
+def displayFullAnalyzerResultMapChunks(chunks : Iterable[np.ndarray], show : bool = True) -> go.Figure :
+    x, id = map(np.concatenate, zip(*[(np.asarray(chunk["x"]), np.asarray(chunk["count"])) for chunk in chunks]))
+    return displayFullAnalyzerResultMapValues(x, id, show)
 
-def displayFullAnalyzerResultMap(result : List[tuple[float, float, int]]) -> None :
-    x, y, id = map(list, zip(*result))
-    id_str = [str(v) for v in id]
+def displayFullAnalyzerResultMapValues(x : np.ndarray, id : np.ndarray, show : bool = True) -> go.Figure :
+    id_str = id.astype(str)
 
     # fig = px.scatter(x=x, y=y, color=id_str, size_max=0.01)
     # fig.show()
@@ -63,4 +86,4 @@ def displayFullAnalyzerResultMap(result : List[tuple[float, float, int]]) -> Non
         box=True,
     )
     fig.update_traces(spanmode="hard")
-    fig.show()
\ No newline at end of file
+    return showFigure(fig, show)
\ No newline at end of file
@@ -0,0 +1,18 @@
+from __future__ import annotations
+from typing import List, Union
+from base.lazy import lazyImport
+
+go = lazyImport("plotly.graph_objects")
+
+Figures = Union["go.Figure", List["go.Figure"]]
+
+# every display function ends here: the figure is shown in a notebook (show=True) and returned for reports
+def showFigure(fig : go.Figure, show : bool = True) -> go.Figure :
+    if show :
+        fig.show()
+    return fig
+
+def flattenFigures(figures : Figures) -> List[go.Figure] :
+    if isinstance(figures, go.Figure) :
+        return [figures]
+    return [fig for figure in figures for fig in flattenFigures(figure)]
@@ -1,85 +1,80 @@
-from typing import List
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import plotly.colors as pc
+from __future__ import annotations
+from typing import Any, List, Optional, Union
+import numpy as np
 
-from analyzer.analyzer import analyseOutOfBoundFullProperty
+from base.lazy import lazyImport
+from analyzer.analyzer import analyseOutOfBoundValues
 from .analyzer_helper import displayAppearanceMapping
 from base.propertyClass import FullProperty, ValueProperty
-from base.tool import PropertyModifier, easyLerp, transformValue
+from base.tool import PropertyModifier, transformValues
+from .figure import showFigure
+from .sampling import PIXEL_TOLERANCE, sampleModifier, sampleValuePropertyLerp
 
+px = lazyImport("plotly.express")
+go = lazyImport("plotly.graph_objects")
+pc = lazyImport("plotly.colors")
 
 
-def DisplayLineWithSimpleLerp(x : List[float], y : List[float], fullName : str, lineName : str) -> None :
+
+def DisplayLineWithSimpleLerp(x : Union[List[float], np.ndarray], y : Union[List[float], np.ndarray], fullName : str, lineName : str, show : bool = True) -> go.Figure :
     assert len(x) == len(y), f"Error in DisplayLineWithSimpleLerp. Not all list are the same length: {len(x)} != {len(y)}."
-    x = x.copy()
-    y = y.copy()
-
-    colorMap : dict[str, str] = {
-        lineName        : "blue",
-        "linear"        : "red",
-        "bound_begin"   : "green",
-        "bound_end"     : "orange"
-    }
-
-    lineTypeMap : dict[str, str] = {
-        lineName        : "solid",
-        "linear"        : "dashdot",
-        "bound_begin"   : "dot",
-        "bound_end"     : "dot"
-    }
-    
-    lineType : List[str] = []
-    [lineType.append(lineName) for _ in x]
 
     minVal = x[0],  y[0]
     maxVal = x[-1], y[-1]
 
-    def append(colorName : str, xValue : float, yValue : float) :
-        lineType.append(colorName)
-        x.append(xValue)
-        y.append(yValue)
-
-    append("linear",        minVal[0], minVal[1])
-    append("linear",        maxVal[0], maxVal[1])
-
-    append("bound_begin",   minVal[0], minVal[1])
-    append("bound_begin",   maxVal[0], minVal[1])
-
-    append("bound_end",     minVal[0], maxVal[1])
-    append("bound_end",     maxVal[0], maxVal[1])
-
-
-    df = pd.DataFrame({"x": x, "y": y, "lineType": lineType})
-
-    fig = px.line(
-        df, x="x", y="y", color="lineType", line_dash="lineType",
-        color_discrete_map=colorMap,
-        line_dash_map=lineTypeMap,
-        title=fullName
-    )
-
-    fig.show()
-
+    # (name, color, dash, x, y), the arrays are given to plotly as they are
+    lines : List[tuple[str, str, str, Any, Any]] = [
+        (lineName,      "blue",     "solid",    x,                          y),
+        ("linear",      "red",      "dashdot",  [minVal[0], maxVal[0]],     [minVal[1], maxVal[1]]),
+        ("bound_begin", "green",    "dot",      [minVal[0], maxVal[0]],     [minVal[1], minVal[1]]),
+        ("bound_end",   "orange",   "dot",      [minVal[0], maxVal[0]],     [maxVal[1], maxVal[1]]),
+    ]
 
-def DisplayPropertyModifier(x : List[float], propertymodifier : PropertyModifier, name : str, doPrint : bool = False) -> None :
+    fig = go.Figure([
+        go.Scatter(x=lineX, y=lineY, mode="lines", name=name, line=dict(color=color, dash=dash))
+        for name, color, dash, lineX, lineY in lines
+    ])
+    fig.update_layout(title=fullName, xaxis_title="x", yaxis_title="y", legend_title_text="lineType")
+    return showFigure(fig, show)
+
+
+# with a tolerance (in pixels) the modifier is sampled adaptively between x[0] and x[-1] instead of on x
+def DisplayPropertyModifier(
+        x : List[float], 
+        propertymodifier : PropertyModifier, 
+        name : str, 
+        doPrint : bool = False, 
+        tolerance : Optional[float] = PIXEL_TOLERANCE,
+        show : bool = True
+    ) -> go.Figure :
     if doPrint :
         propertymodifier.quickPrint()
 
-    y = transformValue(propertymodifier, x)
-    DisplayLineWithSimpleLerp(x, y, f"property modifier: {name}", name)
+    if tolerance is None :
+        return DisplayLineWithSimpleLerp(x, transformValues(propertymodifier, x), f"property modifier: {name}", name, show)
+    return DisplayLineWithSimpleLerp(*sampleModifier(propertymodifier, x[0], x[-1], tolerance), f"property modifier: {name}", name, show)
 
 
-def DisplayValuePropertyLerp(x : List[float], property0 : ValueProperty, property1 : ValueProperty, name : str) -> None :
-    lerped : List[ValueProperty] = easyLerp(property0, property1, x)
-    realValues : List[float] =  ValueProperty.transformValues(lerped)
-    DisplayLineWithSimpleLerp(x, realValues, f"graph of lerp of transfomed value from value property:  {name}", name)
+def DisplayValuePropertyLerp(
+        x : List[float], 
+        property0 : ValueProperty, 
+        property1 : ValueProperty, 
+        name : str, 
+        tolerance : Optional[float] = PIXEL_TOLERANCE,
+        show : bool = True
+    ) -> go.Figure :
+    title : str = f"graph of lerp of transfomed value from value property:  {name}"
+    if tolerance is None :
+        return DisplayLineWithSimpleLerp(x, ValueProperty.lerpMany(property0, property1, x).values, title, name, show)
+    return DisplayLineWithSimpleLerp(*sampleValuePropertyLerp(property0, property1, tolerance, lower=x[0], upper=x[-1]), title, name, show)
 
 
-def displayFullProperty(values : List[float], properties : List[FullProperty], name : str) -> None : 
+def displayFullProperty(values : List[float], properties : List[FullProperty], name : str, show : bool = True) -> go.Figure : 
     x, y = FullProperty.getValuesXY(properties)
+    return displayFullPropertyValues(values, x, y, name, show)
+
 
+def displayFullPropertyValues(values : List[float], x : List[float], y : List[float], name : str, show : bool = True) -> go.Figure : 
     fig = px.scatter(x=x, y=y, title=name, color=values, color_continuous_scale="Viridis")
     fig.add_trace(go.Scatter(
         x=[0],
@@ -89,17 +84,18 @@ def displayFullProperty(values : List[float], properties : List[FullProperty], n
         name="Origine",
         showlegend=False
     ))
-    fig.show()
+    return showFigure(fig, show)
 
 
-def MakeFullPropertyExample(iterator : List[float], property0 : FullProperty, property1 : FullProperty) -> None :
-    lerped = easyLerp(property0, property1, iterator)
-    displayFullProperty(iterator, lerped, "lerped")
+def MakeFullPropertyExample(iterator : List[float], property0 : FullProperty, property1 : FullProperty, name : str = "example", show : bool = True) -> List[go.Figure] :
+    lerped = FullProperty.lerpMany(property0, property1, iterator)
+    x, y = lerped.getValuesXY()
+    figures : List[go.Figure] = [displayFullPropertyValues(iterator, x.tolist(), y.tolist(), "lerped", show)]
 
-    [DisplayValuePropertyLerp(iterator, subProperty0, subProperty1, name) 
-        for (subProperty0, name), subProperty1 
+    figures += [DisplayValuePropertyLerp(iterator, subProperty0, subProperty1, subName, show=show) 
+        for (subProperty0, subName), subProperty1 
         in zip(property0.getNamedProperties(), property1.getProperties())
     ]
 
-    mapping : dict[tuple[int, int], int] = analyseOutOfBoundFullProperty(lerped, property0, property1)
-    displayAppearanceMapping(mapping, "example")
\ No newline at end of file
+    mapping : dict[tuple[int, ...], int] = analyseOutOfBoundValues(lerped.values, *lerped.getBounds())
+    return figures + displayAppearanceMapping(mapping, name, show=show)
\ No newline at end of file
@@ -1,9 +1,14 @@
-from typing import List, cast
-import plotly.express as px
-import plotly.graph_objects as go
-import plotly.colors as pc
+from __future__ import annotations
+from typing import List
+import numpy as np
+from base.lazy import lazyImport
+from .figure import showFigure
 from .helper import DisplayLineWithSimpleLerp
-from modifier.pointProperty import Point2D, PointProperty
+from modifier.pointProperty import Point2D, PointProperty, PointPropertyBatch
+
+px = lazyImport("plotly.express")
+go = lazyImport("plotly.graph_objects")
+pc = lazyImport("plotly.colors")
 
 def mergePointsAndMakeColors(
     centers : List[Point2D], 
@@ -19,9 +24,12 @@ def mergePointsAndMakeColors(
 
 
 
-def displayPoint2D(points : List[Point2D], colorsIndex : List[str], colors : List[str]) -> None :
+def displayPoint2D(points : List[Point2D], colorsIndex : List[str], colors : List[str], show : bool = True) -> go.Figure :
     x, y = Point2D.splitSimplePoints(points)
-    useUnitCircle : bool = all([point.length() <= 1.2 for point in points])
+    return displayPoint2DValues(x, y, colorsIndex, colors, show)
+
+def displayPoint2DValues(x : List[float], y : List[float], colorsIndex : List[str], colors : List[str], show : bool = True) -> go.Figure :
+    useUnitCircle : bool = bool(np.all(np.hypot(x, y) <= 1.2))
 
     if len(colors) != 0 :
         if len(colorsIndex) == 0 :
@@ -46,27 +54,37 @@ def displayPoint2D(points : List[Point2D], colorsIndex : List[str], colors : Lis
             line=dict(color=pc.sequential.Greys[5], width=2)
         )
     
-    fig.show()
+    return showFigure(fig, show)
 
-def displayPointsProperty(property0 : PointProperty, property1 : PointProperty, x : List[float], name : str) -> None :
-    pointProperties : list[PointProperty] = [cast(PointProperty, PointProperty.lerp(property0, property1, x_)) for x_ in x]
-    centers, directions, finals, coefs = PointProperty.scatter(pointProperties)
+def displayPointsProperty(property0 : PointProperty, property1 : PointProperty, x : List[float], name : str, show : bool = True) -> List[go.Figure] :
+    lerped : PointPropertyBatch = PointPropertyBatch.fromProperties([property0]).lerp(PointPropertyBatch.fromProperties([property1]), x)
+    centers, directions, finals = lerped.centers, lerped.directions, lerped.getFinalPositions()
 
-    points, colorsIndex, colors = mergePointsAndMakeColors(centers, directions, finals)
-    displayPoint2D(points, colorsIndex, colors)
+    points : np.ndarray = np.concatenate([centers, directions, finals])
+    colorsIndex : List[str] = ["centers"] * len(centers) + ["directions"] * len(directions) + ["finals"] * len(finals)
+    colors : List[str] = [px.colors.qualitative.Plotly[1], px.colors.qualitative.Plotly[2], px.colors.qualitative.Plotly[3]]
+    figures : List[go.Figure] = [displayPoint2DValues(points[:, 0].tolist(), points[:, 1].tolist(), colorsIndex, colors, show)]
 
-    #displayPointsPropertyProjection(x, centers, f"centers of {name}")
-    displayPointsPropertyProjection(x, directions, f"directions of {name}")
-    displayPointsPropertyProjection(x, finals, f"finals of {name}")
-    DisplayLineWithSimpleLerp(x, coefs, f"coefs of {name}", name)
+    #displayPointsPropertyProjectionValues(x, centers, f"centers of {name}")
+    figures += displayPointsPropertyProjectionValues(x, directions, f"directions of {name}", show)
+    figures += displayPointsPropertyProjectionValues(x, finals, f"finals of {name}", show)
+    return figures + [DisplayLineWithSimpleLerp(x, lerped.coefs, f"coefs of {name}", name, show)]
 
 
-def displayPointsPropertyProjection(x : List[float], points : List[Point2D], name : str) -> None :
+def displayPointsPropertyProjection(x : List[float], points : List[Point2D], name : str, show : bool = True) -> List[go.Figure] :
     x_, y_ = Point2D.splitSimplePoints(points)
     
-    DisplayLineWithSimpleLerp(x, x_, f"x value of {name}", name)
-    DisplayLineWithSimpleLerp(x, y_, f"y value of {name}", name)
+    return [
+        DisplayLineWithSimpleLerp(x, x_, f"x value of {name}", name, show),
+        DisplayLineWithSimpleLerp(x, y_, f"y value of {name}", name, show),
+    ]
+
+def displayPointsPropertyProjectionValues(x : List[float], points : np.ndarray, name : str, show : bool = True) -> List[go.Figure] :
+    return [
+        DisplayLineWithSimpleLerp(x, points[:, 0], f"x value of {name}", name, show),
+        DisplayLineWithSimpleLerp(x, points[:, 1], f"y value of {name}", name, show),
+    ]
 
-def displayPointsPropertyProjectionWithName(x : List[float], properties : List[PointProperty], memberName : str, name : str) -> None :
+def displayPointsPropertyProjectionWithName(x : List[float], properties : List[PointProperty], memberName : str, name : str, show : bool = True) -> List[go.Figure] :
     points : List[Point2D] = PointProperty.getPointMember(properties, memberName)
-    displayPointsPropertyProjection(x, points, name)
\ No newline at end of file
+    return displayPointsPropertyProjection(x, points, name, show)
\ No newline at end of file
@@ -0,0 +1,114 @@
+from __future__ import annotations
+from typing import Any, Callable, List, Optional, Sequence
+from concurrent.futures import Executor
+import html
+import os
+
+from base.lazy import lazyImport
+from analyzer.analyzer import analyseOneFullProperty
+from analyzer.listanalyzer import analyzeProperties
+from analyzer.parallel import chunkCount, mapChunks, splitChunks
+from base.propertyClass import FullProperty
+from .analyzer_helper import displayAppearanceMapping, displayFullAnalyzerResult
+from .figure import Figures, flattenFigures
+from .helper import MakeFullPropertyExample
+
+go = lazyImport("plotly.graph_objects")
+offline = lazyImport("plotly.offline")
+
+# A section is a display function called with show=False in a worker: its figures are turned into HTML there, only
+# text comes back. function must be a module level function so the section can be sent to a process pool.
+
+class ReportSection :
+    def __init__(self, title : str, function : Callable[..., Figures], *args : Any, **kwargs : Any) -> None :
+        self.title : str = title
+        self.function : Callable[..., Figures] = function
+        self.args : tuple = args
+        self.kwargs : dict = kwargs
+
+    def figures(self) -> List[go.Figure] :
+        return flattenFigures(self.function(*self.args, show=False, **self.kwargs))
+
+    def render(self) -> str :
+        fragments : List[str] = [fig.to_html(full_html=False, include_plotlyjs=False) for fig in self.figures()]
+        return f"<section>\n<h2>{html.escape(self.title)}</h2>\n" + "\n".join(fragments) + "\n</section>"
+
+
+class Report :
+    def __init__(self, path : str, title : str, sections : Sequence[ReportSection]) -> None :
+        self.path : str = path
+        self.title : str = title
+        self.sections : List[ReportSection] = list(sections)
+
+    # plotly.js is inlined once in the head, the page works offline
+    def toHtml(self, renderedSections : Sequence[str]) -> str :
+        return "\n".join([
+            "<!DOCTYPE html>",
+            "<html>",
+            "<head>",
+            '<meta charset="utf-8">',
+            f"<title>{html.escape(self.title)}</title>",
+            f'<script type="text/javascript">{offline.get_plotlyjs()}</script>',
+            "</head>",
+            "<body>",
+            f"<h1>{html.escape(self.title)}</h1>",
+            *renderedSections,
+            "</body>",
+            "</html>",
+        ])
+
+    def write(self, renderedSections : Sequence[str]) -> str :
+        directory : str = os.path.dirname(self.path)
+        if directory != "" : os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as file :
+            file.write(self.toHtml(renderedSections))
+        return self.path
+
+
+def renderSections(sections : Sequence[ReportSection]) -> List[str] :
+    return [section.render() for section in sections]
+
+# the sections of every report are spread over the workers together, each report is written once its sections are back
+def buildReports(reports : Sequence[Report], workers : int = 1, executor : Optional[Executor] = None) -> List[str] :
+    sections : List[ReportSection] = [section for report in reports for section in report.sections]
+    chunks : List[List[str]] = mapChunks(renderSections, splitChunks(sections, chunkCount(workers)), workers, executor)
+    rendered : List[str] = [section for chunk in chunks for section in chunk]
+
+    paths : List[str] = []
+    start : int = 0
+    for report in reports :
+        paths.append(report.write(rendered[start:start + len(report.sections)]))
+        start += len(report.sections)
+    return paths
+
+def buildReport(path : str, title : str, sections : Sequence[ReportSection], workers : int = 1, executor : Optional[Executor] = None) -> str :
+    return buildReports([Report(path, title, sections)], workers, executor)[0]
+
+
+def displayAnalysisMapping(properties : List[FullProperty], count : int, name : str, show : bool = True) -> List[go.Figure] :
+    return displayAppearanceMapping(analyseOneFullProperty(properties[0], properties[1:], count), name, show=show)
+
+def displayAnalysisCentiles(properties : List[FullProperty], resolution : int, show : bool = True) -> List[go.Figure] :
+    return displayFullAnalyzerResult(analyzeProperties(properties, resolution), show)
+
+# lerp previews of the first property with the next ones, the 3x3 appearance maps of the first property against all
+# the others and the centile lines of every mix
+def analysisReport(
+        path : str,
+        properties : List[FullProperty],
+        coefs : Optional[List[float]] = None,
+        count : int = 100,
+        resolution : int = 20,
+        previews : int = 3,
+        title : str = "analysis"
+    ) -> Report :
+    assert len(properties) > 1, "Error in analysisReport. Need at least 2 properties."
+    coefs = [i / count for i in range(count + 1)] if coefs is None else coefs
+
+    sections : List[ReportSection] = [
+        ReportSection(f"lerp preview 0 - {i}", MakeFullPropertyExample, coefs, properties[0], properties[i], f"0 - {i}")
+        for i in range(1, min(previews + 1, len(properties)))
+    ]
+    sections.append(ReportSection("appearance map", displayAnalysisMapping, properties, count, title))
+    sections.append(ReportSection("centiles", displayAnalysisCentiles, properties, resolution))
+    return Report(path, title, sections)
@@ -0,0 +1,118 @@
+from typing import Callable, Optional
+import numpy as np
+
+from base.propertyClass import ValueProperty
+from base.tool import PropertyModifier, transformValues
+
+# default figure size in pixels, the tolerance is measured on it
+PIXEL_TOLERANCE : float = 0.5
+FIGURE_WIDTH : int = 1000
+FIGURE_HEIGHT : int = 500
+
+
+# Samples function (vectorised: x array -> y array) on [lower, upper]. Each pass evaluates the quarter points of the
+# intervals still refined; an interval is split at them when one is further than tolerance pixels from the segment
+# drawn without them, or when the line turns by more than maxBend degrees at one of its ends (narrow peaks can fall
+# between the quarter points). Intervals narrower than minWidth pixels are not split anymore.
+def adaptiveSample(
+        function : Callable[[np.ndarray], np.ndarray],
+        lower : float,
+        upper : float,
+        tolerance : float = PIXEL_TOLERANCE,
+        width : int = FIGURE_WIDTH,
+        height : int = FIGURE_HEIGHT,
+        initial : int = 33,
+        minWidth : float = 0.25,
+        maxBend : float = 10.0,
+        maxPoints : int = 1 << 14
+    ) -> tuple[np.ndarray, np.ndarray] :
+    assert lower < upper, f"Error in adaptiveSample. Empty domain [{lower}, {upper}]."
+    assert tolerance > 0, "Error in adaptiveSample. tolerance must be over 0."
+    assert initial >= 2, "Error in adaptiveSample. initial must be at least 2."
+
+    x : np.ndarray = np.linspace(lower, upper, initial)
+    y : np.ndarray = np.asarray(function(x), dtype=float)
+    active : np.ndarray = np.ones(len(x) - 1, dtype=bool) # intervals still refined
+    xScale : float = width / (upper - lower)
+    fractions : np.ndarray = np.array([0.25, 0.5, 0.75])
+
+    while active.any() and len(x) < maxPoints :
+        left : np.ndarray = np.flatnonzero(active)
+        right : np.ndarray = left + 1
+        xInner : np.ndarray = x[left, np.newaxis] + (x[right] - x[left])[:, np.newaxis] * fractions
+        yInner : np.ndarray = np.asarray(function(xInner.ravel()), dtype=float).reshape(xInner.shape)
+
+        finite : np.ndarray = np.concatenate((y, yInner.ravel()))
+        finite = finite[np.isfinite(finite)]
+        yScale : float = height / (finite.max() - finite.min()) if len(finite) != 0 and finite.max() > finite.min() else 1.0
+
+        # distance in pixels between the inner points and the chord of their interval
+        dx : np.ndarray = (x[right] - x[left]) * xScale
+        dy : np.ndarray = (y[right] - y[left]) * yScale
+        chord : np.ndarray = y[left, np.newaxis] + (y[right] - y[left])[:, np.newaxis] * fractions
+        offset : np.ndarray = np.abs(yInner - chord).max(axis=1) * yScale
+        distance : np.ndarray = offset * dx / np.maximum(np.hypot(dx, dy), 1e-300)
+        refine : np.ndarray = (~(distance <= tolerance) | bends(x, y, xScale, yScale, maxBend)[left]) & (dx > minWidth) # nan distances are refined too
+        refine &= np.cumsum(refine) * len(fractions) <= maxPoints - len(x)
+        if not refine.any() : break
+
+        added : int = int(refine.sum()) * len(fractions)
+        inserted : np.ndarray = np.concatenate((np.zeros(len(x), dtype=bool), np.ones(added, dtype=bool)))
+        order : np.ndarray = np.argsort(np.concatenate((x, xInner[refine].ravel())), kind="stable")
+        x = np.concatenate((x, xInner[refine].ravel()))[order]
+        y = np.concatenate((y, yInner[refine].ravel()))[order]
+        inserted = inserted[order]
+        active = inserted[:-1] | inserted[1:] # every part of a split interval
+
+    return x, y
+
+# intervals with a turn over maxBend degrees (in pixels) at one of their ends
+def bends(x : np.ndarray, y : np.ndarray, xScale : float, yScale : float, maxBend : float) -> np.ndarray :
+    angles : np.ndarray = np.arctan2(np.diff(y) * yScale, np.diff(x) * xScale)
+    turn : np.ndarray = np.abs(np.diff(angles)) > np.radians(maxBend)
+    ret : np.ndarray = np.zeros(len(x) - 1, dtype=bool)
+    ret[:-1] |= turn
+    ret[1:] |= turn
+    return ret
+
+def sampleModifier(
+        propertymodifier : PropertyModifier,
+        lower : float,
+        upper : float,
+        tolerance : float = PIXEL_TOLERANCE,
+        width : int = FIGURE_WIDTH,
+        height : int = FIGURE_HEIGHT
+    ) -> tuple[np.ndarray, np.ndarray] :
+    return adaptiveSample(lambda x : transformValues(propertymodifier, x), lower, upper, tolerance, width, height)
+
+def sampleValuePropertyLerp(
+        property0 : ValueProperty,
+        property1 : ValueProperty,
+        tolerance : float = PIXEL_TOLERANCE,
+        width : int = FIGURE_WIDTH,
+        height : int = FIGURE_HEIGHT,
+        lower : float = 0.0,
+        upper : float = 1.0
+    ) -> tuple[np.ndarray, np.ndarray] :
+    return adaptiveSample(lambda coefs : ValueProperty.lerpMany(property0, property1, coefs).values, lower, upper, tolerance, width, height)
+
+# largest distance in pixels between a dense evaluation and the sampled polyline (measured across each segment),
+# used to check a tolerance
+def sampleError(
+        function : Callable[[np.ndarray], np.ndarray],
+        x : np.ndarray,
+        y : np.ndarray,
+        width : int = FIGURE_WIDTH,
+        height : int = FIGURE_HEIGHT,
+        dense : int = 100_001
+    ) -> float :
+    xDense : np.ndarray = np.linspace(x[0], x[-1], dense)
+    yDense : np.ndarray = np.asarray(function(xDense), dtype=float)
+    yRange : float = float(np.nanmax(yDense) - np.nanmin(yDense))
+    xScale, yScale = width / (x[-1] - x[0]), height / (yRange if yRange > 0 else 1.0)
+
+    segment : np.ndarray = np.clip(np.searchsorted(x, xDense) - 1, 0, len(x) - 2)
+    dx : np.ndarray = (x[segment + 1] - x[segment]) * xScale
+    dy : np.ndarray = (y[segment + 1] - y[segment]) * yScale
+    offset : np.ndarray = np.abs(np.interp(xDense, x, y) - yDense) * yScale
+    return float(np.nanmax(offset * dx / np.maximum(np.hypot(dx, dy), 1e-300)))
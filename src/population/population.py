@@ -0,0 +1,130 @@
+from typing import List, Optional
+from concurrent.futures import Executor
+from functools import partial
+import numpy as np
+
+from analyzer.parallel import mapChunks
+from base.propertyClass import FullPropertyBatch, ValuePropertyBatch
+from modifier.curveProperty import CurvePropertyBatch
+from modifier.pointProperty import PointPropertyBatch
+
+# Array backed random populations. Every population is drawn as unit samples of [0, 1) (one column per parameter)
+# mapped on the rnd distributions of the modifiers:
+#   "random" chunk i draws from its own Generator, seeded by the i-th child of SeedSequence(seed)
+#   "halton" and "sobol" are low discrepancy sequences, chunks are consecutive index ranges of a single sequence
+#            randomised by the seed (random shift for halton, scrambling for sobol)
+# The result only depends on (count, seed, mode, chunkSize), never on the worker count. sobol needs scipy.
+
+MODES : List[str] = ["random", "halton", "sobol"]
+CHUNK_SIZE : int = 1 << 16
+
+
+def resolveSeed(seed : Optional[int] = None) -> int :
+    # None draws fresh entropy once, in the caller process, so every chunk shares it
+    return int(np.random.SeedSequence(seed).entropy)
+
+# independent streams for count workers
+def spawnGenerators(seed : Optional[int], count : int) -> List[np.random.Generator] :
+    return [np.random.default_rng(sequence) for sequence in np.random.SeedSequence(seed).spawn(count)]
+
+def primes(count : int) -> List[int] :
+    ret : List[int] = []
+    candidate : int = 2
+    while len(ret) < count :
+        if all(candidate % prime != 0 for prime in ret if prime * prime <= candidate) : ret.append(candidate)
+        candidate += 1
+    return ret
+
+def radicalInverse(indices : np.ndarray, base : int) -> np.ndarray :
+    ret : np.ndarray = np.zeros(len(indices))
+    scale : float = 1 / base
+    indices = indices.copy()
+    while (indices > 0).any() :
+        ret += (indices % base) * scale
+        indices //= base
+        scale /= base
+    return ret
+
+# points start to start + count of the Halton sequence (the point 0 is skipped), one prime base per dimension
+def haltonPoints(start : int, count : int, dimensions : int) -> np.ndarray :
+    indices : np.ndarray = np.arange(start + 1, start + count + 1, dtype=np.int64)
+    return np.stack([radicalInverse(indices, base) for base in primes(dimensions)], axis=1).reshape(count, dimensions)
+
+def sobolPoints(start : int, count : int, dimensions : int, seed : int) -> np.ndarray :
+    try :
+        from scipy.stats import qmc
+    except ImportError as error :
+        raise ImportError("Error in sobolPoints. The sobol mode needs scipy.") from error
+    sampler = qmc.Sobol(dimensions, scramble=True, seed=np.random.default_rng(seed))
+    sampler.fast_forward(start)
+    return sampler.random(count)
+
+# unit samples of one chunk, span is (chunk index, start, stop)
+def unitSamples(mode : str, seed : int, dimensions : int, span : tuple[int, int, int]) -> np.ndarray :
+    index, start, stop = span
+    if mode == "random" :
+        return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,))).random((stop - start, dimensions))
+    if mode == "halton" :
+        return (haltonPoints(start, stop - start, dimensions) + np.random.default_rng(seed).random(dimensions)) % 1.0
+    return sobolPoints(start, stop - start, dimensions, seed)
+
+def unitPopulation(
+        count : int, 
+        dimensions : int, 
+        seed : Optional[int] = None, 
+        mode : str = "random", 
+        workers : int = 1, 
+        executor : Optional[Executor] = None, 
+        chunkSize : int = CHUNK_SIZE
+    ) -> np.ndarray :
+    assert mode in MODES, f"Error in unitPopulation. Unknown mode {mode}, expected one of {MODES}."
+    assert count >= 0 and dimensions > 0, "Error in unitPopulation. count must be positive and dimensions over 0."
+    assert chunkSize > 0, "Error in unitPopulation. chunkSize must be over 0."
+    spans : List[tuple[int, int, int]] = [(i, start, min(start + chunkSize, count)) for i, start in enumerate(range(0, count, chunkSize))]
+    chunks : List[np.ndarray] = mapChunks(partial(unitSamples, mode, resolveSeed(seed), dimensions), spans, workers, executor)
+    return np.concatenate(chunks) if len(chunks) != 0 else np.zeros((0, dimensions))
+
+
+def randomCurves(
+        count : int, 
+        seed : Optional[int] = None, 
+        mode : str = "random", 
+        workers : int = 1, 
+        executor : Optional[Executor] = None, 
+        chunkSize : int = CHUNK_SIZE
+    ) -> CurvePropertyBatch :
+    return CurvePropertyBatch.fromUnit(unitPopulation(count, CurvePropertyBatch.UNIT_DIMENSIONS, seed, mode, workers, executor, chunkSize))
+
+def randomPoints(
+        count : int, 
+        seed : Optional[int] = None, 
+        mode : str = "random", 
+        workers : int = 1, 
+        executor : Optional[Executor] = None, 
+        chunkSize : int = CHUNK_SIZE
+    ) -> PointPropertyBatch :
+    return PointPropertyBatch.fromUnit(unitPopulation(count, PointPropertyBatch.UNIT_DIMENSIONS, seed, mode, workers, executor, chunkSize))
+
+# count FullProperty of dimensions ValueProperty each, base values uniform in baseRange, CurveProperty.rnd (or
+# PointProperty.rnd_AutoCircle) modifiers
+def randomFullProperties(
+        count : int, 
+        dimensions : int = 2, 
+        point : bool = False,
+        baseRange : tuple[float, float] = (1.0, 100.0),
+        seed : Optional[int] = None, 
+        mode : str = "random", 
+        workers : int = 1, 
+        executor : Optional[Executor] = None, 
+        chunkSize : int = CHUNK_SIZE
+    ) -> FullPropertyBatch :
+    assert dimensions >= 2, "Error in randomFullProperties. FullProperty have less than 2 ValueProperty."
+    batchClass = PointPropertyBatch if point else CurvePropertyBatch
+    width : int = 1 + batchClass.UNIT_DIMENSIONS # base value then modifier, per ValueProperty
+    unit : np.ndarray = unitPopulation(count, dimensions * width, seed, mode, workers, executor, chunkSize)
+
+    lower, upper = baseRange
+    baseValues : np.ndarray = np.ascontiguousarray((lower + (upper - lower) * unit[:, ::width]).T) # (dimensions, N) block
+    return FullPropertyBatch(*[
+        ValuePropertyBatch(baseValues[i], batchClass.fromUnit(unit[:, i * width + 1:(i + 1) * width])) for i in range(dimensions)
+    ])
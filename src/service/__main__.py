@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import List, Optional
+
+from base.propertyClass import FullProperty, FullPropertyBatch
+from catalog.catalog import loadCatalog
+from population.population import randomFullProperties
+from .client import loadTest, randomRequests
+from .service import MixingService
+
+
+def loadProperties(args : argparse.Namespace) -> FullPropertyBatch :
+    if args.catalog is not None :
+        batch = loadCatalog(args.catalog).getBatch()
+        assert isinstance(batch, FullPropertyBatch), "Error in loadProperties. The catalog does not hold FullProperty."
+        return batch
+    return randomFullProperties(args.random, seed=args.seed)
+
+# the in-process path the service replaces: FullProperty.weightedMean then getValues, one request at a time
+def referenceRate(properties : FullPropertyBatch, requests : List[tuple[List[int], List[float]]]) -> float :
+    start : float = time.perf_counter()
+    for indices, weights in requests :
+        FullProperty.weightedMean([properties[i] for i in indices], weights).getValues()
+    return len(requests) / (time.perf_counter() - start)
+
+
+def main(argv : Optional[List[str]] = None) -> int :
+    parser = argparse.ArgumentParser(prog="python -m service", description="Local micro-batching mixing service.")
+    parser.add_argument("mode", choices=["tcp", "stdio", "loadtest"])
+    parser.add_argument("--catalog", metavar="PATH", help="FullProperty catalog to serve (default: a random population)")
+    parser.add_argument("--random", type=int, default=10_000, help="size of the random population")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--window", type=float, default=1.0, help="batching window in milliseconds (0: one event loop iteration)")
+    parser.add_argument("--max-batch", type=int, default=4096)
+    parser.add_argument("--requests", type=int, default=100_000, help="loadtest: number of requests")
+    parser.add_argument("--concurrency", type=int, default=64, help="loadtest: requests in flight per connection")
+    parser.add_argument("--clients", type=int, default=4, help="loadtest: connections")
+    args = parser.parse_args(argv)
+
+    properties : FullPropertyBatch = loadProperties(args)
+    window : float = args.window / 1000
+    if args.mode == "tcp" :
+        asyncio.run(MixingService(properties, window, args.max_batch).serveTcp(args.host, args.port))
+    elif args.mode == "stdio" :
+        asyncio.run(MixingService(properties, window, args.max_batch).serveStdio())
+    else :
+        requests = randomRequests(args.requests, len(properties), seed=args.seed)
+        result = asyncio.run(loadTest(properties, requests, args.concurrency, args.clients, window, args.max_batch))
+        result["referencePerSecond"] = referenceRate(properties, requests[:min(len(requests), 5_000)])
+        print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__" :
+    sys.exit(main())
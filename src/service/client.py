@@ -0,0 +1,102 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import asyncio
+import itertools
+import json
+import time
+import numpy as np
+
+from base.propertyClass import FullPropertyBatch
+from .service import MixingService
+
+
+class MixingClient :
+    def __init__(self, reader : asyncio.StreamReader, writer : asyncio.StreamWriter) -> None :
+        self.reader : asyncio.StreamReader = reader
+        self.writer : asyncio.StreamWriter = writer
+        self.ids : Iterator[int] = itertools.count()
+        self.waiting : Dict[int, asyncio.Future] = {}
+        self.listener : asyncio.Task = asyncio.get_running_loop().create_task(self.listen())
+
+    @staticmethod
+    async def connect(host : str = "127.0.0.1", port : int = 0) -> "MixingClient" :
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+        return MixingClient(reader, writer)
+
+    async def listen(self) -> None :
+        try :
+            while len(line := await self.reader.readline()) != 0 :
+                answer : Dict[str, Any] = json.loads(line)
+                future : Optional[asyncio.Future] = self.waiting.pop(answer.get("id"), None)
+                if future is not None and not future.done() : future.set_result(answer)
+        finally :
+            error : ConnectionError = ConnectionError("Error in MixingClient. The connection is closed.")
+            [future.set_exception(error) for future in self.waiting.values() if not future.done()]
+            self.waiting.clear()
+
+    async def request(self, message : Dict[str, Any]) -> Dict[str, Any] :
+        requestId : int = next(self.ids)
+        future : asyncio.Future = asyncio.get_running_loop().create_future()
+        self.waiting[requestId] = future
+        self.writer.write(json.dumps(dict(message, id=requestId)).encode() + b"\n")
+        answer : Dict[str, Any] = await future
+        if "error" in answer : raise ValueError(answer["error"])
+        return answer
+
+    async def mix(self, indices : Sequence[int], weights : Sequence[float]) -> List[float] :
+        return (await self.request({"indices": list(indices), "weights": list(weights)}))["values"]
+
+    async def stats(self) -> Dict[str, Any] :
+        return (await self.request({"op": "stats"}))["stats"]
+
+    async def close(self) -> None :
+        self.writer.close()
+        await self.writer.wait_closed()
+        await self.listener
+
+
+# count random requests (ingredients and integer weights) of size ingredients out of properties
+def randomRequests(count : int, properties : int, size : tuple[int, int] = (2, 6), seed : Optional[int] = None) -> List[tuple[List[int], List[float]]] :
+    rng : np.random.Generator = np.random.default_rng(seed)
+    sizes : np.ndarray = rng.integers(size[0], size[1] + 1, count)
+    return [(rng.choice(properties, k, replace=False).tolist(), rng.integers(1, 20, k).astype(float).tolist()) for k in sizes.tolist()]
+
+# Offline load test: a service on a local port and clients connections keeping concurrency requests in flight each.
+# Latencies are measured by the clients, from the write of the request to its answer.
+async def loadTest(
+        properties : FullPropertyBatch,
+        requests : Sequence[tuple[List[int], List[float]]],
+        concurrency : int = 64,
+        clients : int = 4,
+        window : float = 0.001,
+        maxBatch : int = 4096
+    ) -> Dict[str, Any] :
+    service : MixingService = MixingService(properties, window, maxBatch)
+    server : asyncio.AbstractServer = await service.startTcp("127.0.0.1", 0)
+    port : int = server.sockets[0].getsockname()[1]
+    connections : List[MixingClient] = [await MixingClient.connect("127.0.0.1", port) for _ in range(clients)]
+    queue : Iterator[tuple[List[int], List[float]]] = iter(requests)
+    latencies : List[float] = []
+
+    async def worker(client : MixingClient) -> None :
+        for indices, weights in queue :
+            start : float = time.perf_counter()
+            await client.mix(indices, weights)
+            latencies.append(time.perf_counter() - start)
+
+    start : float = time.perf_counter()
+    await asyncio.gather(*[worker(connections[i % clients]) for i in range(concurrency * clients)])
+    elapsed : float = time.perf_counter() - start
+    stats : Dict[str, Any] = await connections[0].stats()
+    [await client.close() for client in connections]
+    await service.wait()
+    server.close()
+    await server.wait_closed()
+
+    milliseconds : np.ndarray = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "elapsed": elapsed,
+        "perSecond": len(latencies) / elapsed,
+        "latencyMs": dict(zip(["p50", "p90", "p99", "p999"], np.percentile(milliseconds, [50, 90, 99, 99.9]).tolist()), max=float(milliseconds.max())),
+        "service": stats,
+    }
@@ -0,0 +1,209 @@
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Set
+from collections import deque
+import asyncio
+import json
+import math
+import sys
+import time
+import numpy as np
+
+from base.propertyClass import FullPropertyBatch
+
+# Local mixing service. Requests are JSON lines:
+#   {"id": 1, "indices": [0, 4, 7], "weights": [1, 2, 1]}  ->  {"id": 1, "values": [x, y, ...]}
+#   {"id": 2, "op": "stats"}                               ->  {"id": 2, "stats": {...}}
+#   {"id": 3, "op": "ping"}                                ->  {"id": 3, "pong": true}
+# A failed request gets {"id": ..., "error": "..."}. Answers can come out of order, the id tells them apart.
+# Mixes arriving within window seconds (or before maxBatch of them) are evaluated together by one
+# FullPropertyBatch.weightedMeanRows call; window 0 batches what arrived in the same event loop iteration.
+
+
+class ServiceStats :
+    def __init__(self, history : int = 100_000) -> None :
+        self.latencies : Deque[float] = deque(maxlen=history) # seconds, from arrival to answer
+        self.batchSizes : Deque[int] = deque(maxlen=history)
+        self.requests : int = 0
+        self.errors : int = 0
+        self.batches : int = 0
+        self.start : float = time.perf_counter()
+
+    def addBatch(self, latencies : Sequence[float]) -> None :
+        self.latencies.extend(latencies)
+        self.batchSizes.append(len(latencies))
+        self.requests += len(latencies)
+        self.batches += 1
+
+    def toDict(self) -> Dict[str, Any] :
+        elapsed : float = time.perf_counter() - self.start
+        latencies : np.ndarray = np.array(self.latencies) * 1000
+        sizes : np.ndarray = np.array(self.batchSizes)
+        percentiles : List[float] = np.percentile(latencies, [50, 90, 99, 99.9]).tolist() if len(latencies) != 0 else [0.0] * 4
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "batches": self.batches,
+            "elapsed": elapsed,
+            "perSecond": self.requests / elapsed if elapsed > 0 else 0.0,
+            "latencyMs": dict(zip(["p50", "p90", "p99", "p999"], percentiles), max=float(latencies.max()) if len(latencies) != 0 else 0.0),
+            "batchSize": {
+                "mean": float(sizes.mean()) if len(sizes) != 0 else 0.0,
+                "p50": float(np.percentile(sizes, 50)) if len(sizes) != 0 else 0.0,
+                "max": int(sizes.max()) if len(sizes) != 0 else 0,
+            },
+        }
+
+
+class MixRequest :
+    __slots__ = ("indices", "weights", "future", "arrival")
+
+    def __init__(self, indices : List[int], weights : List[float], future : asyncio.Future) -> None :
+        self.indices : List[int] = indices
+        self.weights : List[float] = weights
+        self.future : asyncio.Future = future
+        self.arrival : float = time.perf_counter()
+
+
+# (dimensions, M) values of the mixes, rows with less ingredients are padded with 0 weights
+def mixRequests(properties : FullPropertyBatch, requests : Sequence[MixRequest]) -> np.ndarray :
+    width : int = max(len(request.indices) for request in requests)
+    indices : np.ndarray = np.zeros((len(requests), width), dtype=np.intp)
+    weights : np.ndarray = np.zeros((len(requests), width))
+    for row, request in enumerate(requests) :
+        indices[row, :len(request.indices)] = request.indices
+        weights[row, :len(request.weights)] = request.weights
+    return properties.weightedMeanRows(indices, weights).getValues()
+
+def isFiniteWeight(weight : Any) -> bool :
+    if isinstance(weight, bool) or not isinstance(weight, (int, float)) : return False
+    try :
+        return math.isfinite(float(weight)) and weight >= 0
+    except OverflowError :
+        return False
+
+# explicit checks (not asserts): they must hold under python -O, a bad request never reaches a batch
+def checkRequest(count : int, indices : Any, weights : Any) -> tuple[List[int], List[float]] :
+    if not isinstance(indices, list) or not isinstance(weights, list) :
+        raise ValueError("Error in checkRequest. indices and weights must be lists.")
+    if len(indices) != len(weights) or len(indices) == 0 :
+        raise ValueError("Error in checkRequest. indices and weights must be the same non empty size.")
+    if not all([isinstance(i, int) and not isinstance(i, bool) and 0 <= i < count for i in indices]) :
+        raise ValueError(f"Error in checkRequest. indices must be integers in [0, {count}).")
+    if not all([isFiniteWeight(w) for w in weights]) :
+        raise ValueError("Error in checkRequest. weights must be finite numbers >= 0.")
+    if sum(weights) <= 0 :
+        raise ValueError("Error in checkRequest. weights must have a positive sum.")
+    return indices, [float(w) for w in weights]
+
+
+class MixingService :
+    def __init__(self, properties : FullPropertyBatch, window : float = 0.001, maxBatch : int = 4096) -> None :
+        assert window >= 0 and maxBatch > 0, "Error in MixingService. window must be >= 0 and maxBatch over 0."
+        self.properties : FullPropertyBatch = properties
+        self.window : float = window
+        self.maxBatch : int = maxBatch
+        self.pending : List[MixRequest] = []
+        self.timer : Optional[asyncio.Handle] = None
+        self.stats : ServiceStats = ServiceStats()
+        self.connections : Set[asyncio.Task] = set()
+
+    def submit(self, indices : Any, weights : Any) -> asyncio.Future :
+        loop : asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        future : asyncio.Future = loop.create_future()
+        try :
+            request : MixRequest = MixRequest(*checkRequest(len(self.properties), indices, weights), future)
+        except ValueError as error :
+            self.stats.errors += 1
+            future.set_exception(error)
+            return future
+
+        self.pending.append(request)
+        if len(self.pending) >= self.maxBatch :
+            self.flush()
+        elif self.timer is None :
+            self.timer = loop.call_soon(self.flush) if self.window == 0 else loop.call_later(self.window, self.flush)
+        return future
+
+    async def mix(self, indices : Sequence[int], weights : Sequence[float]) -> List[float] :
+        return await self.submit(list(indices), list(weights))
+
+    def flush(self) -> None :
+        if self.timer is not None : self.timer.cancel()
+        self.timer = None
+        requests, self.pending = self.pending, []
+        if len(requests) == 0 : return
+
+        try :
+            values : List[Optional[List[float]]] = mixRequests(self.properties, requests).T.tolist()
+        except Exception :
+            values = [self.mixOne(request) for request in requests] # one request at a time, only the failing ones fail
+        now : float = time.perf_counter()
+        [request.future.set_result(value) for request, value in zip(requests, values) if value is not None and not request.future.done()]
+        self.stats.addBatch([now - request.arrival for request, value in zip(requests, values) if value is not None])
+
+    def mixOne(self, request : MixRequest) -> Optional[List[float]] :
+        try :
+            return mixRequests(self.properties, [request])[:, 0].tolist()
+        except Exception as error :
+            self.stats.errors += 1
+            if not request.future.done() : request.future.set_exception(error)
+            return None
+
+    # one JSON line in, the answer is sent through reply once known
+    def handle(self, line : bytes, reply : Callable[[Dict[str, Any]], None]) -> None :
+        try :
+            message : Dict[str, Any] = json.loads(line)
+            if not isinstance(message, dict) : raise ValueError("Error in handle. A request must be a JSON object.")
+        except ValueError as error :
+            self.stats.errors += 1
+            reply({"id": None, "error": str(error)})
+            return
+
+        requestId : Any = message.get("id")
+        operation : str = message.get("op", "mix")
+        if operation == "stats" : return reply({"id": requestId, "stats": self.stats.toDict()})
+        if operation == "ping" : return reply({"id": requestId, "pong": True})
+        if operation != "mix" : return reply({"id": requestId, "error": f"Error in handle. Unknown op {operation}."})
+
+        def done(future : asyncio.Future) -> None :
+            error : Optional[BaseException] = future.exception()
+            reply({"id": requestId, "error": str(error)} if error is not None else {"id": requestId, "values": future.result()})
+        self.submit(message.get("indices"), message.get("weights")).add_done_callback(done)
+
+    async def serveStream(self, reader : asyncio.StreamReader, writer : asyncio.StreamWriter) -> None :
+        reply : Callable[[Dict[str, Any]], None] = lambda answer : writer.write(json.dumps(answer).encode() + b"\n")
+        task : Optional[asyncio.Task] = asyncio.current_task()
+        if task is not None : self.connections.add(task)
+        try :
+            while len(line := await reader.readline()) != 0 :
+                if line.strip() : self.handle(line, reply)
+                if writer.transport.get_write_buffer_size() > 1 << 20 : await writer.drain()
+            self.flush()
+            await asyncio.sleep(0) # let the last answers be written
+            await writer.drain()
+        except ConnectionError :
+            pass
+        finally :
+            writer.close()
+            self.connections.discard(task)
+
+    # waits for the connections still answering (their clients have hung up)
+    async def wait(self) -> None :
+        await asyncio.gather(*self.connections, return_exceptions=True)
+
+    async def startTcp(self, host : str = "127.0.0.1", port : int = 0) -> asyncio.AbstractServer :
+        return await asyncio.start_server(self.serveStream, host, port, limit=1 << 20)
+
+    async def serveTcp(self, host : str = "127.0.0.1", port : int = 0) -> None :
+        server : asyncio.AbstractServer = await self.startTcp(host, port)
+        print(f"listening on {', '.join(str(socket.getsockname()) for socket in server.sockets)}", file=sys.stderr)
+        async with server :
+            await server.serve_forever()
+
+    # stdin requests, stdout answers, until stdin is closed
+    async def serveStdio(self) -> None :
+        loop : asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        reader : asyncio.StreamReader = asyncio.StreamReader(limit=1 << 20)
+        await loop.connect_read_pipe(lambda : asyncio.StreamReaderProtocol(reader), sys.stdin)
+        # StreamReaderProtocol is the public protocol that gives StreamWriter its flow control (drain)
+        transport, protocol = await loop.connect_write_pipe(lambda : asyncio.StreamReaderProtocol(asyncio.StreamReader()), sys.stdout)
+        await self.serveStream(reader, asyncio.StreamWriter(transport, protocol, reader, loop))
@@ -0,0 +1,33 @@
+from typing import Any, List, cast
+import asyncio
+import numpy as np
+
+from base.propertyClass import FullProperty, FullPropertyBatch
+from population.population import randomFullProperties
+from .client import randomRequests
+from .service import MixingService
+
+
+async def mixAll(service : MixingService, requests : List[tuple[Any, Any]]) -> List[Any] :
+    return await asyncio.gather(*[service.mix(indices, weights) for indices, weights in requests], return_exceptions=True)
+
+
+# batched mixes of any width are the scalar mixes, a bad request fails alone
+def test_serviceMatchesScalar() -> None :
+    batch : FullPropertyBatch = randomFullProperties(20, seed=23)
+    properties : List[FullProperty] = batch.toProperties()
+    requests : List[tuple[Any, Any]] = randomRequests(200, len(properties), seed=23)
+    requests.insert(50, ([0, 20], [1.0, 1.0]))
+    results : List[Any] = asyncio.run(mixAll(MixingService(batch, maxBatch=64), requests))
+
+    assert isinstance(results.pop(50), ValueError)
+    requests.pop(50)
+    expected : List[FullProperty] = [cast(FullProperty, FullProperty.weightedMean([properties[i] for i in indices], weights)) for indices, weights in requests]
+    assert np.array_equal(np.array(results).T, FullProperty.makeBatch(expected).getValues())
+
+def test_serviceRejects() -> None :
+    service : MixingService = MixingService(randomFullProperties(4, seed=24))
+    requests : List[tuple[Any, Any]] = [([0, 1], [1.0]), ([0, 4], [1.0, 1.0]), ([0, 1], [-1.0, 2.0]), ([0, 1], [0, 0]), ([True], [1.0]), ([0], [float("nan")]), ([0, 1], [1, 3])]
+    results : List[Any] = asyncio.run(mixAll(service, requests))
+    assert all([isinstance(result, ValueError) for result in results[:-1]])
+    assert isinstance(results[-1], list) and service.stats.errors == len(requests) - 1